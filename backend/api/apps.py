@@ -8,3 +8,12 @@ class ApiConfig(AppConfig):
     def ready(self):
         # Import signals module to ensure signals are connected
         import api.signals
+
+        # Register the system checks
+        import api.checks
+
+        # Count the SQL queries of every request (see api/metrics.py)
+        from django.db.backends.signals import connection_created
+        from api.metrics import install_query_counter
+
+        connection_created.connect(install_query_counter)
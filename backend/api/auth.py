@@ -0,0 +1,97 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.utils import (
+    get_http_authorization,
+    get_payload,
+    get_user_by_payload,
+)
+
+from .metrics import record_authentication, record_cache_lookup
+
+CACHE_PREFIX = "jwt-auth:"
+
+
+# JWT_GET_USER_BY_NATURAL_KEY_HANDLER loading the author profile in the same
+# query, so `user.author_profile` in the mutations costs nothing. The user is
+# read from the primary database: a lagging replica would reject the tokens of
+# new users and miss deactivations.
+def get_user_by_natural_key(username):
+    UserModel = get_user_model()
+    try:
+        return (
+            UserModel._default_manager.using(DEFAULT_DB_ALIAS)
+            .select_related("author_profile")
+            .get(**{UserModel.USERNAME_FIELD: username})
+        )
+    except UserModel.DoesNotExist:
+        return None
+
+
+# Seconds an authenticated user is reused across requests for the same token,
+# 0 disables the cross-request cache
+def get_cache_timeout():
+    return getattr(settings, "JWT_AUTH_CACHE_TIMEOUT", 0)
+
+
+def get_cache():
+    return caches[getattr(settings, "JWT_AUTH_CACHE_ALIAS", "default")]
+
+
+# The signature segment identifies a token, hashing it keeps the key short
+def get_cache_key(token):
+    signature = token.rsplit(".", 1)[-1]
+    return CACHE_PREFIX + hashlib.sha256(signature.encode("utf-8")).hexdigest()
+
+
+# Verify `token` and return its user. When the cross-request cache is enabled a
+# verified user is kept until the cache timeout or the token expiry, whichever
+# comes first.
+def get_user_by_token(token, request=None):
+    timeout = get_cache_timeout()
+    if timeout:
+        user = get_cache().get(get_cache_key(token))
+        record_cache_lookup("jwt", user is not None)
+        if user is not None:
+            return user
+
+    payload = get_payload(token, request)
+    user = get_user_by_payload(payload)
+
+    if timeout and user is not None:
+        lifetime = payload.get("exp", time.time() + timeout) - time.time()
+        timeout = min(timeout, int(lifetime))
+        if timeout > 0:
+            get_cache().set(get_cache_key(token), user, timeout)
+    return user
+
+
+# Authenticate the request from its Authorization header once. The user (or
+# the verification error) is remembered on the request for every other field
+# resolved in the same request.
+def authenticate_request(request):
+    result = getattr(request, "_jwt_auth_result", None)
+    if result is None:
+        try:
+            token = get_http_authorization(request)
+            result = (get_user_by_token(token, request), None)
+        except JSONWebTokenError as e:
+            result = (None, e)
+        request._jwt_auth_result = result
+        if result[1] is not None:
+            record_authentication("failure")
+        elif result[0] is None:
+            # A valid token of a deleted user
+            record_authentication("unknown_user")
+        else:
+            record_authentication("success")
+
+    user, error = result
+    if error is not None:
+        raise error
+    return user
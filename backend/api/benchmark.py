@@ -0,0 +1,361 @@
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from .comment_stats import repair_comment_stats
+from .models import Author, Comment, Post
+from .response_cache import invalidate
+from .search import rebuild_index
+
+# Emails of the seeded authors start with this prefix, so the benchmark data
+# can be told apart from (and cleared without touching) other data
+EMAIL_PREFIX = "bench-"
+
+WORDS = (
+    "django graphql python query cache index database async schema resolver "
+    "loader cursor filter search comment post author feed page batch latency "
+    "memory thread worker pool replica primary signal migration benchmark"
+).split()
+
+DEFAULT_TOLERANCE = 0.25
+
+# Latency increases below this many milliseconds are noise, not regressions
+LATENCY_NOISE_MS = 2.0
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def benchmark_authors():
+    return Author.objects.filter(email__startswith=EMAIL_PREFIX)
+
+
+# Delete the seeded data with three DELETE statements. Deleting through the
+# ORM would load every row and run the signal receivers of every comment.
+def clear():
+    authors = benchmark_authors()
+    posts = Post.objects.filter(author__in=authors)
+    comments = Comment.objects.filter(post__in=posts)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for queryset in (comments, posts, authors):
+            model = queryset.model
+            sql, params = queryset.values("pk").query.sql_with_params()
+            cursor.execute(
+                f"DELETE FROM {model._meta.db_table} "
+                f"WHERE {model._meta.pk.column} IN ({sql})",
+                params,
+            )
+    rebuild_index()
+    invalidate(Author, Post, Comment)
+
+
+# Seed `authors` authors, `posts` posts and `comments` comments with
+# bulk_create. The same `seed` always produces the same data, and post
+# counters and the search index are rebuilt once at the end instead of per
+# row.
+def seed(authors, posts, comments, seed=0, batch_size=1000):
+    if authors < 1 and (posts or comments):
+        raise BenchmarkError("Posts need at least one author")
+    if posts < 1 and comments:
+        raise BenchmarkError("Comments need at least one post")
+
+    rng = random.Random(seed)
+    with transaction.atomic():
+        created_authors = Author.objects.bulk_create(
+            [
+                Author(
+                    name=f"Author {i}",
+                    email=f"{EMAIL_PREFIX}{i}@example.com",
+                    bio=sentence(rng, 12),
+                )
+                for i in range(authors)
+            ],
+            batch_size=batch_size,
+        )
+        created_posts = Post.objects.bulk_create(
+            [
+                Post(
+                    title=sentence(rng, 5),
+                    content=sentence(rng, 60),
+                    author=rng.choice(created_authors),
+                )
+                for _ in range(posts)
+            ],
+            batch_size=batch_size,
+        )
+        Comment.objects.bulk_create(
+            [
+                Comment(content=sentence(rng, 20), post=rng.choice(created_posts))
+                for _ in range(comments)
+            ],
+            batch_size=batch_size,
+        )
+        repair_comment_stats(Post.objects.filter(author__in=benchmark_authors()))
+    rebuild_index()
+    invalidate(Author, Post, Comment)
+
+
+def dataset():
+    authors = benchmark_authors()
+    posts = Post.objects.filter(author__in=authors)
+    return {
+        "authors": authors.count(),
+        "posts": posts.count(),
+        "comments": Comment.objects.filter(post__in=posts).count(),
+    }
+
+
+# One scripted use of the API, made of one or more operations executed
+# against the schema like the view does, each with a new request
+class Scenario:
+    def __init__(self, schema):
+        self.schema = schema
+
+    def setup(self):
+        pass
+
+    def execute(self, query, variables=None):
+        request = RequestFactory().post("/graphql/")
+        request.user = AnonymousUser()
+        result = self.schema.execute(
+            query, variable_values=variables, context_value=request
+        )
+        if result.errors:
+            raise BenchmarkError(
+                f"{self.name}: {'; '.join(str(e) for e in result.errors)}"
+            )
+        return result.data
+
+    def run(self):
+        raise NotImplementedError
+
+
+class FeedScenario(Scenario):
+    name = "feed"
+    query = """
+        query Feed($orderBy: String) {
+          allPosts(first: 20, orderBy: $orderBy) {
+            edges { node { title createdAt commentCount author { name } } }
+          }
+        }
+    """
+
+    def run(self):
+        self.execute(self.query, {"orderBy": "-created_at"})
+        self.execute(self.query, {"orderBy": "-last_comment_at"})
+
+
+# The 20 posts 90% of the way into the feed, by offset and by walking the
+# keyset pages
+class DeepPaginationScenario(Scenario):
+    name = "deep_pagination"
+    offset_query = """
+        query Page($offset: Int) {
+          allPosts(first: 20, offset: $offset) { edges { node { title } } }
+        }
+    """
+    keyset_query = """
+        query Page($after: String) {
+          allPostsKeyset(first: 20, after: $after) {
+            edges { node { title } }
+            pageInfo { endCursor hasNextPage }
+          }
+        }
+    """
+    keyset_pages = 10
+
+    def setup(self):
+        posts = Post.objects.filter(author__in=benchmark_authors()).count()
+        self.offset = max(posts * 9 // 10 - 20, 0)
+
+    def run(self):
+        self.execute(self.offset_query, {"offset": self.offset})
+        after = None
+        for _ in range(self.keyset_pages):
+            data = self.execute(self.keyset_query, {"after": after})
+            page_info = data["allPostsKeyset"]["pageInfo"]
+            if not page_info["hasNextPage"]:
+                break
+            after = page_info["endCursor"]
+
+
+class FilteredSearchScenario(Scenario):
+    name = "filtered_search"
+    search_query = """
+        query Search($query: String!) {
+          searchPosts(query: $query, first: 20) {
+            edges { node { title author { name } } }
+          }
+        }
+    """
+    filter_query = """
+        query Filter($name: String) {
+          allPosts(first: 20, authorNameExact: $name, orderBy: "-created_at") {
+            edges { node { title } }
+          }
+        }
+    """
+
+    def run(self):
+        self.execute(self.search_query, {"query": "graphql cache"})
+        self.execute(self.filter_query, {"name": "Author 0"})
+
+
+class NestedScenario(Scenario):
+    name = "nested_author_posts_comments"
+    query = """
+        query {
+          allAuthors(first: 10) {
+            edges { node {
+              name
+              posts(first: 10) { edges { node {
+                title
+                comments(first: 5) { edges { node { content } } }
+              } } }
+            } }
+          }
+        }
+    """
+
+    def run(self):
+        self.execute(self.query)
+
+
+# A burst of comment creations in one operation, rolled back so every run
+# starts from the same data
+class MutationBurstScenario(Scenario):
+    name = "mutation_burst"
+    size = 10
+
+    def setup(self):
+        post_ids = list(
+            Post.objects.filter(author__in=benchmark_authors())
+            .order_by("pk")
+            .values_list("pk", flat=True)[: self.size]
+        )
+        if not post_ids:
+            raise BenchmarkError(f"{self.name}: no benchmark posts, seed them first")
+        fields = "\n".join(
+            f'c{i}: createComment(postId: {post_ids[i % len(post_ids)]}, '
+            f'content: "Burst comment {i}") {{ comment {{ id }} }}'
+            for i in range(self.size)
+        )
+        self.query = f"mutation {{ {fields} }}"
+
+    def run(self):
+        with transaction.atomic():
+            self.execute(self.query)
+            transaction.set_rollback(True)
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        FeedScenario,
+        DeepPaginationScenario,
+        FilteredSearchScenario,
+        NestedScenario,
+        MutationBurstScenario,
+    )
+}
+
+
+def percentile(values, p):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+# Run `scenario` `iterations` times after `warmup` unmeasured runs. Latency
+# and SQL queries are measured on every run, peak memory on one more run
+# (tracing allocations slows everything down).
+def measure(scenario, iterations, warmup=1):
+    if iterations < 1:
+        raise BenchmarkError("At least one iteration is required")
+    scenario.setup()
+    for _ in range(warmup):
+        scenario.run()
+
+    timings, queries = [], []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            scenario.run()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+
+    tracemalloc.start()
+    try:
+        scenario.run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "queries": max(queries),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run(schema, names=None, iterations=50, warmup=5):
+    names = names or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise BenchmarkError(f"Unknown scenarios: {', '.join(unknown)}")
+    return {
+        "dataset": dataset(),
+        "scenarios": {
+            name: measure(SCENARIOS[name](schema), iterations, warmup)
+            for name in names
+        },
+    }
+
+
+# Regressions of `results` against `baseline`: p95 latency or peak memory
+# growing by more than `tolerance` (a fraction), or any extra SQL query
+def compare(baseline, results, tolerance=DEFAULT_TOLERANCE):
+    if baseline.get("dataset") != results.get("dataset"):
+        raise BenchmarkError(
+            f"The baseline was measured on {baseline.get('dataset')}, "
+            f"not on {results.get('dataset')}"
+        )
+
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: {current['queries']} SQL queries, "
+                f"baseline {previous['queries']}"
+            )
+        if (
+            current["p95_ms"] > previous["p95_ms"] * (1 + tolerance)
+            and current["p95_ms"] - previous["p95_ms"] > LATENCY_NOISE_MS
+        ):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']} ms, baseline {previous['p95_ms']} ms"
+            )
+        if current["peak_memory_kb"] > previous["peak_memory_kb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak memory {current['peak_memory_kb']} KiB, "
+                f"baseline {previous['peak_memory_kb']} KiB"
+            )
+    return regressions
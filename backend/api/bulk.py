@@ -0,0 +1,174 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .comment_stats import comments_added, comments_removed
+from .models import Comment, Post
+from .pubsub import comment_created_channel, post_updated_channel, publish
+from .response_cache import invalidate
+from .search import index_posts
+
+# bulk_create() and bulk_update() do not send post_save, so the functions
+# below do the work of the receivers in api/signals.py for the whole batch.
+
+DEFAULT_BULK_MAX_ITEMS = 1000
+
+
+# Problem with one item of a bulk mutation, `index` is its position in the
+# input list
+class ItemError:
+    def __init__(self, index, message, id=None):
+        self.index = index
+        self.message = message
+        self.id = id
+
+
+def check_size(items):
+    max_items = getattr(settings, "GRAPHQL_BULK_MAX_ITEMS", DEFAULT_BULK_MAX_ITEMS)
+    if len(items) > max_items:
+        raise Exception(f"At most {max_items} items are allowed per bulk mutation")
+
+
+def validation_message(error):
+    if hasattr(error, "message_dict"):
+        return "; ".join(
+            f"{field}: {' '.join(messages)}"
+            for field, messages in error.message_dict.items()
+        )
+    return " ".join(error.messages)
+
+
+# Validate the fields of an unsaved instance, relations are checked by the
+# callers in bulk
+def clean(instance, exclude):
+    try:
+        instance.full_clean(exclude=exclude, validate_unique=False)
+    except ValidationError as e:
+        return validation_message(e)
+    return None
+
+
+# Create posts by `author` from dicts with title and content. Returns the
+# created posts and the errors of the skipped items.
+def create_posts(author, items):
+    check_size(items)
+    posts, errors = [], []
+    for index, item in enumerate(items):
+        post = Post(title=item["title"], content=item["content"], author=author)
+        message = clean(post, exclude=["author"])
+        if message:
+            errors.append(ItemError(index, message))
+        else:
+            posts.append(post)
+
+    with transaction.atomic():
+        posts = Post.objects.bulk_create(posts)
+        index_posts(posts)
+        invalidate(Post)
+    return posts, errors
+
+
+# Update the posts of `user` from dicts with id and optional title and
+# content, keeping the ownership check of UpdatePost
+def update_posts(user, items):
+    check_size(items)
+    posts, errors, seen = [], [], set()
+    with transaction.atomic():
+        existing = Post.objects.select_related("author").in_bulk(
+            [item["id"] for item in items]
+        )
+        for index, item in enumerate(items):
+            id = item["id"]
+            if id in seen:
+                errors.append(ItemError(index, "Post is listed more than once", id))
+                continue
+            seen.add(id)
+            post = existing.get(id)
+            if post is None:
+                errors.append(ItemError(index, "Post does not exist", id))
+                continue
+            if post.author.user_id != user.pk:
+                errors.append(
+                    ItemError(
+                        index, "You do not have permission to edit this post", id
+                    )
+                )
+                continue
+            if item.get("title"):
+                post.title = item["title"]
+            if item.get("content"):
+                post.content = item["content"]
+            message = clean(post, exclude=["author"])
+            if message:
+                errors.append(ItemError(index, message, id))
+                continue
+            posts.append(post)
+
+        now = timezone.now()
+        for post in posts:
+            post.updated_at = now
+        Post.objects.bulk_update(posts, ["title", "content", "updated_at"])
+        index_posts(posts)
+        invalidate(Post)
+        for post in posts:
+            publish(post_updated_channel(post.pk), post.pk)
+    return posts, errors
+
+
+# Create comments from dicts with post_id and content
+def create_comments(items):
+    check_size(items)
+    comments, errors = [], []
+    with transaction.atomic():
+        post_ids = set(
+            Post.objects.filter(
+                pk__in=[item["post_id"] for item in items]
+            ).values_list("pk", flat=True)
+        )
+        for index, item in enumerate(items):
+            if item["post_id"] not in post_ids:
+                errors.append(ItemError(index, "Post does not exist"))
+                continue
+            comment = Comment(content=item["content"], post_id=item["post_id"])
+            message = clean(comment, exclude=["post"])
+            if message:
+                errors.append(ItemError(index, message))
+                continue
+            comments.append(comment)
+
+        comments = Comment.objects.bulk_create(comments)
+        comments_added(comments)
+        invalidate(Comment, Post)
+        for comment in comments:
+            publish(comment_created_channel(comment.post_id), comment.pk)
+        for post_id in {comment.post_id for comment in comments}:
+            publish(post_updated_channel(post_id), post_id)
+    return comments, errors
+
+
+# Delete comments by id with one DELETE. QuerySet.delete() would send
+# post_delete, and its receivers would update the post, the response cache and
+# the subscriptions once per comment, so the rows are deleted without signals
+# (nothing references a comment) and the batch is accounted for here.
+def delete_comments(ids):
+    check_size(ids)
+    with transaction.atomic():
+        existing = dict(
+            Comment.objects.filter(pk__in=ids).values_list("pk", "post_id")
+        )
+        errors = [
+            ItemError(index, "Comment does not exist", id)
+            for index, id in enumerate(ids)
+            if id not in existing
+        ]
+        comments = Comment.objects.filter(pk__in=existing)
+        comments._raw_delete(comments.db)
+        counts = Counter(existing.values())
+        comments_removed(counts)
+        invalidate(Comment, Post)
+        for post_id in counts:
+            publish(post_updated_channel(post_id), post_id)
+    return sorted(existing), errors
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from . import persisted_queries, response_cache
+
+# Backends keeping their entries in the memory of one process
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+# (setting, cache alias) of the enabled features sharing state between the
+# worker processes through the cache
+def shared_cache_aliases():
+    aliases = []
+    if persisted_queries.get_setting("ENABLED"):
+        aliases.append(
+            ("GRAPHQL_PERSISTED_QUERIES", persisted_queries.get_setting("CACHE_ALIAS"))
+        )
+    if response_cache.get_setting("ENABLED"):
+        aliases.append(
+            ("GRAPHQL_RESPONSE_CACHE", response_cache.get_setting("CACHE_ALIAS"))
+        )
+    return aliases
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    for setting, alias in shared_cache_aliases():
+        backend = settings.CACHES.get(alias, {}).get("BACKEND")
+        if backend in PROCESS_LOCAL_BACKENDS:
+            errors.append(
+                Warning(
+                    f"{setting} uses the {alias!r} cache, which is local to "
+                    "each process.",
+                    hint=(
+                        "Workers of a multi-process deployment do not see each "
+                        "other's entries. Set CACHE_URL to a shared cache "
+                        "(redis://, pymemcache://, filecache:// or dbcache://)."
+                    ),
+                    obj=backend,
+                    id="api.W001",
+                )
+            )
+    return errors
@@ -0,0 +1,126 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Comment, Post
+from .response_cache import invalidate
+
+
+def latest_comment_subquery():
+    return Subquery(
+        Comment.objects.filter(post=OuterRef("pk"))
+        .order_by("-created_at")
+        .values("created_at")[:1]
+    )
+
+
+def comment_count_subquery():
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        Value(0),
+    )
+
+
+# Comments landing within this many seconds of the last bump of the post's
+# updated_at do not bump it again. 0 bumps it on every comment save.
+def coalesce_window():
+    return timedelta(seconds=getattr(settings, "POST_TOUCH_COALESCE_SECONDS", 0))
+
+
+# New value for Post.updated_at when a comment is saved at `now`
+def touched_at(now):
+    window = coalesce_window()
+    if not window:
+        return Value(now)
+    return Case(
+        When(updated_at__gt=now - window, then=F("updated_at")),
+        default=Value(now),
+    )
+
+
+# Bump updated_at of the comment's post with a single UPDATE, skipping the
+# write entirely if it was bumped within the coalescing window
+def touch_post(comment):
+    now = timezone.now()
+    posts = Post.objects.filter(pk=comment.post_id)
+    window = coalesce_window()
+    if window:
+        posts = posts.filter(updated_at__lte=now - window)
+    posts.update(updated_at=now)
+
+
+# Account for a new comment with a single UPDATE, without reading the post.
+# updated_at is bumped in the same statement.
+def comment_added(comment):
+    comments_added([comment])
+
+
+# Account for comments created together (bulk_create), one UPDATE per post
+def comments_added(comments):
+    created = defaultdict(list)
+    for comment in comments:
+        created[comment.post_id].append(comment.created_at)
+    now = timezone.now()
+    for post_id, dates in created.items():
+        latest = max(dates)
+        Post.objects.filter(pk=post_id).update(
+            comment_count=F("comment_count") + len(dates),
+            last_comment_at=Greatest(
+                Coalesce("last_comment_at", Value(latest)), Value(latest)
+            ),
+            updated_at=touched_at(now),
+        )
+
+
+# Account for a deleted comment. The latest comment date is recomputed in the
+# same statement in case the deleted comment was the latest one.
+def comment_removed(comment):
+    comments_removed({comment.post_id: 1})
+
+
+# Account for comments deleted together, from {post_id: number of deleted
+# comments}, one UPDATE per post
+def comments_removed(counts):
+    for post_id, count in counts.items():
+        Post.objects.filter(pk=post_id).update(
+            comment_count=Greatest(F("comment_count") - count, Value(0)),
+            last_comment_at=latest_comment_subquery(),
+        )
+
+
+# Recompute the stats of `posts` (all posts by default) from the comments
+# table. Returns the number of posts whose stored values were wrong.
+def repair_comment_stats(posts=None, dry_run=False):
+    posts = Post.objects.all() if posts is None else posts
+    rows = posts.annotate(
+        actual_count=comment_count_subquery(),
+        actual_last_comment_at=latest_comment_subquery(),
+    ).values_list(
+        "pk",
+        "comment_count",
+        "last_comment_at",
+        "actual_count",
+        "actual_last_comment_at",
+    )
+    stale = [
+        pk
+        for pk, count, last, actual_count, actual_last in rows.iterator()
+        if count != actual_count or last != actual_last
+    ]
+    if stale and not dry_run:
+        Post.objects.filter(pk__in=stale).update(
+            comment_count=comment_count_subquery(),
+            last_comment_at=latest_comment_subquery(),
+        )
+        invalidate(Post)
+    return len(stale)
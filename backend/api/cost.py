@@ -0,0 +1,189 @@
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    get_named_type,
+    is_composite_type,
+    is_list_type,
+    is_non_null_type,
+)
+from graphql.execution.values import get_argument_values
+
+DEFAULTS = {
+    "ENABLED": True,
+    # Requests above this cost are rejected before execution
+    "MAX_COST": 50000,
+    # Requests nesting fields deeper than this are rejected. Connection
+    # wrappers (edges, node, pageInfo) do not add depth.
+    "MAX_DEPTH": 8,
+    # Cost of a field returning an object, scalars are free
+    "OBJECT_COST": 1,
+    # Multiplier for lists and connections without `first`/`last`. Defaults to
+    # graphene-django's RELAY_CONNECTION_MAX_LIMIT.
+    "DEFAULT_LIST_SIZE": None,
+    # Per-field overrides, e.g. {"Query.searchPosts": 10}
+    "FIELD_COSTS": {},
+}
+
+
+def get_setting(name):
+    return getattr(settings, "GRAPHQL_QUERY_COST", {}).get(name, DEFAULTS[name])
+
+
+# Structured error returned when a request is over budget
+class QueryCostError(GraphQLError):
+    def __init__(self, message, code, **extensions):
+        super().__init__(message, extensions={"code": code, **extensions})
+
+
+def is_connection_type(graphql_type):
+    fields = getattr(graphql_type, "fields", {})
+    return "edges" in fields and "pageInfo" in fields
+
+
+def unwrap_non_null(graphql_type):
+    return graphql_type.of_type if is_non_null_type(graphql_type) else graphql_type
+
+
+class CostAnalyzer:
+    def __init__(self, schema, document, variables):
+        self.schema = schema
+        self.variables = variables or {}
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+        self.list_size = (
+            get_setting("DEFAULT_LIST_SIZE")
+            or graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+            or 100
+        )
+        self.object_cost = get_setting("OBJECT_COST")
+        self.field_costs = get_setting("FIELD_COSTS")
+        self.max_depth = 0
+
+    # Total cost of an operation
+    def operation_cost(self, operation):
+        root_type = self.schema.get_root_type(operation.operation)
+        return self.selection_cost(root_type, operation.selection_set, 0, False)
+
+    def fields(self, parent_type, selection_set, visited=None):
+        visited = set() if visited is None else visited
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield parent_type, selection
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = self.schema.get_type(
+                        selection.type_condition.name.value
+                    )
+                yield from self.fields(fragment_type, selection.selection_set, visited)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in visited:
+                    continue
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                yield from self.fields(
+                    fragment_type, fragment.selection_set, visited | {name}
+                )
+
+    def selection_cost(self, parent_type, selection_set, depth, in_connection):
+        if selection_set is None:
+            return 0
+        cost = 0
+        for field_type, field_node in self.fields(parent_type, selection_set):
+            cost += self.field_cost(field_type, field_node, depth, in_connection)
+        return cost
+
+    def field_cost(self, parent_type, field_node, depth, in_connection):
+        name = field_node.name.value
+        field_def = getattr(parent_type, "fields", {}).get(name)
+        if field_def is None:
+            return 0
+
+        return_type = field_def.type
+        named_type = get_named_type(return_type)
+
+        # edges / node / pageInfo only wrap the real nodes of a connection
+        if in_connection and name in ("edges", "node", "pageInfo"):
+            return self.selection_cost(
+                named_type, field_node.selection_set, depth, name == "edges"
+            )
+
+        depth += 1
+        self.max_depth = max(self.max_depth, depth)
+
+        default_cost = self.object_cost if is_composite_type(named_type) else 0
+        cost = self.field_costs.get(f"{parent_type.name}.{name}", default_cost)
+
+        children = self.selection_cost(
+            named_type,
+            field_node.selection_set,
+            depth,
+            is_connection_type(named_type),
+        )
+        if is_connection_type(named_type):
+            children *= self.connection_size(field_def, field_node)
+        elif is_list_type(unwrap_non_null(return_type)):
+            children *= self.list_size
+        return cost + children
+
+    # Number of nodes a connection can return: `first`/`last`, or the default
+    def connection_size(self, field_def, field_node):
+        try:
+            args = get_argument_values(field_def, field_node, self.variables)
+        except GraphQLError:
+            # Invalid variables are reported by the execution itself
+            args = {}
+        size = args.get("first") or args.get("last")
+        return min(size, self.list_size) if size else self.list_size
+
+
+# Compute the cost and depth of the operation that will be executed. Raises a
+# QueryCostError when either is over the configured limits.
+def analyze_query(schema, document, operation_name=None, variables=None):
+    operations = [
+        definition
+        for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+    ]
+    if operation_name:
+        operations = [
+            op for op in operations if op.name and op.name.value == operation_name
+        ]
+    if len(operations) != 1:
+        # Ambiguous or unknown operations are reported by the execution itself
+        return {"requestedQueryCost": 0, "maximumAvailable": get_setting("MAX_COST")}
+
+    analyzer = CostAnalyzer(schema, document, variables)
+    cost = analyzer.operation_cost(operations[0])
+    max_cost = get_setting("MAX_COST")
+    max_depth = get_setting("MAX_DEPTH")
+    summary = {
+        "requestedQueryCost": cost,
+        "maximumAvailable": max_cost,
+        "depth": analyzer.max_depth,
+        "maximumDepth": max_depth,
+    }
+
+    if max_depth and analyzer.max_depth > max_depth:
+        raise QueryCostError(
+            f"Query depth {analyzer.max_depth} exceeds the maximum depth of {max_depth}",
+            "QUERY_TOO_DEEP",
+            cost=summary,
+        )
+    if max_cost and cost > max_cost:
+        raise QueryCostError(
+            f"Query cost {cost} exceeds the maximum cost of {max_cost}",
+            "QUERY_TOO_COMPLEX",
+            cost=summary,
+        )
+    return summary
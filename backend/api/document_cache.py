@@ -0,0 +1,85 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from graphql import parse
+from graphql.validation import validate
+from graphene_django.settings import graphene_settings
+
+from .metrics import record_cache_lookup
+
+DEFAULT_DOCUMENT_CACHE_SIZE = 256
+
+
+# LRU cache of parsed and validated GraphQL documents, keyed by the sha256 of
+# the query text. Entries belong to one schema: when a different (rebuilt)
+# schema is seen the cache is emptied.
+class DocumentCache:
+    def __init__(self, maxsize=DEFAULT_DOCUMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._schema = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query):
+        return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+    # Return (document, validation_errors) for `query`, parsing and validating
+    # it only on a cache miss. Syntax errors are raised and never cached.
+    def get(self, schema, query, validation_rules=None):
+        key = (self.key(query), tuple(validation_rules or ()))
+        with self._lock:
+            if schema is not self._schema:
+                self._entries.clear()
+                self._schema = schema
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                record_cache_lookup("document", True)
+                return entry
+            self.misses += 1
+        record_cache_lookup("document", False)
+
+        document = parse(query)
+        errors = validate(
+            schema,
+            document,
+            validation_rules,
+            graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        entry = (document, errors)
+
+        if self.maxsize > 0:
+            with self._lock:
+                if schema is self._schema:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._schema = None
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+document_cache = DocumentCache(
+    getattr(settings, "GRAPHQL_DOCUMENT_CACHE_SIZE", DEFAULT_DOCUMENT_CACHE_SIZE)
+)
@@ -0,0 +1,46 @@
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from graphql import ExecutionContext, OperationType
+
+
+# Run `func` in a worker thread with its own database connection, closed (per
+# CONN_MAX_AGE) when it is done, as Django does at the end of a request
+def run_in_thread(func, *args):
+    def run():
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)()
+
+
+# ExecutionContext resolving the top-level fields of a query (or of a
+# subscription event) concurrently.
+#
+# The resolvers, connection fields and loaders below the root are synchronous,
+# so every top-level field is resolved (with its whole subtree) in its own
+# worker thread while the event loop awaits all of them together. Mutation
+# fields keep running one after the other.
+class ConcurrentExecutionContext(ExecutionContext):
+    concurrent_operations = (OperationType.QUERY, OperationType.SUBSCRIPTION)
+
+    def execute_field(self, parent_type, source, field_nodes, path):
+        execute_field = super().execute_field
+        if (
+            path.prev is not None
+            or self.operation.operation not in self.concurrent_operations
+        ):
+            return execute_field(parent_type, source, field_nodes, path)
+
+        async def execute_in_thread():
+            result = await run_in_thread(
+                execute_field, parent_type, source, field_nodes, path
+            )
+            if isawaitable(result):
+                result = await result
+            return result
+
+        return execute_in_thread()
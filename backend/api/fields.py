@@ -0,0 +1,87 @@
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.settings import graphene_settings
+from graphql_relay import cursor_to_offset
+from promise import Promise
+
+from .loaders import get_loaders
+
+# Arguments handled by the relay connection itself rather than the filterset
+PAGINATION_ARGS = {"first", "last", "before", "after", "offset"}
+
+
+# Returns True when a connection field was called with filterset arguments
+def has_filter_args(kwargs):
+    return any(
+        value is not None
+        for key, value in kwargs.items()
+        if key not in PAGINATION_ARGS
+    )
+
+
+# Number of rows a nested connection needs to serve the page requested by
+# `args`: everything up to the end of the page, plus one row telling whether
+# there is a next page. None when the page is counted from the end (last,
+# before) and every row is needed.
+def connection_window(args):
+    if args.get("last") is not None or args.get("before") is not None:
+        return None
+    first = args.get("first")
+    if first is None:
+        first = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+        if first is None:
+            return None
+    start = args.get("offset") or 0
+    if args.get("after") is not None:
+        after = cursor_to_offset(args["after"])
+        if after is None:
+            return None
+        start += after + 1
+    return start + first + 1
+
+
+# DjangoFilterConnectionField that cooperates with the per-request loaders:
+# lists already batched by a DataLoader skip the filterset, and every page of
+# nodes is registered so nested relations are fetched in one query per level.
+class BatchedConnectionField(DjangoFilterConnectionField):
+    @classmethod
+    def resolve_queryset(
+        cls, connection, iterable, info, args, filtering_args, filterset_class
+    ):
+        if isinstance(iterable, list):
+            return iterable
+        return super().resolve_queryset(
+            connection, iterable, info, args, filtering_args, filterset_class
+        )
+
+    @classmethod
+    def connection_resolver(
+        cls,
+        resolver,
+        connection,
+        default_manager,
+        queryset_resolver,
+        max_limit,
+        enforce_first_or_last,
+        root,
+        info,
+        **args,
+    ):
+        result = super().connection_resolver(
+            resolver,
+            connection,
+            default_manager,
+            queryset_resolver,
+            max_limit,
+            enforce_first_or_last,
+            root,
+            info,
+            **args,
+        )
+
+        def register(resolved):
+            get_loaders(info).register(edge.node for edge in resolved.edges)
+            return resolved
+
+        if Promise.is_thenable(result):
+            return Promise.resolve(result).then(register)
+        return register(result)
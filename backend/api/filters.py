@@ -1,5 +1,28 @@
+from datetime import datetime, time, timedelta
+
 import django_filters
+from django.conf import settings
+from django.utils import timezone
+from django_filters.constants import EMPTY_VALUES
 from .models import Author, Post, Comment
+from .search import search_posts
+
+
+# Filter on the day of a datetime column. A `__date` lookup wraps the column
+# in a function no index can serve, the [start, end) range of the day in the
+# current time zone uses the column's index.
+class DayFilter(django_filters.DateFilter):
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        start = datetime.combine(value, time.min)
+        end = datetime.combine(value + timedelta(days=1), time.min)
+        if settings.USE_TZ:
+            start = timezone.make_aware(start)
+            end = timezone.make_aware(end)
+        return qs.filter(
+            **{f"{self.field_name}__gte": start, f"{self.field_name}__lt": end}
+        )
 
 
 class AuthorFilter(django_filters.FilterSet):
@@ -20,18 +43,28 @@ class PostFilter(django_filters.FilterSet):
     author_name_exact = django_filters.CharFilter(
         field_name="author__name", lookup_expr="exact"
     )
-    created_at_date = django_filters.DateFilter(
-        field_name="created_at", lookup_expr="date"
-    )
+    created_at_date = DayFilter(field_name="created_at")
     created_at_gte = django_filters.DateFilter(
         field_name="created_at", lookup_expr="gte"
     )
     created_at_lte = django_filters.DateFilter(
         field_name="created_at", lookup_expr="lte"
     )
+    # Ordering on indexed and denormalized columns, e.g. "-last_comment_at"
+    # for recently active posts
+    order_by = django_filters.OrderingFilter(
+        fields=("created_at", "last_comment_at", "comment_count")
+    )
+    # Full-text search over title and content, best match first
+    search = django_filters.CharFilter(method="filter_search")
+
+    def filter_search(self, queryset, name, value):
+        return search_posts(queryset, value)
 
 
 class CommentFilter(django_filters.FilterSet):
+    created_at__date = DayFilter(field_name="created_at")
+
     class Meta:
         model = Comment
         fields = {
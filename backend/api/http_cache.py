@@ -0,0 +1,59 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+
+DEFAULTS = {
+    "ENABLED": True,
+    # max-age of anonymous GET responses. With 0, shared caches store them but
+    # revalidate every request with If-None-Match, which costs a 304.
+    "MAX_AGE": 0,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "GRAPHQL_HTTP_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def make_etag(value):
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return '"%s"' % hashlib.sha256(value).hexdigest()
+
+
+# Mark the GET response of `request` as cacheable. The ETag is computed from
+# the body: the version keys of the response cache can't validate a response
+# unless every worker shares them (see CACHES in settings).
+def mark_cacheable(request, public=False):
+    request._graphql_http_cache = public
+
+
+def patch_response(response, etag, public):
+    response["ETag"] = etag
+    if public:
+        patch_cache_control(response, public=True, max_age=get_setting("MAX_AGE"))
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+# Add the ETag and Cache-Control headers to a cacheable GET response and turn
+# it into a 304 when it matches If-None-Match
+def conditional_response(request, response):
+    public = getattr(request, "_graphql_http_cache", None)
+    if public is None or response.status_code != 200:
+        return response
+
+    patch_response(response, make_etag(response.content), public)
+    return get_conditional_response(
+        request, etag=response["ETag"], response=response
+    ) or response
+
+
+def is_enabled(request):
+    return get_setting("ENABLED") and request.method == "GET"
@@ -0,0 +1,264 @@
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Author, Post, Comment
+
+
+# Synchronous DataLoader.
+#
+# graphene-django executes resolvers synchronously, so there is no event loop
+# tick to defer lookups to. Instead every loader keeps a queue of keys that are
+# *likely* to be requested (the sibling nodes of the current page), and the
+# first `load()` on an unknown key fetches the whole queue in one IN (...) query.
+#
+# The async view resolves top-level fields in parallel threads sharing the
+# request's loaders, so every operation holds a lock.
+class DataLoader:
+    def __init__(self, batch_load_fn, default=None):
+        self.batch_load_fn = batch_load_fn
+        self.default = default
+        self._cache = {}
+        self._queue = {}
+        self._lock = threading.RLock()
+
+    # Register keys that will probably be loaded later in this request
+    def enqueue(self, keys):
+        with self._lock:
+            for key in keys:
+                if key is not None and key not in self._cache:
+                    self._queue[key] = None
+
+    # Store an already fetched value so it never hits the database
+    def prime(self, key, value):
+        with self._lock:
+            self._cache.setdefault(key, value)
+            self._queue.pop(key, None)
+
+    def load(self, key):
+        with self._lock:
+            if key not in self._cache:
+                self._queue[key] = None
+                self.dispatch()
+            return self._cache[key]
+
+    def load_many(self, keys):
+        self.enqueue(keys)
+        return [self.load(key) for key in keys]
+
+    # Fetch every queued key in a single batch
+    def dispatch(self):
+        with self._lock:
+            keys = list(self._queue)
+            self._queue.clear()
+            if not keys:
+                return
+            values = self.batch_load_fn(keys)
+            for key in keys:
+                default = self.default() if callable(self.default) else self.default
+                self._cache[key] = values.get(key, default)
+
+    def clear(self, key=None):
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+                self._queue.clear()
+            else:
+                self._cache.pop(key, None)
+
+
+# DataLoader of the children of a parent key, fetching at most `limit` children
+# per parent (see fields.connection_window): one DataLoader per limit, all fed
+# with the same queued parent keys.
+class WindowedLoader:
+    def __init__(self, batch_load_fn):
+        self.batch_load_fn = batch_load_fn
+        self._keys = {}
+        self._loaders = {}
+        self._lock = threading.RLock()
+
+    def enqueue(self, keys):
+        with self._lock:
+            keys = [key for key in keys if key is not None]
+            self._keys.update(dict.fromkeys(keys))
+            for loader in self._loaders.values():
+                loader.enqueue(keys)
+
+    def window(self, limit):
+        with self._lock:
+            loader = self._loaders.get(limit)
+            if loader is None:
+                loader = DataLoader(
+                    partial(self.batch_load_fn, limit=limit), default=list
+                )
+                loader.enqueue(self._keys)
+                self._loaders[limit] = loader
+            return loader
+
+    def load(self, key, limit=None):
+        return self.window(limit).load(key)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._loaders.clear()
+
+
+# The first `limit` rows of `queryset` (in primary key order) for every value
+# of the `parent` column, None for all of them
+def first_per_parent(queryset, parent, limit):
+    queryset = queryset.order_by("pk")
+    if limit is None:
+        return queryset
+    return queryset.annotate(
+        row_number=Window(
+            RowNumber(), partition_by=F(parent), order_by=F("pk").asc()
+        )
+    ).filter(row_number__lte=limit)
+
+
+# Marker for relations that were not fetched together with their instance
+MISSING = object()
+
+
+# Attribute holding the reverse relation `name` prefetched by the optimizer,
+# which may only hold the first page of it (see optimizer.collect)
+def prefetched_attr(name):
+    return f"prefetched_{name}"
+
+
+# Return the related object (or list of objects) that select_related() or
+# prefetch_related() already attached to `instance`, or MISSING
+def fetched_relation(instance, name):
+    page = getattr(instance, prefetched_attr(name), MISSING)
+    if page is not MISSING:
+        return page
+    prefetched = getattr(instance, "_prefetched_objects_cache", {})
+    if name in prefetched:
+        return list(prefetched[name])
+    field = instance._meta.get_field(name)
+    if field.concrete and field.is_relation and field.is_cached(instance):
+        return getattr(instance, name)
+    return MISSING
+
+
+# The set of loaders shared by every resolver of a single request
+class Loaders:
+    def __init__(self):
+        self.user_by_id = DataLoader(self._load_users)
+        self.author_by_id = DataLoader(self._load_authors)
+        self.post_by_id = DataLoader(self._load_posts)
+        self.posts_by_author = WindowedLoader(self._load_posts_by_author)
+        self.comments_by_post = WindowedLoader(self._load_comments_by_post)
+
+    # Forget every loaded object, e.g. after a mutation changed them
+    def clear(self):
+        for loader in (
+            self.user_by_id,
+            self.author_by_id,
+            self.post_by_id,
+            self.posts_by_author,
+            self.comments_by_post,
+        ):
+            loader.clear()
+
+    # Queue the relation keys of freshly fetched instances so that resolving
+    # the same relation on their siblings is served from one batch. Relations
+    # an optimized queryset already fetched are followed instead of queued.
+    def register(self, instances, seen=None):
+        seen = set() if seen is None else seen
+        for instance in instances:
+            # Prefetched children point back at their (cached) parent
+            if id(instance) in seen:
+                continue
+            seen.add(id(instance))
+            if isinstance(instance, Post):
+                self._prime(self.post_by_id, instance)
+                self._follow(
+                    self.author_by_id, instance, "author", instance.author_id, seen
+                )
+                self._follow(
+                    self.comments_by_post, instance, "comments", instance.pk, seen
+                )
+            elif isinstance(instance, Comment):
+                self._follow(
+                    self.post_by_id, instance, "post", instance.post_id, seen
+                )
+            elif isinstance(instance, Author):
+                self._prime(self.author_by_id, instance)
+                self._follow(
+                    self.user_by_id, instance, "user", instance.user_id, seen
+                )
+                self._follow(
+                    self.posts_by_author, instance, "posts", instance.pk, seen
+                )
+
+    # Only fully loaded instances are shared, so a projected instance never
+    # triggers deferred-field queries where other columns are selected
+    def _prime(self, loader, instance):
+        if not instance.get_deferred_fields():
+            loader.prime(instance.pk, instance)
+
+    def _follow(self, loader, instance, name, key, seen):
+        value = fetched_relation(instance, name)
+        if value is MISSING:
+            loader.enqueue([key])
+        elif isinstance(value, list):
+            self.register(value, seen)
+        elif value is not None:
+            self.register([value], seen)
+
+    def _load_users(self, keys):
+        return User.objects.in_bulk(keys)
+
+    def _load_authors(self, keys):
+        authors = Author.objects.in_bulk(keys)
+        self.register(authors.values())
+        return authors
+
+    def _load_posts(self, keys):
+        posts = Post.objects.in_bulk(keys)
+        self.register(posts.values())
+        return posts
+
+    def _load_posts_by_author(self, keys, limit=None):
+        posts = Post.objects.filter(author_id__in=keys)
+        posts = list(first_per_parent(posts, "author_id", limit))
+        self.register(posts)
+        grouped = defaultdict(list)
+        for post in posts:
+            grouped[post.author_id].append(post)
+        return grouped
+
+    def _load_comments_by_post(self, keys, limit=None):
+        comments = Comment.objects.filter(post_id__in=keys)
+        comments = list(first_per_parent(comments, "post_id", limit))
+        self.register(comments)
+        grouped = defaultdict(list)
+        for comment in comments:
+            grouped[comment.post_id].append(comment)
+        return grouped
+
+
+_loaders_lock = threading.Lock()
+
+
+# Return the loaders for the current request, creating them on first use.
+# Executions without a context object (e.g. graphene.test.Client) get a fresh,
+# unshared set of loaders.
+def get_loaders(info):
+    context = info.context
+    if context is None:
+        return Loaders()
+    loaders = getattr(context, "loaders", None)
+    if loaders is None:
+        with _loaders_lock:
+            loaders = getattr(context, "loaders", None)
+            if loaders is None:
+                loaders = Loaders()
+                context.loaders = loaders
+    return loaders
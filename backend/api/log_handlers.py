@@ -0,0 +1,86 @@
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+DEFAULT_QUEUE_SIZE = 10000
+
+
+class QueueListener(logging.handlers.QueueListener):
+    # Wait for room in a full queue rather than failing to stop
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+# Handler writing records from a background thread, to a rotating file and/or
+# the console. The logging call only formats the record and puts it on a
+# queue, so no file I/O happens on the request path. When the writer falls
+# behind and the queue is full, records are dropped (and counted) instead of
+# blocking the caller. logging.shutdown() closes the handler at exit, which
+# writes the records still queued.
+class QueueHandler(logging.handlers.QueueHandler):
+    def __init__(
+        self,
+        filename=None,
+        max_bytes=10 * 1024 * 1024,
+        backup_count=5,
+        console=False,
+        queue_size=DEFAULT_QUEUE_SIZE,
+    ):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.handlers = []
+        if filename:
+            self.handlers.append(
+                logging.handlers.RotatingFileHandler(
+                    filename,
+                    maxBytes=max_bytes,
+                    backupCount=backup_count,
+                    encoding="utf-8",
+                    delay=True,
+                )
+            )
+        if console:
+            self.handlers.append(logging.StreamHandler())
+        self.dropped = 0
+        self.listener = None
+        self.pid = None
+        self._start_lock = threading.Lock()
+
+    # Start the writer thread of the current process. Threads do not survive
+    # a fork, so workers forked from a master that logged start their own.
+    def start(self):
+        with self._start_lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.queue_size)
+            self.listener = QueueListener(self.queue, *self.handlers)
+            self.listener.start()
+            self.pid = os.getpid()
+
+    # Write the queued records and stop the writer thread
+    def stop(self):
+        with self._start_lock:
+            if self.listener is None or self.pid != os.getpid():
+                return
+            self.listener.stop()
+            self.listener = None
+            self.pid = None
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self.pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        for handler in self.handlers:
+            handler.close()
+        super().close()
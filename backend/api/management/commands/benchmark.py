@@ -0,0 +1,83 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from graphene_django.settings import graphene_settings
+
+from api.benchmark import (
+    DEFAULT_TOLERANCE,
+    SCENARIOS,
+    BenchmarkError,
+    compare,
+    run,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the GraphQL benchmark scenarios against the data of "
+        "seed_benchmark_data and report latency percentiles, SQL queries and "
+        "peak memory. With --baseline, fail on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(SCENARIOS),
+            help="Scenario to run, can be repeated (default: all)",
+        )
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--output", help="Save the results to this JSON file")
+        parser.add_argument(
+            "--baseline", help="Compare the results with this JSON file"
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help="Allowed growth of p95 latency and peak memory (0.25 is 25%%)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            results = run(
+                graphene_settings.SCHEMA,
+                options["scenario"],
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+            )
+        except BenchmarkError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{'scenario':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+            f"{'queries':>8} {'peak KiB':>10}"
+        )
+        for name, metrics in results["scenarios"].items():
+            self.stdout.write(
+                f"{name:<30} {metrics['p50_ms']:>9.2f} {metrics['p95_ms']:>9.2f} "
+                f"{metrics['p99_ms']:>9.2f} {metrics['queries']:>8} "
+                f"{metrics['peak_memory_kb']:>10.1f}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Saved the results to {options['output']}")
+
+        if options["baseline"]:
+            try:
+                with open(options["baseline"], encoding="utf-8") as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['baseline']}: {e}")
+            try:
+                regressions = compare(baseline, results, options["tolerance"])
+            except BenchmarkError as e:
+                raise CommandError(str(e))
+            if regressions:
+                raise CommandError(
+                    "Regressions against the baseline:\n" + "\n".join(regressions)
+                )
+            self.stdout.write("No regressions against the baseline")
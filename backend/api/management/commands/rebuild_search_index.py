@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", default=None, help="Database alias to rebuild"
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_index(options["database"])
+        self.stdout.write(f"Indexed {count} posts")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from graphql import GraphQLError, parse
+
+from api.persisted_queries import ManifestError, query_hash, write_manifest
+
+
+class Command(BaseCommand):
+    help = (
+        "Register GraphQL documents in the persisted query manifest "
+        "(GRAPHQL_PERSISTED_QUERIES['MANIFEST']). Required before clients can "
+        "use them in allow-list-only mode."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="+", help="Files containing one GraphQL document each"
+        )
+
+    def handle(self, *args, **options):
+        queries = {}
+        hashes = []
+        for path in options["paths"]:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    query = f.read()
+            except OSError as e:
+                raise CommandError(f"Cannot read {path}: {e}")
+
+            try:
+                parse(query)
+            except GraphQLError as e:
+                raise CommandError(f"{path} is not a valid GraphQL document: {e}")
+
+            sha256_hash = query_hash(query)
+            queries[sha256_hash] = query
+            hashes.append(sha256_hash)
+
+        try:
+            write_manifest(queries)
+        except ManifestError as e:
+            raise CommandError(str(e))
+        for path, sha256_hash in zip(options["paths"], hashes):
+            self.stdout.write(f"{sha256_hash}  {path}")
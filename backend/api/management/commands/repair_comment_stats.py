@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.comment_stats import repair_comment_stats
+
+
+class Command(BaseCommand):
+    help = "Backfill or repair Post.comment_count and Post.last_comment_at"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the number of posts with wrong values",
+        )
+
+    def handle(self, *args, **options):
+        count = repair_comment_stats(dry_run=options["dry_run"])
+        if options["dry_run"]:
+            self.stdout.write(f"{count} posts have stale comment stats")
+        else:
+            self.stdout.write(f"Repaired comment stats of {count} posts")
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import BenchmarkError, clear, dataset, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed reproducible authors, posts and comments for the benchmark "
+        "command. Use a dedicated database (DATABASE_URL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--authors", type=int, default=100)
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--comments", type=int, default=20000)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed of the generated data"
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the previously seeded data first",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            clear()
+        elif dataset()["authors"]:
+            raise CommandError("Benchmark data already exists, use --clear")
+
+        try:
+            seed(
+                options["authors"],
+                options["posts"],
+                options["comments"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+            )
+        except BenchmarkError as e:
+            raise CommandError(str(e))
+
+        counts = dataset()
+        self.stdout.write(
+            f"Seeded {counts['authors']} authors, {counts['posts']} posts "
+            f"and {counts['comments']} comments"
+        )
@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Prometheus metrics of the GraphQL endpoint.
+#
+# Under gunicorn every worker is a separate process: with the
+# PROMETHEUS_MULTIPROC_DIR environment variable set (see gunicorn_asgi.py),
+# prometheus_client keeps the values in memory-mapped files of that
+# directory and /metrics adds up the files of all the workers.
+
+DEFAULTS = {
+    # Operation names used as label values, the others are reported as
+    # OTHER_OPERATIONS so clients can't create unbounded series
+    "MAX_OPERATIONS": 200,
+}
+
+ANONYMOUS_OPERATION = "anonymous"
+OTHER_OPERATIONS = "other"
+
+OPERATION_DURATION = Histogram(
+    "graphql_operation_duration_seconds",
+    "Time to answer a GraphQL operation",
+    ["operation_name", "operation_type"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+OPERATION_ERRORS = Counter(
+    "graphql_operation_errors_total",
+    "GraphQL operations answered with errors",
+    ["operation_name", "operation_type"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL queries executed by a request",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in SQL queries by a request",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+JWT_AUTHENTICATIONS = Counter(
+    "graphql_jwt_authentications_total",
+    "Authorization header verifications",
+    ["outcome"],
+)
+CACHE_LOOKUPS = Counter(
+    "graphql_cache_lookups_total",
+    "Lookups of the GraphQL caches",
+    ["cache", "result"],
+)
+
+
+def get_setting(name):
+    return getattr(settings, "GRAPHQL_METRICS", {}).get(name, DEFAULTS[name])
+
+
+_operation_names = set()
+_operation_names_lock = threading.Lock()
+
+
+def operation_label(name):
+    if not name:
+        return ANONYMOUS_OPERATION
+    with _operation_names_lock:
+        if name in _operation_names:
+            return name
+        if len(_operation_names) < get_setting("MAX_OPERATIONS"):
+            _operation_names.add(name)
+            return name
+    return OTHER_OPERATIONS
+
+
+def observe_operation(name, type, duration, errors):
+    labels = (operation_label(name), type)
+    OPERATION_DURATION.labels(*labels).observe(duration)
+    if errors:
+        OPERATION_ERRORS.labels(*labels).inc()
+
+
+def record_authentication(outcome):
+    JWT_AUTHENTICATIONS.labels(outcome).inc()
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+# SQL queries of the current request. A context variable, so the worker
+# threads of the async view count into the request that started them.
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_query_stats = ContextVar("query_stats", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - start
+
+
+# connection_created receiver installing count_query on every connection
+def install_query_counter(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def start_request():
+    return _query_stats.set(QueryStats())
+
+
+def finish_request(token):
+    stats = _query_stats.get()
+    _query_stats.reset(token)
+    REQUEST_DB_QUERIES.observe(stats.count)
+    REQUEST_DB_DURATION.observe(stats.duration)
+
+
+# Django middleware counting the SQL queries of every request
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = start_request()
+        try:
+            return self.get_response(request)
+        finally:
+            finish_request(token)
+
+    async def __acall__(self, request):
+        token = start_request()
+        try:
+            return await self.get_response(request)
+        finally:
+            finish_request(token)
+
+
+def multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+# The metrics in the Prometheus text format, of every worker process when
+# they share a multiprocess directory
+def render():
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
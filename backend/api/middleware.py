@@ -0,0 +1,28 @@
+from graphql_jwt.middleware import JSONWebTokenMiddleware
+from graphql_jwt.settings import jwt_settings
+from graphql_jwt.utils import get_http_authorization
+
+from .auth import authenticate_request
+
+
+# JSONWebTokenMiddleware that verifies the Authorization header once per
+# request instead of once per resolved field. Token arguments
+# (JWT_ALLOW_ARGUMENT) keep the original per-field behaviour.
+class CachedJSONWebTokenMiddleware(JSONWebTokenMiddleware):
+    def resolve(self, next, root, info, **kwargs):
+        if jwt_settings.JWT_ALLOW_ARGUMENT:
+            return super().resolve(next, root, info, **kwargs)
+
+        context = info.context
+        is_anonymous = not hasattr(context, "user") or context.user.is_anonymous
+
+        if (
+            is_anonymous
+            and get_http_authorization(context) is not None
+            and self.authenticate_context(info, **kwargs)
+        ):
+            user = authenticate_request(context)
+            if user is not None:
+                context.user = user
+
+        return next(root, info, **kwargs)
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+
+# FTS5 virtual table on SQLite, generated tsvector column with a GIN index on
+# PostgreSQL. Other databases fall back to icontains search.
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS api_post_fts "
+            "USING fts5(title, content, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO api_post_fts(rowid, title, content) "
+            "SELECT id, title, content FROM api_post"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE api_post ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS api_post_search_vector_idx "
+            "ON api_post USING GIN (search_vector)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS api_post_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS api_post_search_vector_idx")
+        schema_editor.execute(
+            "ALTER TABLE api_post DROP COLUMN IF EXISTS search_vector"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -10,6 +10,12 @@ class Author(models.Model):
     email = models.EmailField(unique=True)
     bio = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Post filter on the author name (author_name_exact)
+            models.Index(fields=['name'], name='author_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -19,6 +25,21 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(Author, related_name='posts', on_delete=models.CASCADE)
+    # Denormalized from the comments, maintained by the signals in api/signals.py
+    comment_count = models.PositiveIntegerField(default=0)
+    last_comment_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Seek index for keyset pagination on (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='post_created_id_idx'),
+            # "Recently active" ordering
+            models.Index(fields=['last_comment_at'], name='post_last_comment_idx'),
+            # "Most discussed" ordering
+            models.Index(fields=['comment_count'], name='post_comment_count_idx'),
+            # Posts of an author by date
+            models.Index(fields=['author', 'created_at'], name='post_author_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -28,5 +49,13 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     post = models.ForeignKey(Post, related_name='comments', on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # Seek index for keyset pagination on (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='comment_created_id_idx'),
+            # Comments of a post by date
+            models.Index(fields=['post', 'created_at'], name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return f"Comment on {self.post.title} by {self.id}"
@@ -0,0 +1,160 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene import relay
+from graphene.utils.str_converters import to_snake_case
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    get_named_type,
+    value_from_ast_untyped,
+)
+
+from .fields import PAGINATION_ARGS, connection_window
+from .loaders import prefetched_attr
+
+
+# Flatten a selection set into its field nodes, expanding named fragments and
+# inline fragments
+def selected_fields(selection_set, info):
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            yield selection
+        elif isinstance(selection, InlineFragmentNode):
+            yield from selected_fields(selection.selection_set, info)
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = info.fragments.get(selection.name.value)
+            if fragment is not None:
+                yield from selected_fields(fragment.selection_set, info)
+
+
+# Fields selected directly on `field_nodes`
+def child_fields(field_nodes, info):
+    fields = []
+    for field_node in field_nodes:
+        fields.extend(selected_fields(field_node.selection_set, info))
+    return fields
+
+
+# Fields selected on the node type of a relay connection: edges { node { ... } }
+def node_fields(field_nodes, info):
+    edges = [f for f in child_fields(field_nodes, info) if f.name.value == "edges"]
+    nodes = [f for f in child_fields(edges, info) if f.name.value == "node"]
+    return child_fields(nodes, info)
+
+
+def is_connection(info):
+    graphene_type = getattr(get_named_type(info.return_type), "graphene_type", None)
+    return isinstance(graphene_type, type) and issubclass(
+        graphene_type, relay.Connection
+    )
+
+
+# Columns that are always loaded: the primary key and every foreign key, which
+# the DataLoaders need to batch relations of the returned instances
+def required_fields(model):
+    return [
+        field.name
+        for field in model._meta.concrete_fields
+        if field.primary_key or field.is_relation
+    ]
+
+
+def argument_values(field_node, info):
+    return {
+        arg.name.value: value_from_ast_untyped(arg.value, info.variable_values)
+        for arg in field_node.arguments
+    }
+
+
+# Walk the selected fields of `model` and collect the only(), select_related()
+# and prefetch_related() arguments needed to serve them
+def collect(model, fields, info, prefix, only, select, prefetch):
+    only.update(prefix + name for name in required_fields(model))
+    # Reverse FK connections by accessor: aliases of the same relation share
+    # one Prefetch
+    reverse = {}
+
+    for field_node in fields:
+        name = to_snake_case(field_node.name.value)
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+
+        if not field.is_relation:
+            if field.concrete:
+                only.add(prefix + field.name)
+        elif field.concrete and (field.many_to_one or field.one_to_one):
+            # Forward FK / one-to-one: join it into the same query
+            select.add(prefix + field.name)
+            collect(
+                field.related_model,
+                child_fields([field_node], info),
+                info,
+                prefix + field.name + "__",
+                only,
+                select,
+                prefetch,
+            )
+        elif field.one_to_many:
+            # Reverse FK connections with filter arguments are resolved with
+            # their own filtered queryset, so prefetching them would be wasted
+            arguments = argument_values(field_node, info)
+            if set(arguments) - PAGINATION_ARGS:
+                continue
+            reverse.setdefault(field, []).append((field_node, arguments))
+
+    for field, selections in reverse.items():
+        queryset = optimize_fields(
+            field.related_model._default_manager.all(),
+            node_fields([field_node for field_node, _ in selections], info),
+            info,
+        ).order_by("pk")
+        # Only the rows of the largest requested page (see connection_window)
+        windows = [connection_window(arguments) for _, arguments in selections]
+        if None not in windows:
+            queryset = queryset[: max(windows)]
+        # A sliced queryset can only be prefetched into a to_attr list
+        accessor = field.get_accessor_name()
+        prefetch.append(
+            Prefetch(
+                prefix + accessor, queryset=queryset, to_attr=prefetched_attr(accessor)
+            )
+        )
+
+
+def optimize_fields(queryset, fields, info):
+    only, select, prefetch = set(), set(), []
+    collect(queryset.model, fields, info, "", only, select, prefetch)
+    queryset = queryset.only(*sorted(only))
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+# Make sure `names` are loaded even if the queryset was projected with only()
+# or defer(), e.g. the columns a paginator builds its cursors from
+def with_fields(queryset, *names):
+    existing, defer = queryset.query.deferred_loading
+    if defer:
+        if not existing.intersection(names):
+            return queryset
+        queryset = queryset.all()
+        queryset.query.deferred_loading = (existing.difference(names), True)
+        return queryset
+    return queryset.only(*existing, *names)
+
+
+# Project `queryset` onto the GraphQL selection of the field being resolved.
+# Connection fields are unwrapped through edges/node before projecting.
+def optimize(queryset, info):
+    if is_connection(info):
+        fields = node_fields(info.field_nodes, info)
+    else:
+        fields = child_fields(info.field_nodes, info)
+    return optimize_fields(queryset, fields, info)
@@ -0,0 +1,161 @@
+import json
+
+import graphene
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from graphene import relay
+from graphql_relay.utils import base64, unbase64
+
+from .fields import BatchedConnectionField
+from .loaders import get_loaders
+from .optimizer import with_fields
+
+CURSOR_PREFIX = "keyset:"
+
+
+# Opaque cursor holding the (created_at, id) key of a node
+def encode_cursor(instance):
+    key = [instance.created_at.isoformat(), instance.pk]
+    return base64(CURSOR_PREFIX + json.dumps(key))
+
+
+def decode_cursor(cursor):
+    try:
+        value = unbase64(cursor)
+        if not value.startswith(CURSOR_PREFIX):
+            raise ValueError(cursor)
+        created_at, pk = json.loads(value[len(CURSOR_PREFIX) :])
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError(cursor)
+        return created_at, int(pk)
+    except (ValueError, TypeError):
+        raise Exception("Invalid cursor")
+
+
+# Relay connection with an optional `totalCount`. The COUNT(*) only runs when
+# the client selects the field.
+class KeysetConnection(relay.Connection):
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int()
+
+    def resolve_total_count(root, info):
+        return root.iterable.count()
+
+
+# Connection field paginating on (created_at, id), newest first. Instead of
+# OFFSET it seeks with `WHERE (created_at, id) < (cursor)` so every page costs
+# the same as the first one, and it never counts the rows.
+class KeysetConnectionField(BatchedConnectionField):
+    def __init__(self, connection, *args, **kwargs):
+        self._keyset_connection = connection
+        super().__init__(connection._meta.node, *args, **kwargs)
+        # Offsets are exactly what keyset pagination avoids
+        self._base_args.pop("offset", None)
+
+    # The pages are always ordered on (created_at, id), an orderBy argument of
+    # the filterset would be silently ignored
+    @property
+    def filtering_args(self):
+        args = super().filtering_args
+        args.pop("order_by", None)
+        return args
+
+    @property
+    def type(self):
+        return self._keyset_connection
+
+    @classmethod
+    def connection_resolver(
+        cls,
+        resolver,
+        connection,
+        default_manager,
+        queryset_resolver,
+        max_limit,
+        enforce_first_or_last,
+        root,
+        info,
+        **args,
+    ):
+        first = args.get("first")
+        last = args.get("last")
+
+        if enforce_first_or_last:
+            assert first or last, (
+                "You must provide a `first` or `last` value to properly paginate the `{}` connection."
+            ).format(info.field_name)
+
+        if first is not None and last is not None:
+            raise Exception(
+                "Keyset pagination does not support `first` and `last` together"
+            )
+
+        if max_limit:
+            for name, value in (("first", first), ("last", last)):
+                assert value is None or value <= max_limit, (
+                    "Requesting {} records on the `{}` connection exceeds the `{}` limit of {} records."
+                ).format(value, info.field_name, name, max_limit)
+            if first is None and last is None:
+                first = max_limit
+
+        iterable = resolver(root, info, **args)
+        if iterable is None:
+            iterable = default_manager
+        queryset = queryset_resolver(connection, iterable, info, args)
+
+        resolved = cls.resolve_keyset(
+            connection, queryset, first, last, args.get("after"), args.get("before")
+        )
+        get_loaders(info).register(edge.node for edge in resolved.edges)
+        return resolved
+
+    @classmethod
+    def resolve_keyset(cls, connection, queryset, first, last, after, before):
+        page = with_fields(queryset, "created_at")
+
+        if after:
+            created_at, pk = decode_cursor(after)
+            page = page.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+            )
+        if before:
+            created_at, pk = decode_cursor(before)
+            page = page.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+            )
+
+        if last is not None:
+            # Walk backwards from `before`, then restore newest-first order
+            nodes = list(page.order_by("created_at", "pk")[: last + 1])
+            has_previous_page = len(nodes) > last
+            nodes = nodes[:last][::-1]
+            has_next_page = bool(before)
+        else:
+            page = page.order_by("-created_at", "-pk")
+            if first is None:
+                nodes = list(page)
+                has_next_page = False
+            else:
+                nodes = list(page[: first + 1])
+                has_next_page = len(nodes) > first
+                nodes = nodes[:first]
+            has_previous_page = bool(after)
+
+        edges = [
+            connection.Edge(node=node, cursor=encode_cursor(node)) for node in nodes
+        ]
+        resolved = connection(
+            edges=edges,
+            page_info=relay.PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_previous_page,
+                has_next_page=has_next_page,
+            ),
+        )
+        resolved.iterable = queryset
+        return resolved
+
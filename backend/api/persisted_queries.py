@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import GraphQLError
+
+from .metrics import record_cache_lookup
+
+CACHE_PREFIX = "apq:"
+
+DEFAULTS = {
+    "ENABLED": True,
+    # Only execute queries that were registered ahead of time (see the
+    # `register_persisted_queries` command). Clients can neither send raw
+    # query text nor register new hashes.
+    "ALLOWLIST_ONLY": False,
+    # JSON file of the queries registered by the command ({hash: query}),
+    # read by every worker process. None disables the manifest.
+    "MANIFEST": None,
+    # Queries registered by clients at runtime
+    "CACHE_ALIAS": "default",
+    # Seconds to keep a registered query, None keeps it forever
+    "TIMEOUT": None,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "GRAPHQL_PERSISTED_QUERIES", {}).get(name, DEFAULTS[name])
+
+
+# GraphQL error carrying the Apollo error code in its extensions
+class PersistedQueryError(GraphQLError):
+    def __init__(self, message, code):
+        super().__init__(message, extensions={"code": code})
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def get_cache():
+    return caches[get_setting("CACHE_ALIAS")]
+
+
+class ManifestError(Exception):
+    pass
+
+
+# The manifest as last read, reloaded when the file changes
+_manifest = {"key": None, "queries": {}}
+_manifest_lock = threading.Lock()
+
+
+def read_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            queries = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"Cannot read the persisted query manifest {path}: {e}")
+    if not isinstance(queries, dict):
+        raise ManifestError(f"{path} is not a {{hash: query}} JSON object")
+    return queries
+
+
+def get_manifest():
+    path = get_setting("MANIFEST")
+    if not path:
+        return {}
+    try:
+        stat = os.stat(path)
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        key = (str(path), None, None)
+    with _manifest_lock:
+        if _manifest["key"] != key:
+            _manifest["queries"] = read_manifest(path) if key[1] else {}
+            _manifest["key"] = key
+        return _manifest["queries"]
+
+
+# Add `queries` to the manifest. The file is replaced atomically so the
+# workers never read half of it.
+def write_manifest(queries):
+    path = get_setting("MANIFEST")
+    if not path:
+        raise ManifestError("GRAPHQL_PERSISTED_QUERIES['MANIFEST'] is not set")
+    manifest = {**read_manifest(path), **queries}
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def register_query(query):
+    sha256_hash = query_hash(query)
+    get_cache().set(CACHE_PREFIX + sha256_hash, query, get_setting("TIMEOUT"))
+    return sha256_hash
+
+
+def lookup_query(sha256_hash):
+    query = get_manifest().get(sha256_hash)
+    if query is None:
+        query = get_cache().get(CACHE_PREFIX + sha256_hash)
+    record_cache_lookup("persisted_query", query is not None)
+    return query
+
+
+# Read the `extensions` of a request, from the JSON body or the GET parameters
+def get_extensions(request, data):
+    extensions = data.get("extensions") or request.GET.get("extensions")
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            raise PersistedQueryError("Extensions are invalid JSON.", "BAD_REQUEST")
+    return extensions if isinstance(extensions, dict) else {}
+
+
+# Return the query text to execute for an Automatic Persisted Queries request.
+#
+# - hash only: the registered query, or PersistedQueryNotFound so the client
+#   retries with the full text
+# - hash and query: the hash is verified and the query registered
+# - query only: executed as is, unless the allow-list mode is on
+def resolve_persisted_query(request, data, query):
+    if not get_setting("ENABLED"):
+        return query
+
+    allowlist_only = get_setting("ALLOWLIST_ONLY")
+    persisted_query = get_extensions(request, data).get("persistedQuery")
+
+    if not persisted_query:
+        if allowlist_only and query:
+            raise PersistedQueryError(
+                "Only persisted queries are allowed", "PERSISTED_QUERY_NOT_ALLOWED"
+            )
+        return query
+
+    if persisted_query.get("version") != 1:
+        raise PersistedQueryError(
+            "Unsupported persisted query version", "PERSISTED_QUERY_NOT_SUPPORTED"
+        )
+
+    sha256_hash = persisted_query.get("sha256Hash")
+    if not isinstance(sha256_hash, str):
+        raise PersistedQueryError("Missing sha256Hash", "BAD_REQUEST")
+
+    if query:
+        if allowlist_only:
+            raise PersistedQueryError(
+                "Only persisted queries are allowed", "PERSISTED_QUERY_NOT_ALLOWED"
+            )
+        if query_hash(query) != sha256_hash:
+            raise PersistedQueryError(
+                "provided sha does not match query", "BAD_REQUEST"
+            )
+        register_query(query)
+        return query
+
+    stored_query = lookup_query(sha256_hash)
+    if stored_query is None:
+        raise PersistedQueryError(
+            "PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND"
+        )
+    return stored_query
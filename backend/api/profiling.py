@@ -0,0 +1,133 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.urls import reverse
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.utils import get_http_authorization
+
+from .auth import authenticate_request
+
+# Staff request a profile of a /graphql/ request with this header (any
+# value) or query parameter
+PROFILE_HEADER = "X-GraphQL-Profile"
+PROFILE_PARAMETER = "profile"
+
+# Headers of a profiled response, with the id and the URL of its profile
+PROFILE_ID_HEADER = "X-GraphQL-Profile-Id"
+PROFILE_URL_HEADER = "X-GraphQL-Profile-URL"
+
+DEFAULTS = {
+    "ENABLED": False,
+    # Profiles are written to this directory, read by every worker process,
+    # and deleted after TIMEOUT seconds
+    "DIRECTORY": os.path.join(tempfile.gettempdir(), "graphql-profiles"),
+    "TIMEOUT": 3600,
+    # Functions listed in the text report, by cumulative time
+    "REPORT_LINES": 100,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "GRAPHQL_PROFILING", {}).get(name, DEFAULTS[name])
+
+
+PROFILE_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def profile_path(profile_id, extension):
+    return os.path.join(get_setting("DIRECTORY"), f"{profile_id}.{extension}")
+
+
+def is_expired(path, now):
+    return os.path.getmtime(path) < now - get_setting("TIMEOUT")
+
+
+def delete_expired():
+    now = time.time()
+    with os.scandir(get_setting("DIRECTORY")) as entries:
+        for entry in entries:
+            try:
+                if is_expired(entry.path, now):
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                # Deleted by another worker
+                pass
+
+
+def is_requested(request):
+    return get_setting("ENABLED") and (
+        PROFILE_HEADER in request.headers or PROFILE_PARAMETER in request.GET
+    )
+
+
+# The staff user of the request (session or Bearer token), otherwise None
+def get_staff_user(request):
+    user = getattr(request, "user", None)
+    if (user is None or user.is_anonymous) and get_http_authorization(request):
+        try:
+            user = authenticate_request(request)
+        except JSONWebTokenError:
+            user = None
+    if user is not None and user.is_staff:
+        return user
+    return None
+
+
+# A running profiler when staff asked for a profile of `request`, otherwise
+# None. Other requests only pay for the header and parameter lookups.
+def start(request):
+    if not is_requested(request) or get_staff_user(request) is None:
+        return None
+    profiler = cProfile.Profile()
+    request.graphql_profiler = profiler
+    profiler.enable()
+    return profiler
+
+
+def is_profiled(request):
+    return getattr(request, "graphql_profiler", None) is not None
+
+
+# Store the profile of the finished request and point `response` to it
+def save(profiler, response):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+        get_setting("REPORT_LINES")
+    )
+    profile_id = uuid.uuid4().hex
+    os.makedirs(get_setting("DIRECTORY"), exist_ok=True)
+    delete_expired()
+    with open(profile_path(profile_id, "txt"), "w", encoding="utf-8") as f:
+        f.write(stream.getvalue())
+    # The pstats file opens in pstats, snakeviz or gprof2dot. It is written
+    # last and renamed into place, so a profile is complete once it exists.
+    path = profile_path(profile_id, "prof")
+    stats.dump_stats(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    response[PROFILE_ID_HEADER] = profile_id
+    response[PROFILE_URL_HEADER] = reverse("graphql_profile", args=[profile_id])
+
+
+# {"stats": bytes, "report": str} of a stored profile, None once expired
+def load(profile_id):
+    if not PROFILE_ID.fullmatch(profile_id):
+        return None
+    try:
+        path = profile_path(profile_id, "prof")
+        if is_expired(path, time.time()):
+            return None
+        with open(path, "rb") as f:
+            stats = f.read()
+        with open(profile_path(profile_id, "txt"), encoding="utf-8") as f:
+            report = f.read()
+    except FileNotFoundError:
+        return None
+    return {"stats": stats, "report": report}
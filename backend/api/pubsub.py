@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = "api.pubsub.InProcessBroker"
+
+
+# Interface of the brokers carrying subscription events. Messages must be
+# JSON serializable so brokers shared between nodes (Redis, Postgres
+# LISTEN/NOTIFY...) can implement it.
+class Broker:
+    # Deliver `message` to every current subscriber of `channel`. Called from
+    # synchronous code, usually a model signal.
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    # Async iterator over the messages published to `channel` from now on.
+    # Closing it (or cancelling the consumer) unsubscribes.
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+
+# Broker delivering messages to the subscribers of the current process
+class InProcessBroker(Broker):
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # The loop of a disconnected subscriber is already closed
+                pass
+
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+# The broker configured by GRAPHQL_SUBSCRIPTION_BROKER (a dotted path)
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "GRAPHQL_SUBSCRIPTION_BROKER", DEFAULT_BROKER)
+                _broker = import_string(path)()
+    return _broker
+
+
+def comment_created_channel(post_id):
+    return f"comment-created:{post_id}"
+
+
+def post_updated_channel(post_id):
+    return f"post-updated:{post_id}"
+
+
+# Publish once the current transaction commits, so subscribers loading the
+# object see the change
+def publish(channel, message):
+    transaction.on_commit(lambda: get_broker().publish(channel, message))
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from graphql import (
+    OperationType,
+    TypeInfo,
+    TypeInfoVisitor,
+    Visitor,
+    get_named_type,
+    print_ast,
+    visit,
+)
+from graphene.utils.str_converters import to_camel_case, to_snake_case
+from graphql_jwt.utils import get_http_authorization
+
+from .metrics import record_cache_lookup
+
+CACHE_PREFIX = "graphql-response:"
+VERSION_PREFIX = "graphql-response-version:"
+
+DEFAULTS = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    # Seconds to keep a response. Saves and deletes evict entries earlier.
+    "TIMEOUT": 60,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "GRAPHQL_RESPONSE_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def get_cache():
+    return caches[get_setting("CACHE_ALIAS")]
+
+
+def is_anonymous(request):
+    if get_http_authorization(request) is not None:
+        return False
+    user = getattr(request, "user", None)
+    return user is None or not user.is_authenticated
+
+
+def is_query(operation_ast):
+    return operation_ast is not None and operation_ast.operation == OperationType.QUERY
+
+
+# Only anonymous query operations are shared between clients
+def is_cacheable(request, operation_ast):
+    return get_setting("ENABLED") and is_query(operation_ast) and is_anonymous(request)
+
+
+# Models crossed by a filter path such as "author__name", starting from
+# `model`. Lookups and method filters end the walk.
+def related_models(model, path):
+    models = []
+    for name in path.split("__"):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation:
+            break
+        model = field.related_model
+        models.append(model)
+    return models
+
+
+# Collects the models behind every object type selected by a document, and
+# the models its filter arguments read through relations (e.g.
+# allPosts(authorNameExact:) depends on Author without selecting it)
+class ModelCollector(Visitor):
+    def __init__(self, type_info):
+        super().__init__()
+        self.type_info = type_info
+        self.models = set()
+
+    def enter_field(self, node, *args):
+        named_type = get_named_type(self.type_info.get_type())
+        graphene_type = getattr(named_type, "graphene_type", None)
+        model = getattr(getattr(graphene_type, "_meta", None), "model", None)
+        if model is not None:
+            self.models.add(model)
+        if node.arguments:
+            self.add_filter_models(node)
+
+    def add_filter_models(self, node):
+        parent_type = getattr(self.type_info.get_parent_type(), "graphene_type", None)
+        fields = getattr(getattr(parent_type, "_meta", None), "fields", {})
+        field = fields.get(to_snake_case(node.name.value))
+        if not hasattr(field, "filtering_args"):
+            return
+        # Filter names by GraphQL argument name
+        names = {to_camel_case(name): name for name in field.filtering_args}
+        filters = field.filterset_class.base_filters
+        for argument in node.arguments:
+            name = names.get(argument.name.value)
+            if name in filters:
+                self.models.update(
+                    related_models(field.model, filters[name].field_name)
+                )
+
+
+def get_models(schema, document):
+    type_info = TypeInfo(schema)
+    collector = ModelCollector(type_info)
+    visit(document, TypeInfoVisitor(type_info, collector))
+    return collector.models
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+# Current version of each model. A missing version gets a fresh random one, so
+# entries written before an eviction of the version key are never reused.
+def get_versions(models):
+    cache = get_cache()
+    keys = {VERSION_PREFIX + model_label(model) for model in models}
+    versions = cache.get_many(keys)
+    for key in keys - versions.keys():
+        cache.add(key, uuid.uuid4().hex, None)
+        versions[key] = cache.get(key)
+    return versions
+
+
+# Cache key of a response: the normalized query, its variables, the operation
+# name and the version of every model it reads. Bumping a version makes every
+# entry depending on that model unreachable.
+def get_cache_key(schema, document, variables, operation_name):
+    versions = get_versions(get_models(schema, document))
+    payload = json.dumps(
+        [
+            print_ast(document),
+            variables or {},
+            operation_name,
+            sorted(versions.items()),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return CACHE_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_response(key):
+    data = get_cache().get(key)
+    record_cache_lookup("response", data is not None)
+    return data
+
+
+def set_response(key, data):
+    get_cache().set(key, data, get_setting("TIMEOUT"))
+
+
+def bump_version(model):
+    get_cache().set(VERSION_PREFIX + model_label(model), uuid.uuid4().hex, None)
+
+
+# Evict the cached responses reading `models`. The versions are bumped again on
+# commit, so a response cached by a concurrent request between the change and
+# the commit is not served either.
+def invalidate(*models):
+    for model in models:
+        bump_version(model)
+    transaction.on_commit(lambda: [bump_version(model) for model in models])
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = "replica"
+
+# Cookie pinning a client to the primary after a mutation
+PIN_COOKIE = "graphql_primary"
+
+# Alias the current GraphQL operation reads from. A context variable, so the
+# worker threads resolving the fields of an async query inherit it.
+_read_alias = ContextVar("read_alias", default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in connections.settings
+
+
+# Reads within the block go to the replica
+@contextmanager
+def read_from_replica():
+    token = _read_alias.set(REPLICA_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def is_pinned(request):
+    return getattr(request, "_pinned_to_primary", False) or (
+        PIN_COOKIE in request.COOKIES
+    )
+
+
+# Whether the queries of `request` may read from the replica: not after a
+# mutation of the same request or of a recent one of the client
+def use_replica(request):
+    return replica_configured() and not is_pinned(request)
+
+
+def pin_to_primary(request):
+    request._pinned_to_primary = True
+
+
+# Set the pin cookie on the response of a request that ran a mutation
+def patch_response(request, response):
+    if getattr(request, "_pinned_to_primary", False) and replica_configured():
+        response.set_cookie(
+            PIN_COOKIE,
+            "1",
+            max_age=getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5),
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+# Sends the reads of GraphQL queries to the replica (see read_from_replica),
+# everything else to the primary
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    # Objects read from the replica are saved to the primary
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
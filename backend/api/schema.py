@@ -1,7 +1,8 @@
+from contextlib import aclosing
+
 import graphene
 import graphql_jwt
 from graphene_django import DjangoObjectType
-from graphene_django.filter import DjangoFilterConnectionField
 
 # Import JWT Decorators
 from graphql_jwt.decorators import login_required
@@ -17,6 +18,17 @@ from django.contrib.auth.models import User
 # Import filter classes
 from .filters import AuthorFilter, PostFilter, CommentFilter
 
+# Import bulk mutation helpers
+from . import bulk
+
+# Import per-request batching helpers
+from .fields import BatchedConnectionField, connection_window, has_filter_args
+from .loaders import MISSING, fetched_relation, get_loaders
+from .optimizer import optimize
+from .pagination import KeysetConnection, KeysetConnectionField
+from .pubsub import comment_created_channel, get_broker, post_updated_channel
+from .search import search_posts as full_text_search
+
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,6 +49,28 @@ class AuthorType(DjangoObjectType):
         filterset_class = AuthorFilter
         fields = "__all__"
 
+    posts = BatchedConnectionField(lambda: PostType, required=True)
+
+    # Batch the user of every author on the page into one query
+    def resolve_user(root, info):
+        user = fetched_relation(root, "user")
+        if user is not MISSING:
+            return user
+        if root.user_id is None:
+            return None
+        return get_loaders(info).user_by_id.load(root.user_id)
+
+    # Batch the posts of every author on the page into one query
+    def resolve_posts(root, info, **kwargs):
+        if has_filter_args(kwargs):
+            return root.posts.all()
+        posts = fetched_relation(root, "posts")
+        if posts is not MISSING:
+            return posts
+        return get_loaders(info).posts_by_author.load(
+            root.pk, connection_window(kwargs)
+        )
+
 
 # Define GraphQL type for Post model
 class PostType(DjangoObjectType):
@@ -46,6 +80,26 @@ class PostType(DjangoObjectType):
         filterset_class = PostFilter
         fields = "__all__"
 
+    comments = BatchedConnectionField(lambda: CommentType, required=True)
+
+    # Batch the author of every post on the page into one query
+    def resolve_author(root, info):
+        author = fetched_relation(root, "author")
+        if author is not MISSING:
+            return author
+        return get_loaders(info).author_by_id.load(root.author_id)
+
+    # Batch the comments of every post on the page into one query
+    def resolve_comments(root, info, **kwargs):
+        if has_filter_args(kwargs):
+            return root.comments.all()
+        comments = fetched_relation(root, "comments")
+        if comments is not MISSING:
+            return comments
+        return get_loaders(info).comments_by_post.load(
+            root.pk, connection_window(kwargs)
+        )
+
 
 # Define GraphQL type for Comment model
 class CommentType(DjangoObjectType):
@@ -55,48 +109,87 @@ class CommentType(DjangoObjectType):
         filterset_class = CommentFilter
         fields = "__all__"
 
+    # Batch the post of every comment on the page into one query
+    def resolve_post(root, info):
+        post = fetched_relation(root, "post")
+        if post is not MISSING:
+            return post
+        return get_loaders(info).post_by_id.load(root.post_id)
+
+
+# Keyset (created_at, id) paginated connections for posts and comments
+class PostKeysetConnection(KeysetConnection):
+    class Meta:
+        node = PostType
+
+
+class CommentKeysetConnection(KeysetConnection):
+    class Meta:
+        node = CommentType
+
 
 #######################     FETCH DATA      ################################
 class Query(graphene.ObjectType):
     # Define a query to fetch all authors
-    all_authors = DjangoFilterConnectionField(AuthorType)
+    all_authors = BatchedConnectionField(AuthorType)
     # Define a query to fetch all posts
-    all_posts = DjangoFilterConnectionField(PostType)
+    all_posts = BatchedConnectionField(PostType)
     # Define a query to fetch all comments
-    all_comments = DjangoFilterConnectionField(CommentType)
+    all_comments = BatchedConnectionField(CommentType)
+
+    # Define keyset paginated queries for posts and comments, newest first
+    all_posts_keyset = KeysetConnectionField(PostKeysetConnection)
+    all_comments_keyset = KeysetConnectionField(CommentKeysetConnection)
+
+    # Define a full-text search over posts, best match first
+    search_posts = BatchedConnectionField(
+        PostType, query=graphene.String(required=True)
+    )
 
     # Define a query to fetch a single post by ID
     post_by_id = graphene.Field(PostType, id=graphene.Int(required=True))
     # Define a query to fetch a single author by ID
     author_by_id = graphene.Field(AuthorType, id=graphene.Int(required=True))
     # Define a query to fetch comments related to a specific post
-    comments_by_post = DjangoFilterConnectionField(
+    comments_by_post = BatchedConnectionField(
         CommentType, post_id=graphene.Int(required=True)
     )
 
     # Resolver for fetching all authors
     def resolve_all_authors(root, info, **kwargs):
-        return Author.objects.all()
+        return optimize(Author.objects.all(), info)
 
     # Resolver for fetching all posts
     def resolve_all_posts(self, info, **kwargs):
-        return Post.objects.all()
+        return optimize(Post.objects.all(), info)
 
     # Resolver for fetching all comments
     def resolve_all_comments(root, info, **kwargs):
-        return Comment.objects.all()
+        return optimize(Comment.objects.all(), info)
+
+    # Resolver for fetching posts with keyset pagination
+    def resolve_all_posts_keyset(root, info, **kwargs):
+        return optimize(Post.objects.all(), info)
+
+    # Resolver for fetching comments with keyset pagination
+    def resolve_all_comments_keyset(root, info, **kwargs):
+        return optimize(Comment.objects.all(), info)
+
+    # Resolver for searching posts
+    def resolve_search_posts(root, info, query, **kwargs):
+        return full_text_search(optimize(Post.objects.all(), info), query)
 
     # Resolver for fetching a post by ID
     def resolve_post_by_id(root, info, id, **kwargs):
-        return Post.objects.get(pk=id)
+        return optimize(Post.objects.all(), info).get(pk=id)
 
     # Resolver for fetching an author by ID
     def resolve_author_by_id(root, info, id, **kwargs):
-        return Author.objects.get(pk=id)
+        return optimize(Author.objects.all(), info).get(pk=id)
 
     # Resolver for fetching comments by post ID
     def resolve_comments_by_post(root, info, post_id, **kwargs):
-        return Comment.objects.filter(post_id=post_id)
+        return optimize(Comment.objects.filter(post_id=post_id), info)
 
 
 ########################     MODIFY DATA      ###############################
@@ -135,10 +228,10 @@ class CreateAuthor(graphene.Mutation):
 
     # Mutation method to create a new author instance
     def mutate(self, info, name, email, bio=None):
-        logger.debug(f"Creating author with ID: {id}")
+        logger.debug("Creating author with ID: %s", id)
         author = Author(name=name, email=email, bio=bio)
         author.save()  # Save the author instance to the database
-        logger.debug(f"Created author with ID: {author.id}")
+        logger.debug("Created author with ID: %s", author.id)
         return CreateAuthor(author=author)
 
 
@@ -154,7 +247,7 @@ class UpdateAuthor(graphene.Mutation):
 
     # Mutation method to update an existing author instance
     def mutate(self, info, id, name=None, email=None, bio=None):
-        logger.debug(f"Updating author with ID: {id}")
+        logger.debug("Updating author with ID: %s", id)
         author = Author.objects.get(pk=id)  # Fetch the author by ID
         if name:
             author.name = name
@@ -163,7 +256,7 @@ class UpdateAuthor(graphene.Mutation):
         if bio:
             author.bio = bio
         author.save()  # Save the updated author instance
-        logger.debug(f"Updated author with ID: {author.id}")
+        logger.debug("Updated author with ID: %s", author.id)
         return UpdateAuthor(author=author)
 
 
@@ -176,10 +269,10 @@ class DeleteAuthor(graphene.Mutation):
 
     # Mutation method to delete an author instance
     def mutate(self, info, id):
-        logger.debug(f"Deleting author with ID: {id}")
+        logger.debug("Deleting author with ID: %s", id)
         author = Author.objects.get(pk=id)  # Fetch the author by ID
         author.delete()  # Delete the author instance
-        logger.debug(f"Deleted author with ID: {author.id}")
+        logger.debug("Deleted author with ID: %s", author.id)
         return DeleteAuthor(ok=True)
 
 
@@ -197,21 +290,23 @@ class CreatePost(graphene.Mutation):
     def mutate(self, info, title, content, author_id):
         user = info.context.user
         if not user.is_authenticated:
-            logger.debug(f"403- Not Authenticated to create posts")
+            logger.debug("403- Not Authenticated to create posts")
             raise Exception("Authentication credentials were not provided")
 
         # Ensure `author` is valid
         try:
             author = user.author_profile
         except Author.DoesNotExist:
-            logger.debug(f"404- Author with ID {user.username} does not exist")
+            logger.debug("404- Author with ID %s does not exist", user.username)
             raise Exception("Author does not exist")
 
-        logger.debug(f"Creating post with title: {title} for author_id: {author.name}")
+        logger.debug(
+            "Creating post with title: %s for author_id: %s", title, author.name
+        )
         # author = Author.objects.get(user=user)
         post = Post(title=title, content=content, author=author)
         post.save()  # Save the post instance to the database
-        logger.debug(f"Created post with ID: {post.id}")
+        logger.debug("Created post with ID: %s", post.id)
         return CreatePost(post=post)
 
 
@@ -228,25 +323,25 @@ class UpdatePost(graphene.Mutation):
     @login_required
     def mutate(self, info, id, title=None, content=None):
         user = info.context.user
-        logger.debug(f"Updating post with ID: {id}")
+        logger.debug("Updating post with ID: %s", id)
         if not user.is_authenticated:
-            logger.debug(f"403- Not Authenticated to update posts")
+            logger.debug("403- Not Authenticated to update posts")
             raise Exception("Authentication credentials were not provided")
-        logger.debug(f"Updating post with ID: {id}")
+        logger.debug("Updating post with ID: %s", id)
         try:
-            post = Post.objects.get(pk=id)
+            post = Post.objects.select_related("author").get(pk=id)
         except Post.DoesNotExist:
-            logger.debug(f"404- Post with ID {id} does not exist")
+            logger.debug("404- Post with ID %s does not exist", id)
             raise Exception("Post does not exist")
-        if post.author.user != user:
-            logger.debug(f"403- Not permitted to update this post")
+        if post.author.user_id != user.pk:
+            logger.debug("403- Not permitted to update this post")
             raise Exception("You do not have permission to edit this post")
         if title:
             post.title = title
         if content:
             post.content = content
         post.save()  # Save the updated post instance
-        logger.debug(f"Updated post with ID: {post.id}")
+        logger.debug("Updated post with ID: %s", post.id)
         return UpdatePost(post=post)
 
 
@@ -261,23 +356,24 @@ class DeletePost(graphene.Mutation):
     @login_required
     def mutate(self, info, id):
         user = info.context.user
-        logger.debug(f"Deleting post with ID: {id}")
+        logger.debug("Deleting post with ID: %s", id)
 
         # Fetch the post by ID
         try:
-            post = Post.objects.get(pk=id)
+            post = Post.objects.select_related("author").get(pk=id)
         except Post.DoesNotExist:
-            logger.debug(f"404- Post with ID {id} does not exist")
+            logger.debug("404- Post with ID %s does not exist", id)
             raise Exception("Post does not exist")
 
-        if post.author.user != user:
+        if post.author.user_id != user.pk:
             logger.debug(
-                f"403- User {user.username} does not have permission to delete this post"
+                "403- User %s does not have permission to delete this post",
+                user.username,
             )
             raise Exception("You do not have permission to delete this post")
 
         post.delete()  # Delete the post instance
-        logger.debug(f"CDeleted post with ID: {post.id}")
+        logger.debug("CDeleted post with ID: %s", post.id)
         return DeletePost(ok=True)
 
 
@@ -291,11 +387,18 @@ class CreateComment(graphene.Mutation):
 
     # Mutation method to create a new comment instance
     def mutate(self, info, content, post_id):
-        logger.debug(f"Creating comment with content: {content} and post_id: {post_id}")
+        logger.debug(
+            "Creating comment with content: %s and post_id: %s", content, post_id
+        )
         post = Post.objects.get(pk=post_id)  # Fetch the post by ID
         comment = Comment(content=content, post=post)
         comment.save()  # Save the comment instance to the database
-        logger.debug(f"Created comment with ID: {comment.id}")
+        # The stats were updated in the database by the post_save receiver,
+        # the response reads them from this instance
+        post.refresh_from_db(
+            fields=["comment_count", "last_comment_at", "updated_at"]
+        )
+        logger.debug("Created comment with ID: %s", comment.id)
         return CreateComment(comment=comment)
 
 
@@ -309,12 +412,12 @@ class UpdateComment(graphene.Mutation):
 
     # Mutation method to update an existing comment instance
     def mutate(self, info, id, content=None):
-        logger.debug(f"Updating comment with ID: {id}")
+        logger.debug("Updating comment with ID: %s", id)
         comment = Comment.objects.get(pk=id)  # Fetch the comment by ID
         if content:
             comment.content = content
         comment.save()  # Save the updated comment instance
-        logger.debug(f"Updated comment with ID: {comment.id}")
+        logger.debug("Updated comment with ID: %s", comment.id)
         return UpdateComment(comment=comment)
 
 
@@ -327,13 +430,107 @@ class DeleteComment(graphene.Mutation):
 
     # Mutation method to delete a comment instance
     def mutate(self, info, id):
-        logger.debug(f"Deleting comment with ID: {id}")
+        logger.debug("Deleting comment with ID: %s", id)
         comment = Comment.objects.get(pk=id)  # Fetch the comment by ID
         comment.delete()  # Delete the comment instance
-        logger.debug(f"Deleted comment with ID: {comment.id}")
+        logger.debug("Deleted comment with ID: %s", comment.id)
         return DeleteComment(ok=True)
 
 
+########################     BULK MUTATIONS      ############################
+# Error of one item of a bulk mutation, the other items are still applied
+class BulkItemError(graphene.ObjectType):
+    index = graphene.Int(required=True)
+    id = graphene.Int()
+    message = graphene.String(required=True)
+
+
+class BulkPostInput(graphene.InputObjectType):
+    title = graphene.String(required=True)
+    content = graphene.String(required=True)
+
+
+class BulkPostUpdateInput(graphene.InputObjectType):
+    id = graphene.Int(required=True)
+    title = graphene.String()
+    content = graphene.String()
+
+
+class BulkCommentInput(graphene.InputObjectType):
+    post_id = graphene.Int(required=True)
+    content = graphene.String(required=True)
+
+
+# Mutation to create many posts of the current author at once
+class BulkCreatePosts(graphene.Mutation):
+    class Arguments:
+        posts = graphene.List(graphene.NonNull(BulkPostInput), required=True)
+
+    posts = graphene.List(graphene.NonNull(PostType), required=True)
+    errors = graphene.List(graphene.NonNull(BulkItemError), required=True)
+
+    @login_required
+    def mutate(self, info, posts):
+        user = info.context.user
+        try:
+            author = user.author_profile
+        except Author.DoesNotExist:
+            logger.debug("404- Author with ID %s does not exist", user.username)
+            raise Exception("Author does not exist")
+
+        logger.debug("Creating %s posts for author_id: %s", len(posts), author.id)
+        created, errors = bulk.create_posts(author, posts)
+        logger.debug("Created %s posts, %s errors", len(created), len(errors))
+        return BulkCreatePosts(posts=created, errors=errors)
+
+
+# Mutation to update many posts at once, each must belong to the current user
+class BulkUpdatePosts(graphene.Mutation):
+    class Arguments:
+        posts = graphene.List(graphene.NonNull(BulkPostUpdateInput), required=True)
+
+    posts = graphene.List(graphene.NonNull(PostType), required=True)
+    errors = graphene.List(graphene.NonNull(BulkItemError), required=True)
+
+    @login_required
+    def mutate(self, info, posts):
+        user = info.context.user
+        logger.debug("Updating %s posts", len(posts))
+        updated, errors = bulk.update_posts(user, posts)
+        logger.debug("Updated %s posts, %s errors", len(updated), len(errors))
+        return BulkUpdatePosts(posts=updated, errors=errors)
+
+
+# Mutation to create many comments at once
+class BulkCreateComments(graphene.Mutation):
+    class Arguments:
+        comments = graphene.List(graphene.NonNull(BulkCommentInput), required=True)
+
+    comments = graphene.List(graphene.NonNull(CommentType), required=True)
+    errors = graphene.List(graphene.NonNull(BulkItemError), required=True)
+
+    def mutate(self, info, comments):
+        logger.debug("Creating %s comments", len(comments))
+        created, errors = bulk.create_comments(comments)
+        logger.debug("Created %s comments, %s errors", len(created), len(errors))
+        return BulkCreateComments(comments=created, errors=errors)
+
+
+# Mutation to delete many comments at once
+class BulkDeleteComments(graphene.Mutation):
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.Int), required=True)
+
+    deleted_ids = graphene.List(graphene.NonNull(graphene.Int), required=True)
+    errors = graphene.List(graphene.NonNull(BulkItemError), required=True)
+
+    def mutate(self, info, ids):
+        logger.debug("Deleting %s comments", len(ids))
+        deleted_ids, errors = bulk.delete_comments(ids)
+        logger.debug("Deleted %s comments, %s errors", len(deleted_ids), len(errors))
+        return BulkDeleteComments(deleted_ids=deleted_ids, errors=errors)
+
+
 #########################################################################
 class Mutation(graphene.ObjectType):
     # Link each mutation to its corresponding class
@@ -351,10 +548,43 @@ class Mutation(graphene.ObjectType):
     update_comment = UpdateComment.Field()
     delete_comment = DeleteComment.Field()
 
+    bulk_create_posts = BulkCreatePosts.Field()
+    bulk_update_posts = BulkUpdatePosts.Field()
+    bulk_create_comments = BulkCreateComments.Field()
+    bulk_delete_comments = BulkDeleteComments.Field()
+
     token_auth = graphql_jwt.ObtainJSONWebToken.Field()
     verify_token = graphql_jwt.Verify.Field()
     refresh_token = graphql_jwt.Refresh.Field()
 
 
-# Combine all queries and mutations into a single schema
-schema = graphene.Schema(query=Query, mutation=Mutation)
+#######################     SUBSCRIPTIONS      ################################
+class Subscription(graphene.ObjectType):
+    # Define a subscription to the comments created on a post
+    comment_created = graphene.Field(
+        CommentType, post_id=graphene.Int(required=True)
+    )
+    # Define a subscription to the changes of a post
+    post_updated = graphene.Field(PostType, id=graphene.Int(required=True))
+
+    # Yield every comment created on the post, as it is committed
+    async def subscribe_comment_created(root, info, post_id):
+        events = get_broker().subscribe(comment_created_channel(post_id))
+        async with aclosing(events):
+            async for comment_id in events:
+                comment = await Comment.objects.filter(pk=comment_id).afirst()
+                if comment is not None:
+                    yield comment
+
+    # Yield the post every time it is saved or its comments change
+    async def subscribe_post_updated(root, info, id):
+        events = get_broker().subscribe(post_updated_channel(id))
+        async with aclosing(events):
+            async for post_id in events:
+                post = await Post.objects.filter(pk=post_id).afirst()
+                if post is not None:
+                    yield post
+
+
+# Combine all queries, mutations and subscriptions into a single schema
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
@@ -0,0 +1,129 @@
+import re
+
+from django.db import connections, router, transaction
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .response_cache import invalidate
+
+# SQLite: FTS5 virtual table whose rowid is the post id, kept in sync by the
+# Post signals in api/signals.py.
+# PostgreSQL: generated tsvector column with a GIN index on api_post, kept in
+# sync by the database itself. Both are created by migration 0004.
+FTS_TABLE = "api_post_fts"
+
+
+def get_vendor(using=None):
+    using = using or router.db_for_write(Post)
+    return connections[using].vendor
+
+
+# Split free text into search terms, dropping FTS query syntax
+def search_terms(text):
+    return re.findall(r"\w+", text or "")
+
+
+# FTS5 MATCH expression requiring every term, the last one as a prefix
+def match_expression(terms):
+    quoted = ['"{}"'.format(term) for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+# Filter `queryset` to the posts matching `text`, best match first
+def search_posts(queryset, text):
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    vendor = get_vendor(queryset.db)
+    if vendor == "sqlite":
+        # Title matches weigh 10x more than content matches; bm25 is lower
+        # for better matches
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = api_post.id", f"{FTS_TABLE} MATCH %s"],
+            params=[match_expression(terms)],
+            select={"search_rank": f"bm25({FTS_TABLE}, 10.0, 1.0)"},
+            order_by=["search_rank", "-id"],
+        )
+    if vendor == "postgresql":
+        text = " ".join(terms)
+        return (
+            queryset.alias(
+                search_match=RawSQL(
+                    "api_post.search_vector @@ plainto_tsquery('english', %s)",
+                    [text],
+                    output_field=BooleanField(),
+                )
+            )
+            .filter(search_match=True)
+            .annotate(
+                search_rank=RawSQL(
+                    "ts_rank(api_post.search_vector, plainto_tsquery('english', %s))",
+                    [text],
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-search_rank", "-id")
+        )
+
+    # No full-text support: require every term somewhere in the post
+    for term in terms:
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(content__icontains=term)
+        )
+    return queryset.order_by("-created_at", "-id")
+
+
+def index_post(post):
+    index_posts([post])
+
+
+# (Re)index several posts with one statement of each kind
+def index_posts(posts):
+    if not posts:
+        return
+    using = router.db_for_write(Post, instance=posts[0])
+    if get_vendor(using) != "sqlite":
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [[post.pk] for post in posts]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (%s, %s, %s)",
+            [[post.pk, post.title, post.content] for post in posts],
+        )
+
+
+def remove_post(post):
+    using = router.db_for_write(Post, instance=post)
+    if get_vendor(using) != "sqlite":
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+
+
+# Rebuild the whole index from api_post, returns the number of indexed posts
+def rebuild_index(using=None):
+    using = using or router.db_for_write(Post)
+    vendor = get_vendor(using)
+    count = Post.objects.using(using).count()
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        if vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, content) "
+                "SELECT id, title, content FROM api_post"
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+            )
+        elif vendor == "postgresql":
+            # The generated column is always current, only refresh statistics
+            cursor.execute("ANALYZE api_post")
+    # Search results may have changed
+    invalidate(Post)
+    return count
@@ -1,13 +1,78 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Comment, Post
-from django.utils import timezone
+from .models import Author, Comment, Post
+from .comment_stats import comment_added, comment_removed, touch_post
+from .pubsub import comment_created_channel, post_updated_channel, publish
+from .response_cache import invalidate
+from .search import index_post, remove_post
 
 @receiver(post_save, sender=Comment)
-def update_post_last_updated(sender, instance, **kwargs):
-    # Get the related post
-    post = instance.post
-    # Update the last_updated field to the current time
-    post.updated_at = timezone.now()
-    # Save the post instance
-    post.save()
+def update_post_last_updated(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        # One UPDATE for the counters and updated_at of the post
+        comment_added(instance)
+    else:
+        # One UPDATE of updated_at, without loading or rewriting the post
+        touch_post(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_post_comment_count(sender, instance, **kwargs):
+    comment_removed(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_post_search_index(sender, instance, update_fields=None, **kwargs):
+    # Only title and content are indexed
+    if update_fields is not None and not {"title", "content"} & set(update_fields):
+        return
+    index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_search_index(sender, instance, **kwargs):
+    remove_post(instance)
+
+
+# Cached GraphQL responses reading a changed model are evicted. Comments also
+# update their post (counters and updated_at).
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_responses(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate(Comment, Post)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_responses(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate(sender)
+
+
+# Subscription events, published once the change is committed
+@receiver(post_save, sender=Comment)
+def publish_comment_created(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        publish(comment_created_channel(instance.post_id), instance.pk)
+    publish(post_updated_channel(instance.post_id), instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def publish_comment_deleted(sender, instance, **kwargs):
+    publish(post_updated_channel(instance.post_id), instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+def publish_post_updated(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        publish(post_updated_channel(instance.pk), instance.pk)
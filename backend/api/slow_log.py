@@ -0,0 +1,182 @@
+import json
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from graphql import (
+    StringValueNode,
+    VariableNode,
+    Visitor,
+    print_ast,
+    visit,
+)
+
+from .tracing import field_path
+
+# Written to logs/slow_operations.log (see LOGGING in settings)
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Operations taking longer are logged, 0 disables the check
+    "THRESHOLD_MS": 0,
+    # Operations executing more SQL queries are logged, 0 disables the check
+    "MAX_QUERIES": 0,
+    # Slowest SQL statements of a logged operation explained
+    "EXPLAIN_STATEMENTS": 3,
+    # Variables and arguments whose name contains one of these are redacted
+    "REDACTED_NAMES": ("password", "token", "secret", "authorization"),
+}
+
+REDACTED = "[redacted]"
+
+
+def get_setting(name):
+    return getattr(settings, "GRAPHQL_SLOW_LOG", {}).get(name, DEFAULTS[name])
+
+
+# Operations are traced (see api/tracing.py) while a check is enabled
+def is_enabled():
+    return bool(get_setting("THRESHOLD_MS") or get_setting("MAX_QUERIES"))
+
+
+def is_secret(name):
+    name = name.lower()
+    return any(redacted in name for redacted in get_setting("REDACTED_NAMES"))
+
+
+def redact_variables(value):
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if is_secret(key) else redact_variables(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact_variables(item) for item in value]
+    return value
+
+
+# Replaces the inline values of the secret arguments and input fields
+class RedactArguments(Visitor):
+    def redact(self, node):
+        if is_secret(node.name.value) and not isinstance(node.value, VariableNode):
+            return node.__class__(
+                name=node.name, value=StringValueNode(value=REDACTED)
+            )
+        return None
+
+    def enter_argument(self, node, *args):
+        return self.redact(node)
+
+    def enter_object_field(self, node, *args):
+        return self.redact(node)
+
+
+# The document printed in a canonical layout, with the secrets redacted
+def normalize_query(document):
+    return print_ast(visit(document, RedactArguments()))
+
+
+def is_slow(trace):
+    threshold = get_setting("THRESHOLD_MS")
+    max_queries = get_setting("MAX_QUERIES")
+    return bool(
+        (threshold and trace.duration >= threshold * 1_000_000)
+        or (max_queries and len(trace.queries) > max_queries)
+    )
+
+
+def milliseconds(nanoseconds):
+    return round(nanoseconds / 1_000_000, 3)
+
+
+# Timing and SQL queries per field path, slowest first
+def field_timings(trace):
+    fields = {}
+    for resolver in trace.resolvers:
+        field = fields.setdefault(
+            field_path(resolver["path"]),
+            {"count": 0, "duration": 0, "dbQueries": 0},
+        )
+        field["count"] += 1
+        field["duration"] += resolver["duration"]
+        field["dbQueries"] += resolver["dbQueries"]
+    return [
+        {
+            "path": path,
+            "count": field["count"],
+            "durationMs": milliseconds(field["duration"]),
+            "dbQueries": field["dbQueries"],
+        }
+        for path, field in sorted(
+            fields.items(), key=lambda item: item[1]["duration"], reverse=True
+        )
+    ]
+
+
+# Query plan of a read statement, None for the other statements: explaining
+# them is not always free of side effects
+def explain(alias, sql, params, many):
+    if many or not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return [" ".join(str(column) for column in row) for row in cursor]
+    except DatabaseError as e:
+        return [f"EXPLAIN failed: {e}"]
+
+
+# The slowest statements with their plan. Parameters are left out of the log,
+# they may hold secrets.
+def slowest_statements(trace):
+    statements = {}
+    for alias, sql, params, many, duration in trace.queries:
+        if duration > statements.get((alias, sql), (0,))[0]:
+            statements[(alias, sql)] = (duration, params, many)
+    slowest = sorted(statements.items(), key=lambda item: item[1][0], reverse=True)
+    return [
+        {
+            "sql": sql,
+            "alias": alias,
+            "durationMs": milliseconds(duration),
+            "plan": explain(alias, sql, params, many),
+        }
+        for (alias, sql), (duration, params, many) in slowest[
+            : get_setting("EXPLAIN_STATEMENTS")
+        ]
+    ]
+
+
+# Statements executed more than once, usually a resolver running one query
+# per parent object (N+1)
+def repeated_statements(trace):
+    counts = Counter(sql for _, sql, _, _, _ in trace.queries)
+    return [
+        {"sql": sql, "count": count}
+        for sql, count in counts.most_common()
+        if count > 1
+    ]
+
+
+# Log the finished `trace` when the operation is slow
+def check(trace, document, variables):
+    if not is_slow(trace):
+        return
+    entry = {
+        "operationName": trace.operation_name,
+        "durationMs": milliseconds(trace.duration),
+        "dbQueries": len(trace.queries),
+        "dbDurationMs": milliseconds(sum(query[4] for query in trace.queries)),
+        "query": normalize_query(document),
+        "variables": redact_variables(variables or {}),
+        "fields": field_timings(trace),
+        "slowestStatements": slowest_statements(trace),
+        "repeatedStatements": repeated_statements(trace),
+    }
+    logger.warning(
+        "Slow GraphQL operation %s: %s",
+        trace.operation_name,
+        json.dumps(entry, default=str),
+    )
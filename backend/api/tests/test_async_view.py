@@ -0,0 +1,135 @@
+import json
+import threading
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TransactionTestCase, override_settings
+from django.views.decorators.csrf import csrf_exempt
+from graphql import build_schema, execute, parse
+from graphql_jwt.shortcuts import get_token
+from .. import profiling
+from ..execution import ConcurrentExecutionContext
+from ..models import Author, Post
+from ..views import AsyncBlogGraphQLView
+
+
+# Top-level fields run in worker threads with their own connections, which
+# only see committed data
+class AsyncGraphQLViewTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.author = Author.objects.create(
+            user=self.user, name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Post Title", content="Post content", author=self.author
+        )
+        self.view = csrf_exempt(AsyncBlogGraphQLView.as_view())
+
+    def post_graphql(self, query, variables=None, headers=None):
+        request = AsyncRequestFactory().post(
+            "/graphql/",
+            json.dumps({"query": query, "variables": variables or {}}),
+            content_type="application/json",
+            headers=headers,
+        )
+        request.user = AnonymousUser()
+        response = async_to_sync(self.view)(request)
+        return response.status_code, json.loads(response.content)
+
+    def test_view_is_async(self):
+        self.assertTrue(AsyncBlogGraphQLView.view_is_async)
+
+    def test_top_level_fields_are_resolved(self):
+        query = """
+            query Feed($id: Int!) {
+              allPosts { edges { node { title author { name } } } }
+              authorById(id: $id) { name posts { edges { node { title } } } }
+            }
+        """
+        status, body = self.post_graphql(query, {"id": self.author.pk})
+        self.assertEqual(status, 200, body)
+        self.assertEqual(
+            body["data"]["allPosts"]["edges"][0]["node"],
+            {"title": "Post Title", "author": {"name": "John Doe"}},
+        )
+        self.assertEqual(
+            body["data"]["authorById"]["posts"]["edges"][0]["node"]["title"],
+            "Post Title",
+        )
+
+    def test_field_errors_keep_other_fields(self):
+        query = "query { postById(id: 0) { title } allAuthors { edges { node { name } } } }"
+        status, body = self.post_graphql(query)
+        self.assertEqual(status, 200)
+        self.assertIsNone(body["data"]["postById"])
+        self.assertEqual(len(body["data"]["allAuthors"]["edges"]), 1)
+        self.assertEqual(body["errors"][0]["path"], ["postById"])
+
+    def test_mutations_run_serially(self):
+        query = """
+            mutation {
+              first: createPost(title: "One", content: "1", authorId: "x") { post { title } }
+              second: createPost(title: "Two", content: "2", authorId: "x") { post { title } }
+            }
+        """
+        token = get_token(self.user)
+        status, body = self.post_graphql(
+            query, headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(status, 200, body)
+        self.assertNotIn("errors", body)
+        titles = list(
+            Post.objects.order_by("pk").values_list("title", flat=True)
+        )
+        self.assertEqual(titles, ["Post Title", "One", "Two"])
+
+    # cProfile only sees one thread, the fields of profiled queries are
+    # resolved in the request thread
+    @override_settings(GRAPHQL_PROFILING={"ENABLED": True})
+    def test_profiled_queries_run_serially(self):
+        self.user.is_staff = True
+        self.user.save()
+        request = AsyncRequestFactory().post(
+            "/graphql/",
+            json.dumps({"query": "query { allPosts { edges { node { title } } } }"}),
+            content_type="application/json",
+            headers={
+                "Authorization": f"Bearer {get_token(self.user)}",
+                profiling.PROFILE_HEADER: "1",
+            },
+        )
+        request.user = AnonymousUser()
+        response = async_to_sync(self.view)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("errors", json.loads(response.content))
+        profile = profiling.load(response[profiling.PROFILE_ID_HEADER])
+        self.assertIn("resolve_all_posts", profile["report"])
+
+
+class ConcurrentExecutionContextTest(TransactionTestCase):
+    # Both fields wait for each other, which only completes when they are
+    # resolved at the same time
+    def test_top_level_fields_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait(*args):
+            barrier.wait()
+            return str(threading.get_ident())
+
+        schema = build_schema("type Query { first: String second: String }")
+        root = {"first": wait, "second": wait}
+
+        async def run():
+            return await execute(
+                schema,
+                parse("{ first second }"),
+                root_value=root,
+                execution_context_class=ConcurrentExecutionContext,
+            )
+
+        result = async_to_sync(run)()
+        self.assertIsNone(result.errors)
+        self.assertNotEqual(result.data["first"], result.data["second"])
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from graphql_jwt.shortcuts import get_token
+from .. import auth
+from ..models import Author, Post
+
+
+class AuthCacheTest(GraphQLTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = get_token(self.user)
+        self.author = Author.objects.create(
+            user=self.user, name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Post Title", content="Post content", author=self.author
+        )
+
+    def post_graphql(self, query, token=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/graphql/",
+                {"query": query},
+                HTTP_AUTHORIZATION=f"Bearer {token or self.token}",
+                content_type="application/json",
+            )
+        user_queries = [
+            q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"]
+        ]
+        author_queries = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if q["sql"].startswith('SELECT "api_author"')
+        ]
+        return response, user_queries, author_queries
+
+    # Several authenticated root fields verify the token and load the user once,
+    # with the author profile joined into the same query
+    def test_token_is_verified_once_per_request(self):
+        query = """
+            mutation {
+              first: createPost(title: "One", content: "1", authorId: "x") { post { title } }
+              second: createPost(title: "Two", content: "2", authorId: "x") { post { title } }
+            }
+        """
+        with mock.patch.object(auth, "get_payload", wraps=auth.get_payload) as decode:
+            response, user_queries, author_queries = self.post_graphql(query)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(len(user_queries), 1)
+        self.assertIn('"api_author"', user_queries[0])
+        self.assertEqual(author_queries, [])
+
+    def test_invalid_token_is_rejected(self):
+        query = """
+            mutation {
+              createPost(title: "x", content: "y", authorId: "1") { post { title } }
+            }
+        """
+        response, _, _ = self.post_graphql(query, token="not-a-token")
+        self.assertResponseHasErrors(response)
+        self.assertFalse(Post.objects.filter(title="x").exists())
+
+    def test_anonymous_queries_skip_authentication(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/graphql/",
+                {"query": "query { allPosts { edges { node { title } } } }"},
+                content_type="application/json",
+            )
+        self.assertResponseNoErrors(response)
+        self.assertFalse(any('"auth_user"' in q["sql"] for q in ctx.captured_queries))
+
+    @override_settings(JWT_AUTH_CACHE_TIMEOUT=60)
+    def test_cross_request_cache_skips_verification(self):
+        query = 'mutation { updatePost(id: %s, title: "New") { post { title } } }' % (
+            self.post.id
+        )
+        response, user_queries, _ = self.post_graphql(query)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(len(user_queries), 1)
+
+        response, user_queries, _ = self.post_graphql(query)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(user_queries, [])
@@ -0,0 +1,115 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from graphene_django.utils import GraphQLTestCase
+from graphql_jwt.shortcuts import get_token
+from .. import auth
+from ..loaders import Loaders
+from ..models import Author, Post
+
+
+class BatchedRequestTest(GraphQLTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = get_token(self.user)
+        self.author = Author.objects.create(
+            user=self.user, name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Post Title", content="Post content", author=self.author
+        )
+
+    def post_batch(self, operations, **extra):
+        return self.client.post(
+            "/graphql/",
+            json.dumps(operations),
+            content_type="application/json",
+            **extra,
+        )
+
+    def test_results_are_returned_in_order(self):
+        response = self.post_batch(
+            [
+                {"query": "query { allAuthors { edges { node { name } } } }"},
+                {
+                    "query": "query Post($id: Int!) { postById(id: $id) { title } }",
+                    "variables": {"id": self.post.pk},
+                },
+                {"query": "query { postById(id: 0) { title } }"},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual(len(results), 3)
+        self.assertEqual(
+            results[0]["data"]["allAuthors"]["edges"],
+            [{"node": {"name": "John Doe"}}],
+        )
+        self.assertEqual(results[1]["data"]["postById"], {"title": "Post Title"})
+        self.assertIn("errors", results[2])
+
+    # The token is verified once for the whole batch
+    def test_authentication_is_resolved_once(self):
+        mutation = """
+            mutation Update($id: Int!, $title: String!) {
+              updatePost(id: $id, title: $title) { post { title } }
+            }
+        """
+        operations = [
+            {"query": mutation, "variables": {"id": self.post.pk, "title": title}}
+            for title in ("One", "Two", "Three")
+        ]
+        with mock.patch.object(auth, "get_payload", wraps=auth.get_payload) as decode:
+            response = self.post_batch(
+                operations, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+            )
+        self.assertEqual(
+            [r["data"]["updatePost"]["post"]["title"] for r in response.json()],
+            ["One", "Two", "Three"],
+        )
+        self.assertEqual(decode.call_count, 1)
+
+    # Operations share the loaders, which are cleared after mutations
+    def test_loaders_are_shared_and_cleared_after_mutations(self):
+        query = "query { allPosts { edges { node { author { name } } } } }"
+        mutation = """
+            mutation Update($id: Int!) {
+              updateAuthor(id: $id, name: "Jane") { author { name } }
+            }
+        """
+        with mock.patch.object(Loaders, "clear", autospec=True) as clear:
+            response = self.post_batch(
+                [
+                    {"query": query},
+                    {"query": mutation, "variables": {"id": self.author.pk}},
+                    {"query": query},
+                ]
+            )
+        names = [
+            r["data"]["allPosts"]["edges"][0]["node"]["author"]["name"]
+            for r in (response.json()[0], response.json()[2])
+        ]
+        self.assertEqual(names, ["John Doe", "Jane"])
+        self.assertEqual(clear.call_count, 1)
+
+    def test_single_operations_still_work(self):
+        response = self.client.post(
+            "/graphql/",
+            {"query": "query { allPosts { edges { node { title } } } }"},
+            content_type="application/json",
+        )
+        self.assertResponseNoErrors(response)
+        self.assertIsInstance(response.json(), dict)
+
+    @override_settings(GRAPHQL_BATCH_MAX_OPERATIONS=2)
+    def test_invalid_batches_are_rejected(self):
+        operation = {"query": "query { allPosts { edges { node { title } } } }"}
+        self.assertEqual(self.post_batch([]).status_code, 400)
+        self.assertEqual(self.post_batch([operation, "x"]).status_code, 400)
+        response = self.post_batch([operation] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("limited to 2", response.json()["errors"][0]["message"])
@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.test import TestCase
+from .. import benchmark
+from ..models import Author, Comment, Post
+from ..schema import schema
+
+
+class BenchmarkTest(TestCase):
+    def seed(self, seed=0):
+        benchmark.seed(authors=3, posts=30, comments=60, seed=seed, batch_size=7)
+
+    def test_seed_creates_consistent_data(self):
+        self.seed()
+        self.assertEqual(
+            benchmark.dataset(), {"authors": 3, "posts": 30, "comments": 60}
+        )
+        self.assertEqual(
+            Post.objects.aggregate(total=Sum("comment_count"))["total"], 60
+        )
+        # The search index was rebuilt
+        word = Post.objects.first().title.split()[0].lower()
+        result = schema.execute(
+            "query Search($q: String!) {"
+            "  searchPosts(query: $q) { edges { node { id } } }"
+            "}",
+            variable_values={"q": word},
+        )
+        self.assertIsNone(result.errors)
+        self.assertTrue(result.data["searchPosts"]["edges"])
+
+    def test_seed_is_reproducible(self):
+        self.seed(seed=1)
+        titles = list(Post.objects.order_by("pk").values_list("title", flat=True))
+        benchmark.clear()
+        self.seed(seed=1)
+        self.assertEqual(
+            list(Post.objects.order_by("pk").values_list("title", flat=True)), titles
+        )
+
+    def test_clear_only_deletes_benchmark_data(self):
+        author = Author.objects.create(name="John Doe", email="john.doe@example.com")
+        Post.objects.create(title="Title", content="Content", author=author)
+        self.seed()
+        benchmark.clear()
+        self.assertEqual(
+            benchmark.dataset(), {"authors": 0, "posts": 0, "comments": 0}
+        )
+        self.assertEqual(Post.objects.get().author, author)
+
+    def test_scenarios_report_metrics(self):
+        self.seed()
+        results = benchmark.run(schema, iterations=3, warmup=0)
+        self.assertEqual(set(results["scenarios"]), set(benchmark.SCENARIOS))
+        for metrics in results["scenarios"].values():
+            self.assertLessEqual(metrics["p50_ms"], metrics["p95_ms"])
+            self.assertLessEqual(metrics["p95_ms"], metrics["p99_ms"])
+            self.assertGreater(metrics["queries"], 0)
+            self.assertGreater(metrics["peak_memory_kb"], 0)
+        # Mutation bursts are rolled back
+        self.assertEqual(Comment.objects.count(), 60)
+
+    def test_compare(self):
+        metrics = {"p95_ms": 10.0, "queries": 4, "peak_memory_kb": 100.0}
+        baseline = {"dataset": {"posts": 1}, "scenarios": {"feed": metrics}}
+
+        def results(**changes):
+            return {
+                "dataset": {"posts": 1},
+                "scenarios": {"feed": {**metrics, **changes}},
+            }
+
+        self.assertEqual(benchmark.compare(baseline, results(p95_ms=12.0)), [])
+        # Within the noise floor
+        self.assertEqual(benchmark.compare(baseline, results(p95_ms=11.9)), [])
+        self.assertEqual(len(benchmark.compare(baseline, results(p95_ms=20.0))), 1)
+        self.assertEqual(len(benchmark.compare(baseline, results(queries=5))), 1)
+        self.assertEqual(
+            len(benchmark.compare(baseline, results(peak_memory_kb=200.0))), 1
+        )
+        with self.assertRaises(benchmark.BenchmarkError):
+            benchmark.compare(baseline, {"dataset": {"posts": 2}, "scenarios": {}})
+
+    def test_command_checks_the_baseline(self):
+        call_command(
+            "seed_benchmark_data",
+            authors=2,
+            posts=10,
+            comments=20,
+            stdout=StringIO(),
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "baseline.json")
+        # Only the SQL query count is stable enough to compare in a test
+        options = {
+            "scenario": ["feed"],
+            "iterations": 2,
+            "warmup": 0,
+            "tolerance": 10,
+        }
+
+        call_command("benchmark", output=path, stdout=StringIO(), **options)
+        out = StringIO()
+        call_command("benchmark", baseline=path, stdout=out, **options)
+        self.assertIn("No regressions", out.getvalue())
+
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        baseline["scenarios"]["feed"]["queries"] -= 1
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f)
+        with self.assertRaisesMessage(CommandError, "feed"):
+            call_command("benchmark", baseline=path, stdout=StringIO(), **options)
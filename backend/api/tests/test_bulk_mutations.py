@@ -0,0 +1,205 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from graphql_jwt.shortcuts import get_token
+from ..models import Author, Comment, Post
+from ..search import search_posts
+
+
+class BulkMutationTest(GraphQLTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = get_token(self.user)
+        self.author = Author.objects.create(
+            user=self.user, name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Post Title", content="Post content", author=self.author
+        )
+        other_user = User.objects.create_user(username="other", password="testpass")
+        self.other_post = Post.objects.create(
+            title="Other",
+            content="Other content",
+            author=Author.objects.create(
+                user=other_user, name="Jane Doe", email="jane.doe@example.com"
+            ),
+        )
+
+    def post_graphql(self, query, variables, token=None):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/graphql/",
+                {"query": query, "variables": variables},
+                content_type="application/json",
+                **headers,
+            )
+        return response.json(), len(ctx.captured_queries)
+
+    def create_posts(self, count):
+        query = """
+            mutation Create($posts: [BulkPostInput!]!) {
+              bulkCreatePosts(posts: $posts) {
+                posts { title }
+                errors { index message }
+              }
+            }
+        """
+        posts = [
+            {"title": f"Imported {i}", "content": f"Imported content {i}"}
+            for i in range(count)
+        ]
+        return self.post_graphql(query, {"posts": posts}, self.token)
+
+    # The number of queries does not grow with the number of posts
+    def test_bulk_create_posts(self):
+        body, few_queries = self.create_posts(2)
+        self.assertNotIn("errors", body)
+        self.assertEqual(
+            [p["title"] for p in body["data"]["bulkCreatePosts"]["posts"]],
+            ["Imported 0", "Imported 1"],
+        )
+
+        _, many_queries = self.create_posts(20)
+        self.assertEqual(many_queries, few_queries)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 23)
+        self.assertEqual(search_posts(Post.objects.all(), "imported").count(), 22)
+
+    def test_bulk_create_posts_reports_invalid_items(self):
+        query = """
+            mutation {
+              bulkCreatePosts(posts: [
+                {title: "Good", content: "x"},
+                {title: "%s", content: "y"}
+              ]) {
+                posts { title }
+                errors { index message }
+              }
+            }
+        """ % ("t" * 201)
+        body, _ = self.post_graphql(query, {}, self.token)
+        result = body["data"]["bulkCreatePosts"]
+        self.assertEqual(result["posts"], [{"title": "Good"}])
+        self.assertEqual(result["errors"][0]["index"], 1)
+        self.assertIn("title", result["errors"][0]["message"])
+
+    def test_bulk_create_posts_requires_login(self):
+        query = """
+            mutation {
+              bulkCreatePosts(posts: [{title: "x", content: "y"}]) { errors { index } }
+            }
+        """
+        body, _ = self.post_graphql(query, {})
+        self.assertIn("errors", body)
+        self.assertFalse(Post.objects.filter(title="x").exists())
+
+    # Posts of other authors are left untouched and reported
+    def test_bulk_update_posts_checks_ownership(self):
+        query = """
+            mutation Update($posts: [BulkPostUpdateInput!]!) {
+              bulkUpdatePosts(posts: $posts) {
+                posts { id title }
+                errors { index id message }
+              }
+            }
+        """
+        posts = [
+            {"id": self.post.pk, "title": "Updated"},
+            {"id": self.other_post.pk, "title": "Hijacked"},
+            {"id": 0, "title": "Missing"},
+        ]
+        body, _ = self.post_graphql(query, {"posts": posts}, self.token)
+        result = body["data"]["bulkUpdatePosts"]
+        self.assertEqual([p["title"] for p in result["posts"]], ["Updated"])
+        self.assertEqual(
+            [(e["index"], e["message"]) for e in result["errors"]],
+            [
+                (1, "You do not have permission to edit this post"),
+                (2, "Post does not exist"),
+            ],
+        )
+        self.post.refresh_from_db()
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.post.title, "Updated")
+        self.assertEqual(self.other_post.title, "Other")
+        self.assertEqual(search_posts(Post.objects.all(), "updated").count(), 1)
+
+    def test_bulk_create_and_delete_comments(self):
+        query = """
+            mutation Create($comments: [BulkCommentInput!]!) {
+              bulkCreateComments(comments: $comments) {
+                comments { content }
+                errors { index message }
+              }
+            }
+        """
+        comments = [
+            {"postId": self.post.pk, "content": "One"},
+            {"postId": self.post.pk, "content": "Two"},
+            {"postId": self.other_post.pk, "content": "Three"},
+            {"postId": 0, "content": "Lost"},
+        ]
+        body, _ = self.post_graphql(query, {"comments": comments})
+        result = body["data"]["bulkCreateComments"]
+        self.assertEqual(len(result["comments"]), 3)
+        self.assertEqual(
+            result["errors"], [{"index": 3, "message": "Post does not exist"}]
+        )
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertIsNotNone(self.post.last_comment_at)
+
+        ids = list(Comment.objects.filter(post=self.post).values_list("pk", flat=True))
+        query = """
+            mutation Delete($ids: [Int!]!) {
+              bulkDeleteComments(ids: $ids) { deletedIds errors { index id message } }
+            }
+        """
+        body, _ = self.post_graphql(query, {"ids": ids + [0]})
+        result = body["data"]["bulkDeleteComments"]
+        self.assertEqual(result["deletedIds"], sorted(ids))
+        self.assertEqual(
+            result["errors"],
+            [{"index": 2, "id": 0, "message": "Comment does not exist"}],
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertIsNone(self.post.last_comment_at)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    # The post counters, the response cache and the subscriptions are updated
+    # once per post, not once per comment
+    def test_bulk_delete_comments_query_count(self):
+        query = """
+            mutation Delete($ids: [Int!]!) {
+              bulkDeleteComments(ids: $ids) { deletedIds }
+            }
+        """
+
+        def delete(count):
+            comments = Comment.objects.bulk_create(
+                Comment(post=post, content="Comment")
+                for post in (self.post, self.other_post)
+                for _ in range(count)
+            )
+            body, queries = self.post_graphql(
+                query, {"ids": [comment.pk for comment in comments]}, self.token
+            )
+            deleted = body["data"]["bulkDeleteComments"]["deletedIds"]
+            self.assertEqual(len(deleted), 2 * count)
+            return queries
+
+        self.assertEqual(delete(2), delete(30))
+        self.assertFalse(Comment.objects.exists())
+        for post in (self.post, self.other_post):
+            post.refresh_from_db()
+            self.assertIsNone(post.last_comment_at)
+
+    @override_settings(GRAPHQL_BULK_MAX_ITEMS=1)
+    def test_bulk_size_is_limited(self):
+        body, _ = self.create_posts(2)
+        self.assertIn("At most 1 items", body["errors"][0]["message"])
+        self.assertEqual(Post.objects.count(), 2)
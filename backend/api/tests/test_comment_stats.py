@@ -0,0 +1,120 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from graphene_django.utils import GraphQLTestCase
+from ..models import Author, Post, Comment
+
+
+class CommentStatsTest(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(
+            name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Sample Post", content="Sample content", author=self.author
+        )
+
+    def test_new_post_has_no_comments(self):
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertIsNone(self.post.last_comment_at)
+
+    def test_comment_creation_updates_stats(self):
+        Comment.objects.create(content="First", post=self.post)
+        second = Comment.objects.create(content="Second", post=self.post)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.post.last_comment_at, second.created_at)
+
+    def test_comment_update_does_not_count_twice(self):
+        comment = Comment.objects.create(content="First", post=self.post)
+        comment.content = "Edited"
+        comment.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_comment_deletion_updates_stats(self):
+        first = Comment.objects.create(content="First", post=self.post)
+        second = Comment.objects.create(content="Second", post=self.post)
+        second.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment_at, first.created_at)
+
+        first.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertIsNone(self.post.last_comment_at)
+
+    def test_repair_command_fixes_stale_stats(self):
+        comment = Comment.objects.create(content="First", post=self.post)
+        Post.objects.update(comment_count=7, last_comment_at=None)
+
+        out = StringIO()
+        call_command("repair_comment_stats", "--dry-run", stdout=out)
+        self.assertIn("1 posts have stale comment stats", out.getvalue())
+
+        call_command("repair_comment_stats", stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment_at, comment.created_at)
+
+        out = StringIO()
+        call_command("repair_comment_stats", "--dry-run", stdout=out)
+        self.assertIn("0 posts have stale comment stats", out.getvalue())
+
+
+class CommentStatsQueryTest(GraphQLTestCase):
+    def setUp(self):
+        self.author = Author.objects.create(
+            name="John Doe", email="john.doe@example.com"
+        )
+        self.quiet = Post.objects.create(
+            title="Quiet", content="content", author=self.author
+        )
+        self.busy = Post.objects.create(
+            title="Busy", content="content", author=self.author
+        )
+        Comment.objects.create(content="Old", post=self.quiet)
+        Comment.objects.create(content="New", post=self.busy)
+        Comment.objects.create(content="Newer", post=self.busy)
+
+    def test_stats_are_exposed_and_orderable(self):
+        query = """
+            query {
+              allPosts(orderBy: "-last_comment_at") {
+                edges { node { title commentCount lastCommentAt } }
+              }
+            }
+        """
+        response = self.client.post(
+            "/graphql/", {"query": query}, content_type="application/json"
+        )
+        self.assertResponseNoErrors(response)
+        nodes = [e["node"] for e in response.json()["data"]["allPosts"]["edges"]]
+        self.assertEqual([n["title"] for n in nodes], ["Busy", "Quiet"])
+        self.assertEqual([n["commentCount"] for n in nodes], [2, 1])
+        self.assertIsNotNone(nodes[0]["lastCommentAt"])
+
+    # The post of the created comment carries the updated stats
+    def test_create_comment_returns_the_updated_stats(self):
+        query = """
+            mutation Create($postId: Int!) {
+              createComment(content: "Newest", postId: $postId) {
+                comment { post { commentCount lastCommentAt updatedAt } }
+              }
+            }
+        """
+        response = self.client.post(
+            "/graphql/",
+            {"query": query, "variables": {"postId": self.busy.pk}},
+            content_type="application/json",
+        )
+        self.assertResponseNoErrors(response)
+        post = response.json()["data"]["createComment"]["comment"]["post"]
+        self.busy.refresh_from_db()
+        self.assertEqual(post["commentCount"], 3)
+        self.assertEqual(
+            post["lastCommentAt"], self.busy.last_comment_at.isoformat()
+        )
+        self.assertEqual(post["updatedAt"], self.busy.updated_at.isoformat())
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.test import TestCase
+from graphql import parse
+from graphene_django.utils import GraphQLTestCase
+from ..document_cache import DocumentCache, document_cache
+from ..models import Author
+from ..schema import schema
+
+
+class DocumentCacheTest(TestCase):
+    def setUp(self):
+        self.cache = DocumentCache(maxsize=2)
+        self.schema = schema.graphql_schema
+
+    def test_repeated_query_is_parsed_once(self):
+        query = "{ allAuthors { edges { node { name } } } }"
+        with mock.patch("api.document_cache.parse", wraps=parse) as parse_mock:
+            first = self.cache.get(self.schema, query)
+            second = self.cache.get(self.schema, query)
+        self.assertIs(first, second)
+        self.assertEqual(parse_mock.call_count, 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_validation_result_is_cached(self):
+        document, errors = self.cache.get(self.schema, "{ noSuchField }")
+        self.assertEqual(len(errors), 1)
+        _, cached_errors = self.cache.get(self.schema, "{ noSuchField }")
+        self.assertIs(errors, cached_errors)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.get(self.schema, "{ a: allAuthors { edges { cursor } } }")
+        self.cache.get(self.schema, "{ b: allAuthors { edges { cursor } } }")
+        self.cache.get(self.schema, "{ a: allAuthors { edges { cursor } } }")
+        self.cache.get(self.schema, "{ c: allAuthors { edges { cursor } } }")
+        self.assertEqual(self.cache.stats()["size"], 2)
+
+        self.cache.get(self.schema, "{ a: allAuthors { edges { cursor } } }")
+        self.assertEqual(self.cache.stats()["hits"], 2)
+        self.cache.get(self.schema, "{ b: allAuthors { edges { cursor } } }")
+        self.assertEqual(self.cache.stats()["misses"], 4)
+
+    def test_rebuilt_schema_clears_the_cache(self):
+        self.cache.get(self.schema, "{ allAuthors { edges { cursor } } }")
+        rebuilt = type(schema)(query=schema.query, mutation=schema.mutation)
+        self.cache.get(rebuilt.graphql_schema, "{ allAuthors { edges { cursor } } }")
+        self.assertEqual(self.cache.stats()["misses"], 2)
+        self.assertEqual(self.cache.stats()["size"], 1)
+
+
+class DocumentCacheViewTest(GraphQLTestCase):
+    def setUp(self):
+        document_cache.clear()
+        Author.objects.create(name="John Doe", email="john.doe@example.com")
+
+    def test_view_reuses_cached_documents(self):
+        query = "query { allAuthors { edges { node { name } } } }"
+        for _ in range(3):
+            response = self.client.post(
+                "/graphql/", {"query": query}, content_type="application/json"
+            )
+            self.assertResponseNoErrors(response)
+        self.assertEqual(document_cache.stats()["misses"], 1)
+        self.assertEqual(document_cache.stats()["hits"], 2)
+
+    def test_syntax_errors_are_reported(self):
+        response = self.client.post(
+            "/graphql/", {"query": "query {"}, content_type="application/json"
+        )
+        self.assertResponseHasErrors(response)
+        self.assertEqual(document_cache.stats()["size"], 0)
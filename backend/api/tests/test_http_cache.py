@@ -0,0 +1,101 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from graphql_jwt.shortcuts import get_token
+from ..http_cache import make_etag
+from ..models import Author, Post
+
+
+POST_QUERY = "query Post($id: Int!) { postById(id: $id) { title } }"
+
+
+class ConditionalGetTest(GraphQLTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.author = Author.objects.create(
+            user=self.user, name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Post Title", content="Post content", author=self.author
+        )
+
+    def get(self, query=POST_QUERY, variables=None, **extra):
+        params = {"query": query}
+        params["variables"] = json.dumps(variables or {"id": self.post.pk})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                "/graphql/", params, HTTP_ACCEPT="application/json", **extra
+            )
+        return response, len(ctx.captured_queries)
+
+    def test_get_queries_have_cache_headers(self):
+        response, _ = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["postById"]["title"], "Post Title")
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=0", response["Cache-Control"])
+        self.assertIn("Authorization", response["Vary"])
+
+    # The same body gets the same ETag in every worker
+    def test_etag_is_the_hash_of_the_body(self):
+        response, _ = self.get()
+        self.assertEqual(response["ETag"], make_etag(response.content))
+        cache.clear()
+        again, _ = self.get()
+        self.assertEqual(again["ETag"], response["ETag"])
+
+    # A matching ETag answers 304, the repeated query is served by the response
+    # cache
+    def test_matching_etag_returns_not_modified(self):
+        response, _ = self.get()
+        not_modified, queries = self.get(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        self.assertEqual(queries, 0)
+
+    def test_changes_produce_a_new_etag(self):
+        response, _ = self.get()
+        self.post.title = "New Title"
+        self.post.save()
+
+        changed, _ = self.get(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], response["ETag"])
+        self.assertEqual(changed.json()["data"]["postById"]["title"], "New Title")
+
+    # Authenticated responses are private and validated against their body
+    def test_authenticated_responses_are_private(self):
+        token = get_token(self.user)
+        response, _ = self.get(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertIn("private", response["Cache-Control"])
+
+        not_modified, _ = self.get(
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    @override_settings(GRAPHQL_RESPONSE_CACHE={"ENABLED": False})
+    def test_etag_without_the_response_cache(self):
+        response, _ = self.get()
+        not_modified, _ = self.get(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_errors_and_post_requests_are_not_cached(self):
+        response, _ = self.get(variables={"id": 0})
+        self.assertNotIn("ETag", response)
+
+        response = self.client.post(
+            "/graphql/",
+            {"query": POST_QUERY, "variables": {"id": self.post.pk}},
+            content_type="application/json",
+        )
+        self.assertNotIn("ETag", response)
@@ -0,0 +1,76 @@
+from django.db import connection
+from django.test import TestCase
+from ..filters import AuthorFilter, CommentFilter, PostFilter
+from ..models import Author, Comment, Post
+
+
+# Substring filters (`*_icontains`) cannot use a B-tree index; posts have the
+# full-text `search` filter for that. Every other exposed filter and ordering
+# must be served by an index.
+INDEXED_FILTERS = [
+    (AuthorFilter, Author, {"email": "john.doe@example.com"}),
+    (PostFilter, Post, {"author_name_exact": "John Doe"}),
+    (PostFilter, Post, {"created_at_date": "2024-01-01"}),
+    (PostFilter, Post, {"created_at_gte": "2024-01-01"}),
+    (PostFilter, Post, {"created_at_lte": "2024-01-01"}),
+    (PostFilter, Post, {"order_by": "created_at"}),
+    (PostFilter, Post, {"order_by": "-last_comment_at"}),
+    (PostFilter, Post, {"order_by": "-comment_count"}),
+    (CommentFilter, Comment, {"created_at__date": "2024-01-01"}),
+    (CommentFilter, Comment, {"created_at__gte": "2024-01-01"}),
+    (CommentFilter, Comment, {"created_at__lte": "2024-01-01"}),
+]
+
+
+class FilterIndexTest(TestCase):
+    def setUp(self):
+        author = Author.objects.create(name="John Doe", email="john.doe@example.com")
+        post = Post.objects.create(title="Title", content="Content", author=author)
+        Comment.objects.create(post=post, content="Comment")
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(connection.ops.explain_query_prefix() + " " + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    # A plan step reading a whole table without an index, or sorting rows
+    # outside of an index
+    def assertUsesIndexes(self, queryset, label):
+        plan = self.query_plan(queryset)
+        for step in plan:
+            full_scan = step.startswith("SCAN") and "INDEX" not in step
+            self.assertFalse(full_scan, f"{label} scans a table: {plan}")
+            self.assertNotIn("TEMP B-TREE", step, f"{label} sorts rows: {plan}")
+
+    def test_filters_use_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("The plan format is SQLite's")
+        for filterset_class, model, data in INDEXED_FILTERS:
+            filterset = filterset_class(data, queryset=model.objects.all())
+            self.assertTrue(filterset.is_valid(), filterset.errors)
+            with self.subTest(filterset_class.__name__, **data):
+                self.assertUsesIndexes(
+                    filterset.qs, f"{filterset_class.__name__} {data}"
+                )
+
+    # Relations listed per parent, newest first
+    def test_relations_use_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("The plan format is SQLite's")
+        self.assertUsesIndexes(
+            Post.objects.filter(author_id=1).order_by("-created_at"), "posts"
+        )
+        self.assertUsesIndexes(
+            Comment.objects.filter(post_id=1).order_by("-created_at"), "comments"
+        )
+
+    def test_day_filter_matches_the_whole_day(self):
+        post = Post.objects.get()
+        day = post.created_at.date().isoformat()
+        filterset = PostFilter({"created_at_date": day}, queryset=Post.objects.all())
+        self.assertEqual(list(filterset.qs), [post])
+        filterset = PostFilter(
+            {"created_at_date": "2000-01-01"}, queryset=Post.objects.all()
+        )
+        self.assertEqual(list(filterset.qs), [])
@@ -0,0 +1,169 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from django.contrib.auth.models import User
+from graphql_relay import offset_to_cursor
+from ..fields import connection_window
+from ..loaders import Loaders
+from ..models import Author, Post, Comment
+
+
+FEED_QUERY = """
+    query {
+      allPosts {
+        edges {
+          node {
+            title
+            author {
+              name
+              user {
+                username
+              }
+            }
+            comments {
+              edges {
+                node {
+                  content
+                  post {
+                    title
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+"""
+
+AUTHORS_QUERY = """
+    query {
+      allAuthors {
+        edges {
+          node {
+            name
+            posts {
+              edges {
+                node {
+                  title
+                  comments {
+                    edges {
+                      node {
+                        content
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+"""
+
+
+class DataLoaderTest(GraphQLTestCase):
+    def create_posts(self, count, start=0):
+        for i in range(start, start + count):
+            user = User.objects.create_user(username=f"user{i}", password="testpass")
+            author = Author.objects.create(
+                user=user, name=f"Author {i}", email=f"author{i}@example.com"
+            )
+            post = Post.objects.create(
+                title=f"Post {i}", content="Post content", author=author
+            )
+            Comment.objects.create(content=f"First on {i}", post=post)
+            Comment.objects.create(content=f"Second on {i}", post=post)
+
+    def count_queries(self, query):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/graphql/", {"query": query}, content_type="application/json"
+            )
+        self.assertResponseNoErrors(response)
+        return len(ctx.captured_queries), response.json()
+
+    # The number of queries must not grow with the number of edges
+    def test_feed_query_count_is_constant(self):
+        self.create_posts(2)
+        small_count, _ = self.count_queries(FEED_QUERY)
+
+        self.create_posts(8, start=2)
+        large_count, data = self.count_queries(FEED_QUERY)
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(data["data"]["allPosts"]["edges"]), 10)
+
+    def test_nested_author_query_count_is_constant(self):
+        self.create_posts(2)
+        small_count, _ = self.count_queries(AUTHORS_QUERY)
+        self.create_posts(6, start=2)
+        large_count, data = self.count_queries(AUTHORS_QUERY)
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(data["data"]["allAuthors"]["edges"]), 8)
+
+    def test_batched_relations_resolve_to_the_right_objects(self):
+        self.create_posts(3)
+        _, data = self.count_queries(FEED_QUERY)
+        for edge in data["data"]["allPosts"]["edges"]:
+            node = edge["node"]
+            index = node["title"].split()[-1]
+            self.assertEqual(node["author"]["name"], f"Author {index}")
+            self.assertEqual(node["author"]["user"]["username"], f"user{index}")
+            comments = [c["node"] for c in node["comments"]["edges"]]
+            self.assertEqual(
+                [c["content"] for c in comments],
+                [f"First on {index}", f"Second on {index}"],
+            )
+            self.assertTrue(all(c["post"]["title"] == node["title"] for c in comments))
+
+    # Filter arguments on a nested connection fall back to a filtered queryset
+    def test_nested_connection_filters_still_apply(self):
+        self.create_posts(2)
+        query = """
+            query {
+              allPosts {
+                edges {
+                  node {
+                    comments(content_Icontains: "second") {
+                      edges {
+                        node {
+                          content
+                        }
+                      }
+                    }
+                  }
+                }
+              }
+            }
+        """
+        _, data = self.count_queries(query)
+        for edge in data["data"]["allPosts"]["edges"]:
+            comments = edge["node"]["comments"]["edges"]
+            self.assertEqual(len(comments), 1)
+            self.assertTrue(comments[0]["node"]["content"].startswith("Second"))
+
+    # A windowed batch reads at most `limit` children of every parent
+    def test_batched_children_are_bounded(self):
+        self.create_posts(2)
+        post = Post.objects.get(title="Post 0")
+        for i in range(5):
+            Comment.objects.create(content=f"Extra {i} on 0", post=post)
+        loaders = Loaders()
+        loaders.comments_by_post.enqueue(Post.objects.values_list("pk", flat=True))
+        with CaptureQueriesContext(connection) as ctx:
+            comments = loaders.comments_by_post.load(post.pk, 3)
+            others = loaders.comments_by_post.load(post.pk + 1, 3)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(
+            [c.content for c in comments], ["First on 0", "Second on 0", "Extra 0 on 0"]
+        )
+        self.assertEqual([c.content for c in others], ["First on 1", "Second on 1"])
+        # Other windows are batched separately
+        self.assertEqual(len(loaders.comments_by_post.load(post.pk)), 7)
+        self.assertEqual(connection_window({"first": 2}), 3)
+        self.assertEqual(connection_window({"first": 2, "offset": 4}), 7)
+        self.assertEqual(
+            connection_window({"first": 2, "after": offset_to_cursor(1)}), 5
+        )
+        self.assertIsNone(connection_window({"last": 2}))
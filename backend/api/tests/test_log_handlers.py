@@ -0,0 +1,82 @@
+import logging
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+from ..log_handlers import QueueHandler
+
+
+class QueueHandlerTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "test.log")
+        self.logger = logging.getLogger("api.tests.log_handlers")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.addCleanup(setattr, self.logger, "propagate", True)
+
+    def add_handler(self, **kwargs):
+        handler = QueueHandler(filename=self.filename, **kwargs)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        self.logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        self.addCleanup(self.logger.removeHandler, handler)
+        return handler
+
+    def read_log(self):
+        with open(self.filename, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def test_records_are_written_by_a_background_thread(self):
+        handler = self.add_handler()
+        file_handler = handler.handlers[0]
+        threads = []
+        emit = file_handler.emit
+
+        def record_thread(record):
+            threads.append(threading.current_thread())
+            emit(record)
+
+        with mock.patch.object(file_handler, "emit", record_thread):
+            self.logger.info("Created post with ID: %s", 1)
+            self.logger.debug("Deleted %s comments", 2)
+            handler.stop()
+
+        self.assertEqual(
+            self.read_log(),
+            ["INFO Created post with ID: 1", "DEBUG Deleted 2 comments"],
+        )
+        self.assertNotIn(threading.current_thread(), threads)
+
+    # A stalled writer never blocks the logging call
+    def test_records_are_dropped_when_the_queue_is_full(self):
+        handler = self.add_handler(queue_size=2)
+        file_handler = handler.handlers[0]
+        release = threading.Event()
+        emit = file_handler.emit
+
+        def stalled_emit(record):
+            release.wait()
+            emit(record)
+
+        with mock.patch.object(file_handler, "emit", stalled_emit):
+            for i in range(10):
+                self.logger.info("Record %s", i)
+            self.assertGreater(handler.dropped, 0)
+            release.set()
+            handler.stop()
+
+        self.assertEqual(len(self.read_log()), 10 - handler.dropped)
+
+    def test_files_are_rotated(self):
+        handler = self.add_handler(max_bytes=200, backup_count=2)
+        for i in range(50):
+            self.logger.info("Record %s", i)
+        handler.stop()
+        self.assertTrue(os.path.exists(self.filename + ".1"))
+        self.assertTrue(os.path.exists(self.filename + ".2"))
+        self.assertFalse(os.path.exists(self.filename + ".3"))
+        self.assertEqual(self.read_log()[-1], "INFO Record 49")
@@ -0,0 +1,176 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from graphql_jwt.shortcuts import get_token
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from .. import metrics
+from ..models import Author, Post
+
+FEED_QUERY = "query Feed { allPosts { edges { node { title } } } }"
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def samples(text):
+    return {
+        (s.name, tuple(sorted(s.labels.items()))): s.value
+        for family in text_string_to_metric_families(text)
+        for s in family.samples
+    }
+
+
+@override_settings(GRAPHQL_RESPONSE_CACHE={"ENABLED": False}, METRICS_AUTH_TOKEN="")
+class MetricsTest(GraphQLTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.author = Author.objects.create(
+            user=self.user, name="John Doe", email="john.doe@example.com"
+        )
+        Post.objects.create(title="Post Title", content="Content", author=self.author)
+
+    def post_graphql(self, query, **extra):
+        return self.client.post(
+            "/graphql/", {"query": query}, content_type="application/json", **extra
+        )
+
+    def test_operations_are_timed_by_name_and_type(self):
+        labels = {"operation_name": "Feed", "operation_type": "query"}
+        before = sample("graphql_operation_duration_seconds_count", **labels)
+        self.assertResponseNoErrors(self.post_graphql(FEED_QUERY))
+        self.assertEqual(
+            sample("graphql_operation_duration_seconds_count", **labels), before + 1
+        )
+        self.assertEqual(sample("graphql_operation_errors_total", **labels), 0)
+
+        labels = {"operation_name": "anonymous", "operation_type": "mutation"}
+        before = sample("graphql_operation_errors_total", **labels)
+        self.assertResponseHasErrors(
+            self.post_graphql(
+                'mutation { createPost(title: "x", content: "y", authorId: "1") '
+                "{ post { title } } }"
+            )
+        )
+        self.assertEqual(sample("graphql_operation_errors_total", **labels), before + 1)
+
+    def test_operation_names_are_bounded(self):
+        with mock.patch.object(metrics, "_operation_names", set()), override_settings(
+            GRAPHQL_METRICS={"MAX_OPERATIONS": 1}
+        ):
+            self.assertEqual(metrics.operation_label("First"), "First")
+            self.assertEqual(metrics.operation_label("Second"), "other")
+            self.assertEqual(metrics.operation_label("First"), "First")
+            self.assertEqual(metrics.operation_label(None), "anonymous")
+
+    def test_sql_queries_are_counted_per_request(self):
+        count = sample("http_request_db_queries_count")
+        total = sample("http_request_db_queries_sum")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertResponseNoErrors(self.post_graphql(FEED_QUERY))
+        self.assertEqual(sample("http_request_db_queries_count"), count + 1)
+        self.assertEqual(sample("http_request_db_queries_sum"), total + len(queries))
+
+    def test_jwt_outcomes_are_counted(self):
+        query = 'mutation { updatePost(id: 1, title: "New") { post { title } } }'
+        success = sample("graphql_jwt_authentications_total", outcome="success")
+        failure = sample("graphql_jwt_authentications_total", outcome="failure")
+        self.post_graphql(query, HTTP_AUTHORIZATION=f"Bearer {get_token(self.user)}")
+        self.post_graphql(query, HTTP_AUTHORIZATION="Bearer not-a-token")
+        self.assertEqual(
+            sample("graphql_jwt_authentications_total", outcome="success"),
+            success + 1,
+        )
+        self.assertEqual(
+            sample("graphql_jwt_authentications_total", outcome="failure"),
+            failure + 1,
+        )
+
+    @override_settings(GRAPHQL_RESPONSE_CACHE={"ENABLED": True})
+    def test_cache_lookups_are_counted(self):
+        query = "query Titles { allPosts { edges { node { title createdAt } } } }"
+
+        def lookups(cache, result):
+            return sample("graphql_cache_lookups_total", cache=cache, result=result)
+
+        before = {
+            (name, result): lookups(name, result)
+            for name in ("response", "document")
+            for result in ("hit", "miss")
+        }
+        self.assertResponseNoErrors(self.post_graphql(query))
+        self.assertResponseNoErrors(self.post_graphql(query))
+        for name in ("response", "document"):
+            self.assertEqual(lookups(name, "miss"), before[(name, "miss")] + 1)
+            self.assertEqual(lookups(name, "hit"), before[(name, "hit")] + 1)
+
+    def test_endpoint_serves_the_text_format(self):
+        self.post_graphql(FEED_QUERY)
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            (
+                "graphql_operation_duration_seconds_count",
+                (("operation_name", "Feed"), ("operation_type", "query")),
+            ),
+            samples(response.content.decode()),
+        )
+
+    @override_settings(METRICS_AUTH_TOKEN="scrape-token")
+    def test_endpoint_requires_the_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get(
+            "/metrics", HTTP_AUTHORIZATION="Bearer wrong-token"
+        )
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(
+            "/metrics", HTTP_AUTHORIZATION="Bearer scrape-token"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    # Every gunicorn worker writes its own files, /metrics adds them up
+    def test_worker_processes_are_aggregated(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory.name}
+        script = (
+            "from api import metrics\n"
+            "metrics.record_authentication('success')\n"
+            "metrics.record_cache_lookup('jwt', True)\n"
+        )
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=os.path.dirname(os.path.dirname(metrics.__file__)),
+                env=env,
+                check=True,
+            )
+
+        with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory.name}):
+            text = self.client.get("/metrics").content.decode()
+        values = samples(text)
+        self.assertEqual(
+            values[("graphql_jwt_authentications_total", (("outcome", "success"),))],
+            2,
+        )
+        self.assertEqual(
+            values[
+                (
+                    "graphql_cache_lookups_total",
+                    (("cache", "jwt"), ("result", "hit")),
+                )
+            ],
+            2,
+        )
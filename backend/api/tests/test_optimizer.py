@@ -0,0 +1,120 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from ..models import Author, Post, Comment
+
+
+class QueryOptimizerTest(GraphQLTestCase):
+    def setUp(self):
+        self.author = Author.objects.create(
+            name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Sample Post", content="Sample content", author=self.author
+        )
+        self.comment = Comment.objects.create(content="Sample Comment", post=self.post)
+
+    def run_query(self, query):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/graphql/", {"query": query}, content_type="application/json"
+            )
+        self.assertResponseNoErrors(response)
+        # Ignore the COUNT(*) issued by the connection
+        queries = [
+            q["sql"] for q in ctx.captured_queries if "COUNT(" not in q["sql"]
+        ]
+        return queries, response.json()["data"]
+
+    # Only the selected columns are fetched
+    def test_unselected_columns_are_deferred(self):
+        queries, data = self.run_query(
+            "query { allPosts { edges { node { id title } } } }"
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"api_post"."title"', queries[0])
+        self.assertNotIn('"api_post"."content"', queries[0])
+        self.assertEqual(data["allPosts"]["edges"][0]["node"]["title"], "Sample Post")
+
+    # Forward relations are joined into the root query
+    def test_foreign_keys_are_selected_related(self):
+        queries, data = self.run_query(
+            "query { allPosts { edges { node { title author { name } } } } }"
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertIn("JOIN", queries[0])
+        self.assertNotIn('"api_author"."bio"', queries[0])
+        self.assertEqual(
+            data["allPosts"]["edges"][0]["node"]["author"]["name"], "John Doe"
+        )
+
+    # Reverse relations are prefetched with their own projection
+    def test_reverse_relations_are_prefetched(self):
+        queries, data = self.run_query(
+            """
+            query {
+              postById(id: %s) {
+                title
+                comments { edges { node { content } } }
+              }
+            }
+            """
+            % self.post.id
+        )
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"api_post"."content"', queries[0])
+        self.assertIn('"api_comment"."content"', queries[1])
+        self.assertEqual(
+            data["postById"]["comments"]["edges"][0]["node"]["content"],
+            "Sample Comment",
+        )
+
+    # Fields selected through named and inline fragments are included
+    def test_fragments_are_followed(self):
+        queries, data = self.run_query(
+            """
+            query {
+              commentsByPost(postId: %s) {
+                edges { node { ...CommentFields } }
+              }
+            }
+            fragment CommentFields on CommentType {
+              ... on CommentType { content }
+              post { title }
+            }
+            """
+            % self.post.id
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"api_comment"."content"', queries[0])
+        self.assertNotIn('"api_post"."content"', queries[0])
+        node = data["commentsByPost"]["edges"][0]["node"]
+        self.assertEqual(node["content"], "Sample Comment")
+        self.assertEqual(node["post"]["title"], "Sample Post")
+
+    # Aliases of the same reverse relation share one prefetch, limited to the
+    # largest requested page
+    def test_aliased_reverse_relations_are_merged(self):
+        for i in range(3):
+            Comment.objects.create(content=f"Comment {i}", post=self.post)
+        queries, data = self.run_query(
+            """
+            query {
+              allPosts {
+                edges { node {
+                  a: comments(first: 1) { edges { node { id content } } }
+                  b: comments { edges { node { id } } }
+                } }
+              }
+            }
+            """
+        )
+        self.assertEqual(len(queries), 2)
+        self.assertIn('"api_comment"."content"', queries[1])
+        self.assertIn("ROW_NUMBER", queries[1])
+        node = data["allPosts"]["edges"][0]["node"]
+        self.assertEqual(
+            [edge["node"]["content"] for edge in node["a"]["edges"]],
+            ["Sample Comment"],
+        )
+        self.assertEqual(len(node["b"]["edges"]), 4)
@@ -0,0 +1,118 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from ..models import Author, Post, Comment
+
+
+PAGE_QUERY = """
+    query Page($first: Int, $after: String, $last: Int, $before: String) {
+      allPostsKeyset(first: $first, after: $after, last: $last, before: $before) {
+        edges {
+          cursor
+          node {
+            title
+          }
+        }
+        pageInfo {
+          hasNextPage
+          hasPreviousPage
+          endCursor
+          startCursor
+        }
+      }
+    }
+"""
+
+
+class KeysetPaginationTest(GraphQLTestCase):
+    def setUp(self):
+        self.author = Author.objects.create(
+            name="John Doe", email="john.doe@example.com"
+        )
+        self.posts = [
+            Post.objects.create(title=f"Post {i}", content="content", author=self.author)
+            for i in range(5)
+        ]
+        Comment.objects.create(content="Sample Comment", post=self.posts[0])
+
+    def run_query(self, query, variables=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/graphql/",
+                {"query": query, "variables": variables or {}},
+                content_type="application/json",
+            )
+        return ctx.captured_queries, response.json()
+
+    def titles(self, data):
+        return [e["node"]["title"] for e in data["data"]["allPostsKeyset"]["edges"]]
+
+    # Pages walk the posts newest first without overlapping
+    def test_forward_pagination(self):
+        _, data = self.run_query(PAGE_QUERY, {"first": 2})
+        self.assertEqual(self.titles(data), ["Post 4", "Post 3"])
+        page_info = data["data"]["allPostsKeyset"]["pageInfo"]
+        self.assertTrue(page_info["hasNextPage"])
+
+        _, data = self.run_query(
+            PAGE_QUERY, {"first": 2, "after": page_info["endCursor"]}
+        )
+        self.assertEqual(self.titles(data), ["Post 2", "Post 1"])
+
+        page_info = data["data"]["allPostsKeyset"]["pageInfo"]
+        _, data = self.run_query(
+            PAGE_QUERY, {"first": 2, "after": page_info["endCursor"]}
+        )
+        self.assertEqual(self.titles(data), ["Post 0"])
+        self.assertFalse(data["data"]["allPostsKeyset"]["pageInfo"]["hasNextPage"])
+
+    def test_backward_pagination(self):
+        _, data = self.run_query(PAGE_QUERY, {"first": 4})
+        end_cursor = data["data"]["allPostsKeyset"]["pageInfo"]["endCursor"]
+
+        _, data = self.run_query(PAGE_QUERY, {"last": 2, "before": end_cursor})
+        self.assertEqual(self.titles(data), ["Post 3", "Post 2"])
+        self.assertTrue(data["data"]["allPostsKeyset"]["pageInfo"]["hasPreviousPage"])
+
+    # A seek query is issued instead of OFFSET, and no COUNT(*) unless asked
+    def test_seek_without_count(self):
+        _, data = self.run_query(PAGE_QUERY, {"first": 1})
+        cursor = data["data"]["allPostsKeyset"]["pageInfo"]["endCursor"]
+
+        queries, data = self.run_query(PAGE_QUERY, {"first": 2, "after": cursor})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("OFFSET", queries[0]["sql"])
+        self.assertNotIn("COUNT(", queries[0]["sql"])
+        self.assertEqual(self.titles(data), ["Post 3", "Post 2"])
+
+    def test_total_count_is_opt_in(self):
+        queries, data = self.run_query(
+            "query { allPostsKeyset(first: 1) { totalCount } }"
+        )
+        self.assertEqual(data["data"]["allPostsKeyset"]["totalCount"], 5)
+        self.assertTrue(any("COUNT(" in q["sql"] for q in queries))
+
+    def test_filters_apply_to_keyset_connection(self):
+        _, data = self.run_query(
+            """
+            query {
+              allCommentsKeyset(content_Icontains: "sample") {
+                edges { node { content } }
+              }
+            }
+            """
+        )
+        edges = data["data"]["allCommentsKeyset"]["edges"]
+        self.assertEqual(len(edges), 1)
+        self.assertEqual(edges[0]["node"]["content"], "Sample Comment")
+
+    def test_keyset_connections_have_no_order_by(self):
+        _, data = self.run_query(
+            'query { allPostsKeyset(orderBy: "comment_count") { edges { cursor } } }'
+        )
+        self.assertIn("Unknown argument 'orderBy'", data["errors"][0]["message"])
+
+    def test_invalid_cursor_is_rejected(self):
+        _, data = self.run_query(PAGE_QUERY, {"first": 1, "after": "bogus"})
+        self.assertIn("errors", data)
+        self.assertEqual(data["errors"][0]["message"], "Invalid cursor")
@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from graphene_django.utils import GraphQLTestCase
+from ..models import Author
+from ..persisted_queries import query_hash
+
+
+QUERY = "query { allAuthors { edges { node { name } } } }"
+
+
+class PersistedQueryTest(GraphQLTestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.manifest = os.path.join(directory.name, "persisted_queries.json")
+        Author.objects.create(name="John Doe", email="john.doe@example.com")
+        self.extensions = {
+            "persistedQuery": {"version": 1, "sha256Hash": query_hash(QUERY)}
+        }
+
+    def post(self, payload):
+        return self.client.post("/graphql/", payload, content_type="application/json")
+
+    def names(self, response):
+        edges = response.json()["data"]["allAuthors"]["edges"]
+        return [edge["node"]["name"] for edge in edges]
+
+    # An unknown hash asks the client to send the query text
+    def test_unknown_hash_is_not_found(self):
+        response = self.post({"extensions": self.extensions})
+        error = response.json()["errors"][0]
+        self.assertEqual(error["message"], "PersistedQueryNotFound")
+        self.assertEqual(error["extensions"]["code"], "PERSISTED_QUERY_NOT_FOUND")
+
+    def test_query_is_registered_then_served_by_hash(self):
+        response = self.post({"query": QUERY, "extensions": self.extensions})
+        self.assertResponseNoErrors(response)
+
+        response = self.post({"extensions": self.extensions})
+        self.assertResponseNoErrors(response)
+        self.assertEqual(self.names(response), ["John Doe"])
+
+    def test_hash_can_be_sent_with_get(self):
+        self.post({"query": QUERY, "extensions": self.extensions})
+        response = self.client.get(
+            "/graphql/",
+            {"extensions": json.dumps(self.extensions)},
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertResponseNoErrors(response)
+        self.assertEqual(self.names(response), ["John Doe"])
+
+    def test_mismatched_hash_is_rejected(self):
+        self.extensions["persistedQuery"]["sha256Hash"] = "0" * 64
+        response = self.post({"query": QUERY, "extensions": self.extensions})
+        self.assertResponseHasErrors(response)
+        self.assertEqual(
+            response.json()["errors"][0]["message"], "provided sha does not match query"
+        )
+
+    def register(self, query):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".graphql", delete=False
+        ) as document:
+            document.write(query)
+        try:
+            call_command("register_persisted_queries", document.name, stdout=StringIO())
+        finally:
+            os.unlink(document.name)
+
+    def test_allowlist_rejects_unregistered_queries(self):
+        settings = {"ALLOWLIST_ONLY": True, "MANIFEST": self.manifest}
+        with override_settings(GRAPHQL_PERSISTED_QUERIES=settings):
+            response = self.post({"query": QUERY})
+            self.assertEqual(
+                response.json()["errors"][0]["extensions"]["code"],
+                "PERSISTED_QUERY_NOT_ALLOWED",
+            )
+
+            response = self.post({"query": QUERY, "extensions": self.extensions})
+            self.assertResponseHasErrors(response)
+
+            self.register(QUERY)
+            response = self.post({"extensions": self.extensions})
+            self.assertResponseNoErrors(response)
+            self.assertEqual(self.names(response), ["John Doe"])
+
+    # The command writes a file every worker reads, the registrations outlive
+    # its process and the cache
+    def test_registered_queries_are_kept_in_the_manifest(self):
+        other = "query { allAuthors { edges { node { email } } } }"
+        settings = {"ALLOWLIST_ONLY": True, "MANIFEST": self.manifest}
+        with override_settings(GRAPHQL_PERSISTED_QUERIES=settings):
+            self.register(QUERY)
+            self.register(other)
+            cache.clear()
+            with open(self.manifest, encoding="utf-8") as f:
+                self.assertEqual(
+                    json.load(f), {query_hash(QUERY): QUERY, query_hash(other): other}
+                )
+            response = self.post({"extensions": self.extensions})
+            self.assertResponseNoErrors(response)
+            self.assertEqual(self.names(response), ["John Doe"])
+
+    @override_settings(GRAPHQL_PERSISTED_QUERIES={"MANIFEST": None})
+    def test_command_requires_a_manifest(self):
+        with self.assertRaisesMessage(CommandError, "MANIFEST"):
+            self.register(QUERY)
@@ -0,0 +1,116 @@
+import os
+import pstats
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from graphene_django.utils import GraphQLTestCase
+from graphql_jwt.shortcuts import get_token
+from .. import profiling
+from ..models import Author, Post
+
+QUERY = "query { allPosts { edges { node { title author { name } } } } }"
+
+
+@override_settings(GRAPHQL_RESPONSE_CACHE={"ENABLED": False})
+class ProfilingTest(GraphQLTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(
+            GRAPHQL_PROFILING={"ENABLED": True, "DIRECTORY": self.directory}
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.staff = User.objects.create_user(
+            username="staff", password="testpass", is_staff=True
+        )
+        self.user = User.objects.create_user(username="user", password="testpass")
+        author = Author.objects.create(name="John Doe", email="john.doe@example.com")
+        Post.objects.create(title="Post Title", content="Content", author=author)
+
+    def post_graphql(self, user=None, path="/graphql/", **headers):
+        if user is not None:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {get_token(user)}"
+        response = self.client.post(
+            path, {"query": QUERY}, content_type="application/json", **headers
+        )
+        self.assertResponseNoErrors(response)
+        return response
+
+    def test_staff_get_a_profile(self):
+        response = self.post_graphql(self.staff, HTTP_X_GRAPHQL_PROFILE="1")
+        [edge] = response.json()["data"]["allPosts"]["edges"]
+        self.assertEqual(edge["node"]["title"], "Post Title")
+        profile_url = response[profiling.PROFILE_URL_HEADER]
+        self.assertIn(response[profiling.PROFILE_ID_HEADER], profile_url)
+
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token(self.staff)}"}
+        report = self.client.get(profile_url, {"format": "text"}, **headers)
+        self.assertEqual(report.status_code, 200)
+        # The call tree goes from the view down to graphql-core and the ORM
+        text = report.content.decode()
+        self.assertIn("dispatch_graphql", text)
+        self.assertIn("graphql/execution", text)
+        self.assertIn("django/db/models", text)
+
+        download = self.client.get(profile_url, **headers)
+        self.assertEqual(download.status_code, 200)
+        self.assertIn("attachment", download["Content-Disposition"])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "graphql.prof")
+        with open(path, "wb") as f:
+            f.write(download.content)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_query_parameter_requests_a_profile(self):
+        response = self.post_graphql(self.staff, path="/graphql/?profile")
+        self.assertIn(profiling.PROFILE_ID_HEADER, response)
+
+    def test_other_users_are_not_profiled(self):
+        for user in (None, self.user):
+            response = self.post_graphql(user, HTTP_X_GRAPHQL_PROFILE="1")
+            self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+
+    def test_profiles_are_staff_only(self):
+        response = self.post_graphql(self.staff, HTTP_X_GRAPHQL_PROFILE="1")
+        profile_url = response[profiling.PROFILE_URL_HEADER]
+        self.assertEqual(self.client.get(profile_url).status_code, 403)
+        response = self.client.get(
+            profile_url, HTTP_AUTHORIZATION=f"Bearer {get_token(self.user)}"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    # Profiles are files, every worker process serves them until they expire
+    def test_profiles_are_written_to_the_directory(self):
+        response = self.post_graphql(self.staff, HTTP_X_GRAPHQL_PROFILE="1")
+        profile_id = response[profiling.PROFILE_ID_HEADER]
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            [f"{profile_id}.prof", f"{profile_id}.txt"],
+        )
+        self.assertIsNotNone(profiling.load(profile_id))
+        self.assertIsNone(profiling.load("../" + profile_id))
+
+        expired = time.time() - 3601
+        for name in os.listdir(self.directory):
+            os.utime(os.path.join(self.directory, name), (expired, expired))
+        self.assertIsNone(profiling.load(profile_id))
+        response = self.post_graphql(self.staff, HTTP_X_GRAPHQL_PROFILE="1")
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertNotIn(profile_id + ".prof", os.listdir(self.directory))
+
+    # Nothing is profiled or authenticated when profiles aren't requested or
+    # the feature is off
+    def test_disabled(self):
+        with mock.patch.object(profiling, "get_staff_user") as get_staff_user:
+            response = self.post_graphql(self.staff)
+            self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+            with override_settings(GRAPHQL_PROFILING={"ENABLED": False}):
+                response = self.post_graphql(self.staff, HTTP_X_GRAPHQL_PROFILE="1")
+                self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+        get_staff_user.assert_not_called()
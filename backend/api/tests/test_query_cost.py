@@ -0,0 +1,86 @@
+from django.test import override_settings
+from graphene_django.utils import GraphQLTestCase
+from ..models import Author, Post
+
+
+class QueryCostTest(GraphQLTestCase):
+    def setUp(self):
+        author = Author.objects.create(name="John Doe", email="john.doe@example.com")
+        Post.objects.create(title="Post Title", content="Post content", author=author)
+
+    def post_graphql(self, query, variables=None):
+        return self.client.post(
+            "/graphql/",
+            {"query": query, "variables": variables or {}},
+            content_type="application/json",
+        )
+
+    # Every response reports what the query cost
+    def test_cost_is_reported_in_extensions(self):
+        response = self.post_graphql(
+            "query { allPosts { edges { node { title author { name } } } } }"
+        )
+        self.assertResponseNoErrors(response)
+        cost = response.json()["extensions"]["cost"]
+        self.assertEqual(cost["requestedQueryCost"], 1 + 100)
+        self.assertEqual(cost["depth"], 3)
+
+    # `first` bounds the multiplier of a connection, including from variables
+    def test_first_lowers_the_cost(self):
+        query = """
+            query Posts($first: Int) {
+              allPosts(first: $first) {
+                edges { node { comments(first: 5) { edges { node { content } } } } }
+              }
+            }
+        """
+        response = self.post_graphql(query, {"first": 10})
+        self.assertResponseNoErrors(response)
+        cost = response.json()["extensions"]["cost"]
+        self.assertEqual(cost["requestedQueryCost"], 1 + 10 * 1)
+
+    def test_fragments_are_counted(self):
+        query = """
+            query { allPosts(first: 2) { edges { node { ...PostFields } } } }
+            fragment PostFields on PostType { author { name } }
+        """
+        response = self.post_graphql(query)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()["extensions"]["cost"]["requestedQueryCost"], 3)
+
+    @override_settings(GRAPHQL_QUERY_COST={"MAX_DEPTH": 3})
+    def test_deep_queries_are_rejected(self):
+        query = """
+            query {
+              allPosts { edges { node { author { posts { edges { node { title } } } } } } }
+            }
+        """
+        response = self.post_graphql(query)
+        self.assertEqual(response.status_code, 400)
+        error = response.json()["errors"][0]
+        self.assertEqual(error["extensions"]["code"], "QUERY_TOO_DEEP")
+        self.assertEqual(error["extensions"]["cost"]["depth"], 4)
+        self.assertNotIn("data", response.json())
+
+    @override_settings(GRAPHQL_QUERY_COST={"MAX_COST": 50})
+    def test_expensive_queries_are_rejected(self):
+        response = self.post_graphql(
+            "query { allPosts { edges { node { author { name } } } } }"
+        )
+        self.assertEqual(response.status_code, 400)
+        error = response.json()["errors"][0]
+        self.assertEqual(error["extensions"]["code"], "QUERY_TOO_COMPLEX")
+        self.assertEqual(error["extensions"]["cost"]["maximumAvailable"], 50)
+
+        response = self.post_graphql(
+            "query { allPosts(first: 10) { edges { node { author { name } } } } }"
+        )
+        self.assertResponseNoErrors(response)
+
+    @override_settings(GRAPHQL_QUERY_COST={"FIELD_COSTS": {"Query.searchPosts": 10}})
+    def test_field_costs_override_the_default(self):
+        response = self.post_graphql(
+            'query { searchPosts(query: "post", first: 1) { edges { node { title } } } }'
+        )
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()["extensions"]["cost"]["requestedQueryCost"], 10)
@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import AsyncRequestFactory, TransactionTestCase, override_settings
+from django.views.decorators.csrf import csrf_exempt
+from graphql_jwt.shortcuts import get_token
+from ..models import Author, Post
+from ..routers import PIN_COOKIE, REPLICA_DB_ALIAS
+from ..views import AsyncBlogGraphQLView
+
+POST_QUERY = "query Post($id: Int!) { postById(id: $id) { title } }"
+
+UPDATE_MUTATION = """
+    mutation Update($id: Int!, $title: String!) {
+      updatePost(id: $id, title: $title) { post { title } }
+    }
+"""
+
+
+# Two SQLite databases stand in for the primary ("default") and its replica.
+# Replication is left out: the replica holds its own copy of the post, with a
+# different title, to tell which database answered.
+@override_settings(GRAPHQL_RESPONSE_CACHE={"ENABLED": False})
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {"default", REPLICA_DB_ALIAS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.settings[REPLICA_DB_ALIAS] = {
+            **connections.settings["default"],
+            "NAME": os.path.join(cls.directory.name, "replica.sqlite3"),
+        }
+        call_command("migrate", database=REPLICA_DB_ALIAS, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA_DB_ALIAS].close()
+        del connections[REPLICA_DB_ALIAS]
+        del connections.settings[REPLICA_DB_ALIAS]
+        cls.directory.cleanup()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.token = get_token(self.user)
+        author = Author.objects.create(
+            user=self.user, name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Primary Title", content="Post content", author=author
+        )
+        replica_author = Author.objects.using(REPLICA_DB_ALIAS).create(
+            pk=author.pk, name="John Doe", email="john.doe@example.com"
+        )
+        Post.objects.using(REPLICA_DB_ALIAS).create(
+            pk=self.post.pk,
+            title="Replica Title",
+            content="Post content",
+            author=replica_author,
+        )
+
+    def post_graphql(self, client, data, **extra):
+        return client.post(
+            "/graphql/", json.dumps(data), content_type="application/json", **extra
+        )
+
+    def query_title(self, client):
+        response = self.post_graphql(
+            client, {"query": POST_QUERY, "variables": {"id": self.post.pk}}
+        )
+        return response.json()["data"]["postById"]["title"]
+
+    def update_title(self, client, title):
+        return self.post_graphql(
+            client,
+            {
+                "query": UPDATE_MUTATION,
+                "variables": {"id": self.post.pk, "title": title},
+            },
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+    def test_queries_read_from_the_replica(self):
+        self.assertEqual(self.query_title(self.client), "Replica Title")
+
+    def test_mutations_write_to_the_primary(self):
+        response = self.update_title(self.client, "Updated")
+        self.assertEqual(
+            response.json()["data"]["updatePost"]["post"]["title"], "Updated"
+        )
+        self.assertEqual(Post.objects.get(pk=self.post.pk).title, "Updated")
+        self.assertEqual(
+            Post.objects.using(REPLICA_DB_ALIAS).get(pk=self.post.pk).title,
+            "Replica Title",
+        )
+
+    # The client that wrote reads its writes, the others keep reading from
+    # the replica
+    def test_client_reads_from_the_primary_after_a_mutation(self):
+        response = self.update_title(self.client, "Updated")
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(self.query_title(self.client), "Updated")
+        self.assertEqual(self.query_title(self.client_class()), "Replica Title")
+
+    # The token is verified against the primary even when the first operation
+    # of the batch reads from the replica
+    def test_batch_reads_from_the_primary_after_a_mutation(self):
+        response = self.post_graphql(
+            self.client,
+            [
+                {"query": POST_QUERY, "variables": {"id": self.post.pk}},
+                {
+                    "query": UPDATE_MUTATION,
+                    "variables": {"id": self.post.pk, "title": "Updated"},
+                },
+                {"query": POST_QUERY, "variables": {"id": self.post.pk}},
+            ],
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        results = response.json()
+        self.assertEqual(results[0]["data"]["postById"]["title"], "Replica Title")
+        self.assertEqual(
+            results[1]["data"]["updatePost"]["post"]["title"], "Updated"
+        )
+        self.assertEqual(results[2]["data"]["postById"]["title"], "Updated")
+
+    # Fields resolved in worker threads read from the replica too
+    def test_async_view_reads_from_the_replica(self):
+        request = AsyncRequestFactory().post(
+            "/graphql/",
+            json.dumps({"query": POST_QUERY, "variables": {"id": self.post.pk}}),
+            content_type="application/json",
+        )
+        request.user = AnonymousUser()
+        response = async_to_sync(csrf_exempt(AsyncBlogGraphQLView.as_view()))(request)
+        self.assertEqual(
+            json.loads(response.content)["data"]["postById"]["title"],
+            "Replica Title",
+        )
@@ -0,0 +1,145 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from graphql_jwt.shortcuts import get_token
+from ..checks import check_shared_caches
+from ..models import Author, Comment, Post
+
+
+POST_QUERY = """
+    query Post($id: Int!) {
+      postById(id: $id) {
+        title
+        commentCount
+        author { name }
+      }
+    }
+"""
+
+
+class ResponseCacheTest(GraphQLTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.author = Author.objects.create(
+            user=self.user, name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Post Title", content="Post content", author=self.author
+        )
+
+    def post_graphql(self, query, variables=None, **extra):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/graphql/",
+                {"query": query, "variables": variables or {}},
+                content_type="application/json",
+                **extra,
+            )
+        self.assertResponseNoErrors(response)
+        return response.json()["data"], len(ctx.captured_queries)
+
+    def get_post(self, post=None):
+        return self.post_graphql(POST_QUERY, {"id": (post or self.post).pk})
+
+    def test_repeat_reads_skip_the_database(self):
+        data, queries = self.get_post()
+        self.assertGreater(queries, 0)
+
+        cached, queries = self.get_post()
+        self.assertEqual(cached, data)
+        self.assertEqual(queries, 0)
+
+    # Formatting does not matter, variables and operation names do
+    def test_key_uses_the_normalized_query_and_variables(self):
+        self.get_post()
+        _, queries = self.post_graphql(
+            " ".join(POST_QUERY.split()) + "  # comment", {"id": self.post.pk}
+        )
+        self.assertEqual(queries, 0)
+
+        other = Post.objects.create(title="Other", content="x", author=self.author)
+        data, queries = self.get_post(other)
+        self.assertGreater(queries, 0)
+        self.assertEqual(data["postById"]["title"], "Other")
+
+    def test_saving_a_post_evicts_its_responses(self):
+        self.get_post()
+        self.post.title = "New Title"
+        self.post.save()
+        data, queries = self.get_post()
+        self.assertGreater(queries, 0)
+        self.assertEqual(data["postById"]["title"], "New Title")
+
+    def test_comments_evict_post_responses(self):
+        self.get_post()
+        comment = Comment.objects.create(post=self.post, content="Hi")
+        data, _ = self.get_post()
+        self.assertEqual(data["postById"]["commentCount"], 1)
+
+        comment.delete()
+        data, _ = self.get_post()
+        self.assertEqual(data["postById"]["commentCount"], 0)
+
+    def test_author_changes_evict_responses(self):
+        self.get_post()
+        self.author.name = "Jane Doe"
+        self.author.save()
+        data, _ = self.get_post()
+        self.assertEqual(data["postById"]["author"]["name"], "Jane Doe")
+
+    # The filter reads the author, the selection does not
+    def test_filters_across_relations_depend_on_the_related_model(self):
+        query = """
+            query { allPosts(authorNameExact: "John Doe") { edges { node { title } } } }
+        """
+        data, _ = self.post_graphql(query)
+        self.assertEqual(len(data["allPosts"]["edges"]), 1)
+        self.author.name = "Jane Doe"
+        self.author.save()
+        data, _ = self.post_graphql(query)
+        self.assertEqual(data["allPosts"]["edges"], [])
+
+    # Other models do not evict responses that do not read them
+    def test_unrelated_changes_keep_responses(self):
+        query = "query { allAuthors { edges { node { name } } } }"
+        self.post_graphql(query)
+        Post.objects.create(title="Other", content="x", author=self.author)
+        _, queries = self.post_graphql(query)
+        self.assertEqual(queries, 0)
+
+    def test_authenticated_requests_are_not_cached(self):
+        token = get_token(self.user)
+        self.get_post()
+        _, queries = self.post_graphql(
+            POST_QUERY, {"id": self.post.pk}, HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertGreater(queries, 0)
+
+    @override_settings(GRAPHQL_RESPONSE_CACHE={"ENABLED": False})
+    def test_cache_can_be_disabled(self):
+        self.get_post()
+        _, queries = self.get_post()
+        self.assertGreater(queries, 0)
+
+    # The invalidations only reach the workers sharing the cache
+    def test_process_local_cache_is_reported(self):
+        locmem = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        shared = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": "/tmp/blog-cache",
+        }
+        with override_settings(
+            CACHES={"default": locmem},
+            GRAPHQL_PERSISTED_QUERIES={"ENABLED": False},
+        ):
+            [warning] = check_shared_caches(None)
+            self.assertEqual(warning.id, "api.W001")
+            self.assertIn("GRAPHQL_RESPONSE_CACHE", warning.msg)
+            with override_settings(GRAPHQL_RESPONSE_CACHE={"ENABLED": False}):
+                self.assertEqual(check_shared_caches(None), [])
+        with override_settings(CACHES={"default": shared}):
+            self.assertEqual(check_shared_caches(None), [])
@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from graphene_django.utils import GraphQLTestCase
+from ..models import Author, Post
+from ..search import FTS_TABLE
+
+
+SEARCH_QUERY = """
+    query Search($query: String!) {
+      searchPosts(query: $query) {
+        edges {
+          node {
+            title
+          }
+        }
+      }
+    }
+"""
+
+
+class PostSearchTest(GraphQLTestCase):
+    def setUp(self):
+        self.author = Author.objects.create(
+            name="John Doe", email="john.doe@example.com"
+        )
+        self.django_post = Post.objects.create(
+            title="Django tips",
+            content="Working with querysets and migrations.",
+            author=self.author,
+        )
+        self.graphql_post = Post.objects.create(
+            title="GraphQL basics",
+            content="Resolvers, schemas and a little Django.",
+            author=self.author,
+        )
+        Post.objects.create(
+            title="Gardening", content="Tomatoes need sun.", author=self.author
+        )
+
+    def search(self, text):
+        response = self.client.post(
+            "/graphql/",
+            {"query": SEARCH_QUERY, "variables": {"query": text}},
+            content_type="application/json",
+        )
+        self.assertResponseNoErrors(response)
+        edges = response.json()["data"]["searchPosts"]["edges"]
+        return [edge["node"]["title"] for edge in edges]
+
+    # Title matches rank above content matches
+    def test_results_are_ranked(self):
+        self.assertEqual(self.search("django"), ["Django tips", "GraphQL basics"])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search("django resolvers"), ["GraphQL basics"])
+
+    def test_last_term_matches_as_prefix(self):
+        self.assertEqual(self.search("tomat"), ["Gardening"])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(
+            self.search('"django" -(*'), ["Django tips", "GraphQL basics"]
+        )
+        self.assertEqual(self.search("***"), [])
+
+    def test_index_follows_save_and_delete(self):
+        self.graphql_post.title = "Tomato salad"
+        self.graphql_post.content = "Fresh from the garden."
+        self.graphql_post.save()
+        self.assertEqual(self.search("django"), ["Django tips"])
+        self.assertEqual(self.search("salad"), ["Tomato salad"])
+
+        self.django_post.delete()
+        self.assertEqual(self.search("django"), [])
+
+    def test_search_filter_on_all_posts(self):
+        query = """
+            query {
+              allPosts(search: "migrations") {
+                edges { node { title } }
+              }
+            }
+        """
+        response = self.client.post(
+            "/graphql/", {"query": query}, content_type="application/json"
+        )
+        self.assertResponseNoErrors(response)
+        edges = response.json()["data"]["allPosts"]["edges"]
+        self.assertEqual([e["node"]["title"] for e in edges], ["Django tips"])
+
+    def test_rebuild_command_restores_the_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        self.assertEqual(self.search("django"), [])
+
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indexed 3 posts", out.getvalue())
+        self.assertEqual(self.search("django"), ["Django tips", "GraphQL basics"])
@@ -1,4 +1,8 @@
-from django.test import TestCase
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from ..models import Author, Post, Comment
 from django.db.models.signals import post_save
@@ -53,3 +57,42 @@ class CommentSignalTestCase(TestCase):
         
         # Check if the updated_at field has been updated
         self.assertGreater(self.post.updated_at, initial_updated_at)
+
+    def test_comment_save_issues_a_single_post_update(self):
+        comment = Comment.objects.create(content="First", post=self.post)
+        comment.content = "Edited"
+        with CaptureQueriesContext(connection) as ctx:
+            comment.save()
+        post_queries = [
+            q["sql"] for q in ctx.captured_queries if "api_post" in q["sql"]
+        ]
+        # No SELECT of the post and no rewrite of its title/content
+        self.assertEqual(len(post_queries), 1)
+        self.assertTrue(post_queries[0].startswith("UPDATE"))
+        self.assertNotIn('"title"', post_queries[0])
+        self.assertNotIn('"content"', post_queries[0])
+
+    @override_settings(POST_TOUCH_COALESCE_SECONDS=60)
+    def test_comment_bursts_are_coalesced(self):
+        comment = Comment.objects.create(content="First", post=self.post)
+        self.post.refresh_from_db()
+        bumped_at = self.post.updated_at
+
+        # Within the window the post is neither rewritten nor bumped
+        comment.content = "Edited"
+        comment.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated_at, bumped_at)
+
+        Comment.objects.create(content="Second", post=self.post)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated_at, bumped_at)
+        self.assertEqual(self.post.comment_count, 2)
+
+        # Once the window has passed the post is bumped again
+        Post.objects.filter(pk=self.post.pk).update(
+            updated_at=bumped_at - timedelta(minutes=5)
+        )
+        comment.save()
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated_at, bumped_at)
@@ -0,0 +1,120 @@
+import json
+import logging
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from .. import slow_log, tracing
+from ..models import Author, Comment, Post
+
+FEED_QUERY = """
+    query Feed {
+      allPosts {
+        edges { node { title author { name } comments { edges { node { content } } } } }
+      }
+    }
+"""
+
+
+@override_settings(
+    GRAPHQL_SLOW_LOG={"MAX_QUERIES": 1},
+    GRAPHQL_TRACING={"SAMPLE_RATE": 0},
+    GRAPHQL_RESPONSE_CACHE={"ENABLED": False},
+)
+class SlowLogTest(GraphQLTestCase):
+    def setUp(self):
+        cache.clear()
+        tracing.stats.reset()
+        # The entries go nowhere instead of logs/slow_operations.log
+        handlers = mock.patch.object(
+            slow_log.logger, "handlers", [logging.NullHandler()]
+        )
+        handlers.start()
+        self.addCleanup(handlers.stop)
+        author = Author.objects.create(name="John Doe", email="john.doe@example.com")
+        self.posts = [
+            Post.objects.create(title=f"Post {i}", content="Content", author=author)
+            for i in range(2)
+        ]
+        for post in self.posts:
+            Comment.objects.create(post=post, content="Comment")
+
+    def post_graphql(self, query, variables=None):
+        response = self.client.post(
+            "/graphql/",
+            {"query": query, "variables": variables or {}},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    # The logged entries, decoded
+    def logged(self, query, variables=None):
+        with self.assertLogs("api.slow_log", "WARNING") as logs:
+            self.post_graphql(query, variables)
+        return [
+            json.loads(record.getMessage().split(": ", 1)[1])
+            for record in logs.records
+        ]
+
+    def test_operations_over_the_query_limit_are_logged(self):
+        with CaptureQueriesContext(connection) as queries:
+            [entry] = self.logged(FEED_QUERY)
+        self.assertEqual(entry["operationName"], "Feed")
+        self.assertTrue(entry["query"].startswith("query Feed {\n  allPosts {"))
+        # The EXPLAIN statements are not counted
+        self.assertLess(entry["dbQueries"], len(queries))
+        self.assertGreater(entry["dbQueries"], 1)
+        paths = [field["path"] for field in entry["fields"]]
+        self.assertIn("allPosts", paths)
+        self.assertIn("allPosts.edges.node.title", paths)
+        slowest = entry["slowestStatements"]
+        self.assertTrue(slowest)
+        self.assertTrue(all(statement["plan"] for statement in slowest))
+        # Traced for the slow log only
+        body = self.post_graphql(FEED_QUERY)
+        self.assertNotIn("tracing", body.get("extensions", {}))
+        self.assertEqual(tracing.stats.snapshot(), {})
+
+    @override_settings(GRAPHQL_SLOW_LOG={"MAX_QUERIES": 100, "THRESHOLD_MS": 60000})
+    def test_fast_operations_are_not_logged(self):
+        with self.assertNoLogs("api.slow_log"):
+            self.post_graphql(FEED_QUERY)
+
+    @override_settings(GRAPHQL_SLOW_LOG={"THRESHOLD_MS": 5})
+    def test_threshold(self):
+        trace = tracing.Trace("Feed", sampled=False)
+        trace.duration = 4_999_999
+        self.assertFalse(slow_log.is_slow(trace))
+        trace.duration = 5_000_000
+        self.assertTrue(slow_log.is_slow(trace))
+
+    # One query per alias is reported as a repeated statement
+    def test_repeated_statements_are_reported(self):
+        [entry] = self.logged(
+            "query { a: postById(id: %s) { title } b: postById(id: %s) { title } }"
+            % (self.posts[0].pk, self.posts[1].pk)
+        )
+        self.assertEqual(entry["operationName"], "anonymous")
+        [repeated] = entry["repeatedStatements"]
+        self.assertEqual(repeated["count"], 2)
+        self.assertIn('"api_post"', repeated["sql"])
+
+    # The credentials are wrong, failed operations are logged too
+    def test_secrets_are_redacted(self):
+        query = """
+            mutation Login($password: String!) {
+              first: tokenAuth(username: "one", password: $password) { token }
+              second: tokenAuth(username: "two", password: "inline-secret") { token }
+            }
+        """
+        [entry] = self.logged(query, {"password": "variable-secret"})
+        self.assertEqual(entry["variables"], {"password": slow_log.REDACTED})
+        self.assertIn("password: $password", entry["query"])
+        self.assertIn(f'password: "{slow_log.REDACTED}"', entry["query"])
+        logged = json.dumps(entry)
+        self.assertNotIn("variable-secret", logged)
+        self.assertNotIn("inline-secret", logged)
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase
+
+
+class SQLiteTuningTest(SimpleTestCase):
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        # The test database lives in memory, where WAL does not apply
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = os.path.join(directory.name, "tuning.sqlite3")
+        self.addCleanup(self.disconnect)
+
+    # A connection to the file database with the settings of "default",
+    # registered as "tuning" in the current thread
+    def connect(self):
+        settings_dict = {**connection.settings_dict, "NAME": self.name}
+        wrapper = DatabaseWrapper(settings_dict, alias="tuning")
+        connections["tuning"] = wrapper
+        return wrapper
+
+    def disconnect(self):
+        wrapper = getattr(connections._connections, "tuning", None)
+        if wrapper is not None:
+            wrapper.close()
+            del connections["tuning"]
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied(self):
+        wrapper = self.connect()
+        pragmas = settings.SQLITE_PRAGMAS
+        self.assertEqual(self.pragma(wrapper, "journal_mode"), "wal")
+        # NORMAL
+        self.assertEqual(self.pragma(wrapper, "synchronous"), 1)
+        self.assertEqual(
+            self.pragma(wrapper, "busy_timeout"), pragmas["busy_timeout"]
+        )
+        self.assertEqual(self.pragma(wrapper, "mmap_size"), pragmas["mmap_size"])
+        self.assertEqual(self.pragma(wrapper, "cache_size"), pragmas["cache_size"])
+        self.assertEqual(wrapper.transaction_mode, "IMMEDIATE")
+
+    # Writers reading then writing in a transaction, the pattern of the post
+    # counters, while readers keep querying
+    def test_concurrent_readers_and_writers(self):
+        wrapper = self.connect()
+        with wrapper.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER)"
+            )
+            cursor.execute("INSERT INTO counter VALUES (1, 0)")
+
+        writers, readers, iterations = 4, 4, 50
+        errors = []
+        start = threading.Barrier(writers + readers)
+
+        def write():
+            wrapper = self.connect()
+            start.wait()
+            for _ in range(iterations):
+                try:
+                    with transaction.atomic(using="tuning"), wrapper.cursor() as cursor:
+                        cursor.execute("SELECT value FROM counter WHERE id = 1")
+                        value = cursor.fetchone()[0]
+                        cursor.execute(
+                            "UPDATE counter SET value = %s WHERE id = 1", [value + 1]
+                        )
+                except OperationalError as e:
+                    errors.append(e)
+            wrapper.close()
+
+        def read():
+            wrapper = self.connect()
+            start.wait()
+            for _ in range(iterations):
+                try:
+                    with wrapper.cursor() as cursor:
+                        cursor.execute("SELECT value FROM counter WHERE id = 1")
+                        cursor.fetchone()
+                except OperationalError as e:
+                    errors.append(e)
+            wrapper.close()
+
+        threads = [threading.Thread(target=write) for _ in range(writers)] + [
+            threading.Thread(target=read) for _ in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT value FROM counter WHERE id = 1")
+            self.assertEqual(cursor.fetchone()[0], writers * iterations)
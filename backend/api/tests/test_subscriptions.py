@@ -0,0 +1,230 @@
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from graphene_django.utils import GraphQLTestCase
+from graphql_jwt.shortcuts import get_token
+from ..models import Author, Comment, Post
+from ..pubsub import InProcessBroker, comment_created_channel, get_broker
+from ..websocket import GraphQLWebSocketApp
+
+
+COMMENT_SUBSCRIPTION = """
+    subscription Comments($postId: Int!) {
+      commentCreated(postId: $postId) { content post { title } }
+    }
+"""
+
+
+# Minimal WebSocket client driving the ASGI application
+class WebSocket:
+    def __init__(self, subprotocols=("graphql-transport-ws",)):
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        scope = {
+            "type": "websocket",
+            "path": "/graphql/",
+            "subprotocols": subprotocols,
+        }
+        app = GraphQLWebSocketApp(path="/graphql/")
+        self.task = asyncio.create_task(app(scope, self.inbox.get, self.outbox.put))
+
+    async def connect(self, payload=None):
+        await self.inbox.put({"type": "websocket.connect"})
+        accepted = await self.receive_event()
+        if accepted["type"] == "websocket.accept":
+            await self.send({"type": "connection_init", "payload": payload or {}})
+        return accepted
+
+    async def send(self, message):
+        await self.inbox.put({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def receive_event(self):
+        return await asyncio.wait_for(self.outbox.get(), timeout=5)
+
+    async def receive(self):
+        event = await self.receive_event()
+        if event["type"] == "websocket.close":
+            return {"type": "close", "code": event["code"]}
+        return json.loads(event["text"])
+
+    async def close(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+async def wait_for_subscribers(channel):
+    broker = get_broker()
+    for _ in range(100):
+        if broker.subscriber_count(channel):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Nobody subscribed to {channel}")
+
+
+# Events are published on commit, and resolved in worker threads with their
+# own connections, so the data must be committed
+class SubscriptionTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.author = Author.objects.create(
+            user=self.user, name="John Doe", email="john.doe@example.com"
+        )
+        self.post = Post.objects.create(
+            title="Post Title", content="Post content", author=self.author
+        )
+
+    def test_comment_created_is_pushed(self):
+        async def run():
+            ws = WebSocket()
+            await ws.connect()
+            self.assertEqual((await ws.receive())["type"], "connection_ack")
+
+            await ws.send(
+                {
+                    "id": "1",
+                    "type": "subscribe",
+                    "payload": {
+                        "query": COMMENT_SUBSCRIPTION,
+                        "variables": {"postId": self.post.pk},
+                    },
+                }
+            )
+            await wait_for_subscribers(comment_created_channel(self.post.pk))
+
+            other = await sync_to_async(Post.objects.create)(
+                title="Other", content="x", author=self.author
+            )
+            await sync_to_async(Comment.objects.create)(post=other, content="Elsewhere")
+            await sync_to_async(Comment.objects.create)(post=self.post, content="Hi")
+
+            message = await ws.receive()
+            self.assertEqual(message["type"], "next")
+            self.assertEqual(message["id"], "1")
+            self.assertEqual(
+                message["payload"]["data"]["commentCreated"],
+                {"content": "Hi", "post": {"title": "Post Title"}},
+            )
+
+            await ws.send({"id": "1", "type": "complete"})
+            await ws.send({"type": "ping"})
+            self.assertEqual((await ws.receive())["type"], "pong")
+            self.assertEqual(
+                get_broker().subscriber_count(comment_created_channel(self.post.pk)),
+                0,
+            )
+            await ws.close()
+
+        async_to_sync(run)()
+
+    def test_post_updated_with_the_legacy_protocol(self):
+        async def run():
+            ws = WebSocket(subprotocols=["graphql-ws"])
+            accepted = await ws.connect()
+            self.assertEqual(accepted["subprotocol"], "graphql-ws")
+            self.assertEqual((await ws.receive())["type"], "connection_ack")
+
+            query = "subscription ($id: Int!) { postUpdated(id: $id) { title } }"
+            await ws.send(
+                {
+                    "id": "a",
+                    "type": "start",
+                    "payload": {"query": query, "variables": {"id": self.post.pk}},
+                }
+            )
+            await wait_for_subscribers(f"post-updated:{self.post.pk}")
+
+            self.post.title = "New Title"
+            await sync_to_async(self.post.save)()
+            message = await ws.receive()
+            self.assertEqual(message["type"], "data")
+            self.assertEqual(
+                message["payload"]["data"]["postUpdated"], {"title": "New Title"}
+            )
+            await ws.close()
+
+        async_to_sync(run)()
+
+    def test_authentication_and_protocol_errors(self):
+        async def run():
+            ws = WebSocket(subprotocols=[])
+            self.assertEqual((await ws.connect())["code"], 4406)
+
+            ws = WebSocket()
+            await ws.connect({"Authorization": "Bearer not-a-token"})
+            self.assertEqual((await ws.receive())["code"], 4403)
+
+            ws = WebSocket()
+            await ws.inbox.put({"type": "websocket.connect"})
+            await ws.receive_event()
+            await ws.send({"id": "1", "type": "subscribe", "payload": {}})
+            self.assertEqual((await ws.receive())["code"], 4401)
+
+            token = await sync_to_async(get_token)(self.user)
+            ws = WebSocket()
+            await ws.connect({"Authorization": f"Bearer {token}"})
+            self.assertEqual((await ws.receive())["type"], "connection_ack")
+            await ws.send(
+                {"id": "1", "type": "subscribe", "payload": {"query": "subscription {"}}
+            )
+            message = await ws.receive()
+            self.assertEqual(message["type"], "error")
+            self.assertIn("Syntax Error", message["payload"][0]["message"])
+            await ws.close()
+
+        async_to_sync(run)()
+
+    # Queries work over the socket too, and complete after one result
+    def test_queries_over_the_socket(self):
+        async def run():
+            ws = WebSocket()
+            await ws.connect()
+            await ws.receive()
+            await ws.send(
+                {
+                    "id": "q",
+                    "type": "subscribe",
+                    "payload": {"query": "{ allPosts { edges { node { title } } } }"},
+                }
+            )
+            message = await ws.receive()
+            self.assertEqual(
+                message["payload"]["data"]["allPosts"]["edges"],
+                [{"node": {"title": "Post Title"}}],
+            )
+            self.assertEqual(await ws.receive(), {"type": "complete", "id": "q"})
+            await ws.close()
+
+        async_to_sync(run)()
+
+
+class InProcessBrokerTest(TransactionTestCase):
+    def test_publish_from_another_thread(self):
+        broker = InProcessBroker()
+
+        async def run():
+            events = broker.subscribe("channel")
+            first = asyncio.ensure_future(events.__anext__())
+            while not broker.subscriber_count("channel"):
+                await asyncio.sleep(0)
+            await sync_to_async(broker.publish, thread_sensitive=False)("channel", 1)
+            self.assertEqual(await asyncio.wait_for(first, timeout=5), 1)
+            await events.aclose()
+            self.assertEqual(broker.subscriber_count("channel"), 0)
+
+        async_to_sync(run)()
+
+
+class SubscriptionOverHttpTest(GraphQLTestCase):
+    def test_subscriptions_are_rejected_over_http(self):
+        response = self.client.post(
+            "/graphql/",
+            {"query": "subscription { postUpdated(id: 1) { title } }"},
+            content_type="application/json",
+        )
+        self.assertResponseHasErrors(response)
+        self.assertIn("WebSockets", response.json()["errors"][0]["message"])
@@ -0,0 +1,127 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils import GraphQLTestCase
+from .. import tracing
+from ..models import Author, Comment, Post
+
+FEED_QUERY = """
+    query Feed {
+      allPosts {
+        edges {
+          node { title author { name } comments { edges { node { content } } } }
+        }
+      }
+    }
+"""
+
+
+@override_settings(
+    GRAPHQL_TRACING={"SAMPLE_RATE": 1, "EXTENSIONS": True},
+    GRAPHQL_RESPONSE_CACHE={"ENABLED": False},
+)
+class TracingTest(GraphQLTestCase):
+    def setUp(self):
+        cache.clear()
+        tracing.stats.reset()
+        author = Author.objects.create(name="John Doe", email="john.doe@example.com")
+        for i in range(2):
+            post = Post.objects.create(
+                title=f"Post {i}", content="Post content", author=author
+            )
+            Comment.objects.create(post=post, content=f"Comment {i}")
+
+    def post_graphql(self, data):
+        response = self.client.post(
+            "/graphql/", json.dumps(data), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def resolvers(self, body):
+        return {
+            tuple(resolver["path"]): resolver
+            for resolver in body["extensions"]["tracing"]["execution"]["resolvers"]
+        }
+
+    def test_trace_is_returned_in_apollo_format(self):
+        body = self.post_graphql({"query": FEED_QUERY})
+        trace = body["extensions"]["tracing"]
+        self.assertEqual(trace["version"], 1)
+        self.assertGreaterEqual(trace["duration"], trace["parsing"]["duration"])
+        resolvers = self.resolvers(body)
+        root = resolvers[("allPosts",)]
+        self.assertEqual(root["parentType"], "Query")
+        self.assertEqual(root["fieldName"], "allPosts")
+        self.assertGreater(root["duration"], 0)
+        self.assertIn(("allPosts", "edges", 1, "node", "author", "name"), resolvers)
+        # The cost extension is kept
+        self.assertIn("cost", body["extensions"])
+
+    # Every query of the operation is attributed to the field running it
+    def test_sql_queries_are_counted_per_field(self):
+        with CaptureQueriesContext(connection) as queries:
+            resolvers = self.resolvers(self.post_graphql({"query": FEED_QUERY}))
+        self.assertGreaterEqual(resolvers[("allPosts",)]["dbQueries"], 1)
+        self.assertGreater(resolvers[("allPosts",)]["dbDuration"], 0)
+        self.assertEqual(
+            resolvers[("allPosts", "edges", 0, "node", "title")]["dbQueries"], 0
+        )
+        self.assertEqual(
+            sum(resolver["dbQueries"] for resolver in resolvers.values()),
+            len(queries),
+        )
+
+    def test_traces_are_aggregated_per_operation(self):
+        self.post_graphql({"query": FEED_QUERY})
+        self.post_graphql({"query": FEED_QUERY})
+        self.post_graphql(
+            {"query": "query { allAuthors { edges { node { name } } } }"}
+        )
+        operations = tracing.stats.snapshot()
+        self.assertEqual(operations["Feed"]["count"], 2)
+        self.assertEqual(operations["anonymous"]["count"], 1)
+        titles = operations["Feed"]["fields"]["allPosts.edges.node.title"]
+        self.assertEqual(titles["count"], 4)
+        self.assertEqual(titles["dbQueries"], 0)
+
+    @override_settings(GRAPHQL_TRACING={"SAMPLE_RATE": 1, "MAX_OPERATIONS": 1})
+    def test_operation_names_are_bounded(self):
+        self.post_graphql({"query": FEED_QUERY})
+        self.post_graphql(
+            {"query": "query Other { allAuthors { edges { node { name } } } }"}
+        )
+        self.assertEqual(set(tracing.stats.snapshot()), {"Feed", "other"})
+
+    @override_settings(GRAPHQL_TRACING={"SAMPLE_RATE": 1})
+    def test_extensions_can_be_disabled(self):
+        body = self.post_graphql({"query": FEED_QUERY})
+        self.assertNotIn("tracing", body["extensions"])
+        self.assertEqual(tracing.stats.snapshot()["Feed"]["count"], 1)
+
+    @override_settings(GRAPHQL_TRACING={"SAMPLE_RATE": 0, "EXTENSIONS": True})
+    def test_unsampled_operations_are_not_traced(self):
+        body = self.post_graphql({"query": FEED_QUERY})
+        self.assertNotIn("tracing", body["extensions"])
+        self.assertEqual(tracing.stats.snapshot(), {})
+
+    def test_batched_operations_are_traced_separately(self):
+        results = self.post_graphql(
+            [
+                {"query": FEED_QUERY},
+                {"query": "query Authors { allAuthors { edges { node { name } } } }"},
+            ]
+        )
+        self.assertIn(("allPosts",), self.resolvers(results[0]))
+        self.assertEqual(
+            list(self.resolvers(results[1])),
+            [
+                ("allAuthors",),
+                ("allAuthors", "edges"),
+                ("allAuthors", "edges", 0, "node"),
+                ("allAuthors", "edges", 0, "node", "name"),
+            ],
+        )
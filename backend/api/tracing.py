@@ -0,0 +1,209 @@
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+DEFAULTS = {
+    # Fraction of the operations traced, 0 disables tracing
+    "SAMPLE_RATE": 0.0,
+    # Return the trace of sampled operations in the response extensions, in
+    # the Apollo tracing format
+    "EXTENSIONS": False,
+    # Operation names aggregated separately, the others are counted together
+    # under OTHER_OPERATIONS
+    "MAX_OPERATIONS": 200,
+}
+
+ANONYMOUS_OPERATION = "anonymous"
+OTHER_OPERATIONS = "other"
+
+
+def get_setting(name):
+    return getattr(settings, "GRAPHQL_TRACING", {}).get(name, DEFAULTS[name])
+
+
+# Counts the SQL queries executed while it is installed as an execute wrapper,
+# and appends (alias, sql, params, many, duration) of each one to `statements`
+class QueryCounter:
+    def __init__(self, statements):
+        self.count = 0
+        self.duration = 0
+        self.statements = statements
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter_ns() - start
+            self.count += 1
+            self.duration += duration
+            self.statements.append(
+                (context["connection"].alias, sql, params, many, duration)
+            )
+
+
+# Timing and SQL queries of every field resolved by one operation. Durations
+# are in nanoseconds, offsets are from the start of the operation. Only
+# sampled traces are aggregated and returned in the extensions.
+class Trace:
+    def __init__(self, operation_name, sampled=True):
+        self.operation_name = operation_name or ANONYMOUS_OPERATION
+        self.sampled = sampled
+        self.start_time = timezone.now()
+        self.start = time.perf_counter_ns()
+        self.end_time = None
+        self.duration = None
+        self.parsing = (0, 0)
+        self.resolvers = []
+        self.queries = []
+
+    def offset(self):
+        return time.perf_counter_ns() - self.start
+
+    # Resolve a field with `next`, recording its timing and SQL queries
+    def resolve_field(self, next, root, info, **kwargs):
+        counter = QueryCounter(self.queries)
+        start = self.offset()
+        with ExitStack() as stack:
+            # Every alias, the fields of a query may read from a replica
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            try:
+                return next(root, info, **kwargs)
+            finally:
+                # Fields resolved concurrently by the async view append from
+                # their own threads, list.append is atomic
+                self.resolvers.append(
+                    {
+                        "path": info.path.as_list(),
+                        "parentType": str(info.parent_type),
+                        "fieldName": info.field_name,
+                        "returnType": str(info.return_type),
+                        "startOffset": start,
+                        "duration": self.offset() - start,
+                        "dbQueries": counter.count,
+                        "dbDuration": counter.duration,
+                    }
+                )
+
+    def finish(self):
+        self.duration = self.offset()
+        self.end_time = timezone.now()
+
+    # https://github.com/apollographql/apollo-tracing, extended with the SQL
+    # queries of every resolver. The document cache parses and validates in
+    # one step, its time is reported as parsing.
+    def as_apollo(self):
+        parsing_offset, parsing_duration = self.parsing
+        return {
+            "version": 1,
+            "startTime": self.start_time.isoformat(),
+            "endTime": self.end_time.isoformat(),
+            "duration": self.duration,
+            "parsing": {"startOffset": parsing_offset, "duration": parsing_duration},
+            "validation": {
+                "startOffset": parsing_offset + parsing_duration,
+                "duration": 0,
+            },
+            "execution": {
+                "resolvers": sorted(self.resolvers, key=lambda r: r["startOffset"])
+            },
+        }
+
+
+# The path of a resolved field without the list indexes, so all the nodes of
+# a list add up in one entry
+def field_path(path):
+    return ".".join(str(key) for key in path if not isinstance(key, int))
+
+
+# Totals per operation name and field path, since the start of the process
+class TraceStats:
+    def __init__(self):
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def add(self, trace):
+        with self._lock:
+            name = trace.operation_name
+            if (
+                name not in self._operations
+                and len(self._operations) >= get_setting("MAX_OPERATIONS")
+            ):
+                name = OTHER_OPERATIONS
+            operation = self._operations.setdefault(
+                name, {"count": 0, "duration": 0, "fields": {}}
+            )
+            operation["count"] += 1
+            operation["duration"] += trace.duration
+            for resolver in trace.resolvers:
+                path = field_path(resolver["path"])
+                field = operation["fields"].setdefault(
+                    path, {"count": 0, "duration": 0, "dbQueries": 0, "dbDuration": 0}
+                )
+                field["count"] += 1
+                field["duration"] += resolver["duration"]
+                field["dbQueries"] += resolver["dbQueries"]
+                field["dbDuration"] += resolver["dbDuration"]
+
+    # Copy of the totals: {operation: {count, duration, fields: {path: {...}}}}
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    "count": operation["count"],
+                    "duration": operation["duration"],
+                    "fields": {
+                        path: dict(field)
+                        for path, field in operation["fields"].items()
+                    },
+                }
+                for name, operation in self._operations.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+
+stats = TraceStats()
+
+
+# A new trace when the operation is sampled or a trace is `required` anyway
+# (by the slow log), otherwise None
+def start_trace(operation_name, required=False):
+    sample_rate = get_setting("SAMPLE_RATE")
+    sampled = sample_rate > 0 and random.random() < sample_rate
+    if not (sampled or required):
+        return None
+    return Trace(operation_name, sampled)
+
+
+# Finish the trace. Sampled traces are recorded, and added to the extensions
+# of `result` when enabled.
+def finish_trace(trace, result):
+    trace.finish()
+    if not trace.sampled:
+        return
+    stats.add(trace)
+    if get_setting("EXTENSIONS"):
+        result.extensions = {
+            **(result.extensions or {}),
+            "tracing": trace.as_apollo(),
+        }
+
+
+# Graphene middleware recording every field of the traced operations (see
+# BlogGraphQLView.execute_graphql_request). Other operations only pay for one
+# attribute lookup per field.
+class TracingMiddleware:
+    def resolve(self, next, root, info, **kwargs):
+        trace = getattr(info.context, "graphql_trace", None)
+        if trace is None:
+            return next(root, info, **kwargs)
+        return trace.resolve_field(next, root, info, **kwargs)
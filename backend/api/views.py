@@ -1,3 +1,401 @@
+import hmac
+import json
+import time
+from contextlib import nullcontext
+from inspect import isawaitable
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
 from django.shortcuts import render
 
 # Create your views here.
+from django.db import connection, transaction
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from django.http.response import HttpResponseBadRequest
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import (
+    ExecutionResult,
+    GraphQLError,
+    OperationType,
+    execute,
+    get_operation_ast,
+    validate_schema,
+)
+
+from .cost import QueryCostError, analyze_query, get_setting as get_cost_setting
+from .document_cache import document_cache
+from .execution import ConcurrentExecutionContext
+from .http_cache import (
+    conditional_response,
+    is_enabled as http_cache_enabled,
+    mark_cacheable,
+)
+from .persisted_queries import PersistedQueryError, resolve_persisted_query
+from . import metrics, profiling, response_cache, routers, slow_log, tracing
+
+
+def bad_request(message):
+    return HttpError(HttpResponseBadRequest(message))
+
+
+# GraphQL endpoint used by /graphql/
+class BlogGraphQLView(GraphQLView):
+    # Parse and validate `query`, reusing the cached document for repeated
+    # operations
+    def get_document(self, query):
+        schema = self.schema.graphql_schema
+        return document_cache.get(schema, query, self.validation_rules)
+
+    # A JSON array of operations is executed as a batch: the operations share
+    # the request, so the token is verified once and the loaders are shared,
+    # and the results are returned in the same order
+    def parse_body(self, request):
+        if self.get_content_type(request) != "application/json":
+            return super().parse_body(request)
+
+        try:
+            data = json.loads(request.body.decode("utf-8"))
+        except ValueError:
+            raise bad_request("POST body sent invalid JSON.")
+
+        if isinstance(data, list):
+            max_operations = getattr(settings, "GRAPHQL_BATCH_MAX_OPERATIONS", 10)
+            if not data:
+                raise bad_request("Received an empty list in the batch request.")
+            if len(data) > max_operations:
+                raise bad_request(
+                    f"Batch requests are limited to {max_operations} operations."
+                )
+            if not all(isinstance(entry, dict) for entry in data):
+                raise bad_request("The received data is not a valid JSON query.")
+            self.batch = True
+        elif not isinstance(data, dict):
+            raise bad_request("The received data is not a valid JSON query.")
+        return data
+
+    # GET query responses carry an ETag and Cache-Control, and clients sending
+    # the current ETag in If-None-Match get a 304. Responses to mutations pin
+    # the client to the primary database for a while. Staff can ask for a
+    # profile of the request (see api/profiling.py).
+    def dispatch(self, request, *args, **kwargs):
+        profiler = profiling.start(request)
+        if profiler is None:
+            return self.dispatch_graphql(request, *args, **kwargs)
+        try:
+            response = self.dispatch_graphql(request, *args, **kwargs)
+        finally:
+            profiler.disable()
+        profiling.save(profiler, response)
+        return response
+
+    def dispatch_graphql(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        routers.patch_response(request, response)
+        if self.batch:
+            return response
+        return conditional_response(request, response)
+
+    def execute_operation(self, operation_ast, schema, document, **options):
+        return execute(schema, document, **options)
+
+    # Static cost of the operation, raises QueryCostError when over budget
+    def analyze_cost(self, document, operation_name, variables):
+        if not get_cost_setting("ENABLED"):
+            return None
+        return analyze_query(
+            self.schema.graphql_schema, document, operation_name, variables
+        )
+
+    # Same as GraphQLView.get_response, but the result `extensions` (e.g. the
+    # query cost) are included in the response and the operation is timed
+    # (see api/metrics.py)
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        # Set by execute_graphql_request once the document is parsed
+        request.graphql_operation = (operation_name, "unknown")
+        start = time.perf_counter()
+        failed = True
+        try:
+            execution_result = self.execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+            failed = bool(execution_result and execution_result.errors)
+        finally:
+            name, type = request.graphql_operation
+            metrics.observe_operation(
+                name, type, time.perf_counter() - start, failed
+            )
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                set_rollback()
+                response["errors"] = [
+                    self.format_error(e) for e in execution_result.errors
+                ]
+
+            if execution_result.errors and any(
+                not getattr(e, "path", None) for e in execution_result.errors
+            ):
+                status_code = 400
+            else:
+                response["data"] = execution_result.data
+
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+
+        return result, status_code
+
+    # Same as GraphQLView.execute_graphql_request, but Automatic Persisted
+    # Queries are resolved first, parsing and validation go through the
+    # document cache, the query cost is checked before execution, anonymous
+    # queries are answered from the response cache, GET queries are
+    # validated with their ETag, queries read from the replica database,
+    # sampled operations are traced (see api/tracing.py) and slow operations
+    # logged (see api/slow_log.py)
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        try:
+            query = resolve_persisted_query(request, data, query)
+        except PersistedQueryError as e:
+            return ExecutionResult(errors=[e])
+
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        trace = tracing.start_trace(
+            operation_name, required=slow_log.is_enabled()
+        )
+        if trace:
+            parsing_start = trace.offset()
+        try:
+            document, validation_errors = self.get_document(query)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+        if trace:
+            trace.parsing = (parsing_start, trace.offset() - parsing_start)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is not None:
+            name = operation_ast.name.value if operation_ast.name else None
+            request.graphql_operation = (name, operation_ast.operation.value)
+            if trace and name:
+                trace.operation_name = name
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        if (
+            operation_ast is not None
+            and operation_ast.operation == OperationType.SUBSCRIPTION
+        ):
+            return ExecutionResult(
+                errors=[
+                    GraphQLError("Subscriptions are only available over WebSockets")
+                ]
+            )
+
+        try:
+            cost = self.analyze_cost(document, operation_name, variables)
+        except QueryCostError as e:
+            return ExecutionResult(
+                errors=[e], extensions={"cost": e.extensions["cost"]}
+            )
+        extensions = {"cost": cost} if cost else None
+
+        cache_key = None
+        if response_cache.is_cacheable(request, operation_ast):
+            cache_key = response_cache.get_cache_key(
+                schema, document, variables, operation_name
+            )
+            data = response_cache.get_response(cache_key)
+            if data is not None:
+                if http_cache_enabled(request):
+                    mark_cacheable(request, public=True)
+                return ExecutionResult(data=data, extensions=extensions)
+
+        request.graphql_trace = trace
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = (
+                    self.execution_context_class
+                )
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+            ):
+                # The next reads of the client must see the changes
+                routers.pin_to_primary(request)
+                if (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                ):
+                    with transaction.atomic():
+                        result = self.execute_operation(
+                            operation_ast, schema, document, **execute_options
+                        )
+                        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                            transaction.set_rollback(True)
+                else:
+                    result = self.execute_operation(
+                        operation_ast, schema, document, **execute_options
+                    )
+            else:
+                reads = (
+                    routers.read_from_replica()
+                    if response_cache.is_query(operation_ast)
+                    and routers.use_replica(request)
+                    else nullcontext()
+                )
+                with reads:
+                    result = self.execute_operation(
+                        operation_ast, schema, document, **execute_options
+                    )
+        except Exception as e:
+            result = ExecutionResult(errors=[e])
+        finally:
+            request.graphql_trace = None
+
+        if trace:
+            tracing.finish_trace(trace, result)
+            slow_log.check(trace, document, variables)
+
+        if (
+            self.batch
+            and operation_ast is not None
+            and operation_ast.operation == OperationType.MUTATION
+        ):
+            # The next operations of the batch must see the changes
+            loaders = getattr(request, "loaders", None)
+            if loaders is not None:
+                loaders.clear()
+
+        if not result.errors:
+            if cache_key:
+                response_cache.set_response(cache_key, result.data)
+            if http_cache_enabled(request) and response_cache.is_query(operation_ast):
+                mark_cacheable(request, public=response_cache.is_anonymous(request))
+
+        if extensions:
+            result.extensions = {**(result.extensions or {}), **extensions}
+        return result
+
+
+# Async GraphQL endpoint for ASGI deployments (GRAPHQL_ASYNC).
+#
+# Request parsing, caching and the response are handled by BlogGraphQLView in
+# a thread. Queries are executed on the event loop, with every top-level field
+# resolved concurrently in its own worker thread, so a slow field neither
+# blocks the other fields nor the other requests of the worker.
+class AsyncBlogGraphQLView(BlogGraphQLView):
+    view_is_async = True
+    execution_context_class = ConcurrentExecutionContext
+
+    async def dispatch(self, request, *args, **kwargs):
+        return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+    def execute_operation(self, operation_ast, schema, document, **options):
+        if operation_ast is None or operation_ast.operation != OperationType.QUERY:
+            return super().execute_operation(
+                operation_ast, schema, document, **options
+            )
+        if profiling.is_profiled(options["context_value"]):
+            # cProfile only sees the current thread, profiled queries are
+            # executed serially in it
+            options.pop("execution_context_class")
+            return super().execute_operation(
+                operation_ast, schema, document, **options
+            )
+        return async_to_sync(self.execute_async)(schema, document, **options)
+
+    async def execute_async(self, schema, document, **options):
+        result = execute(schema, document, **options)
+        if isawaitable(result):
+            result = await result
+        return result
+
+
+# Prometheus scrape endpoint (see api/metrics.py). With METRICS_AUTH_TOKEN set
+# the scraper must send it as a Bearer token.
+def metrics_view(request):
+    token = getattr(settings, "METRICS_AUTH_TOKEN", "")
+    if token:
+        authorization = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(authorization, f"Bearer {token}"):
+            return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
+
+
+# Profile of a /graphql/ request (see api/profiling.py), staff only: the
+# pstats file, or the text report with ?format=text
+def profile_view(request, profile_id):
+    if not profiling.get_setting("ENABLED"):
+        raise Http404
+    if profiling.get_staff_user(request) is None:
+        return HttpResponse(status=403)
+    profile = profiling.load(profile_id)
+    if profile is None:
+        raise Http404
+    if request.GET.get("format") == "text":
+        return HttpResponse(
+            profile["report"], content_type="text/plain; charset=utf-8"
+        )
+    response = HttpResponse(
+        profile["stats"], content_type="application/octet-stream"
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="graphql-profile-{profile_id}.prof"'
+    )
+    return response
@@ -0,0 +1,262 @@
+import asyncio
+import json
+from contextlib import aclosing
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from graphene_django.settings import graphene_settings
+from graphql import (
+    ExecutionResult,
+    GraphQLError,
+    OperationType,
+    create_source_event_stream,
+    execute,
+    get_operation_ast,
+)
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.settings import jwt_settings
+
+from .auth import get_user_by_token
+from .cost import analyze_query, get_setting as get_cost_setting
+from .document_cache import document_cache
+from .execution import ConcurrentExecutionContext, run_in_thread
+
+# graphql-ws (https://github.com/enisdenjo/graphql-ws) and the legacy
+# subscriptions-transport-ws protocol used by GraphiQL
+GRAPHQL_TRANSPORT_WS = "graphql-transport-ws"
+GRAPHQL_WS = "graphql-ws"
+
+# Seconds a client has to send connection_init after connecting
+CONNECTION_INIT_TIMEOUT = 10
+
+
+class CloseCode:
+    BAD_REQUEST = 4400
+    UNAUTHORIZED = 4401
+    FORBIDDEN = 4403
+    SUBPROTOCOL_NOT_ACCEPTABLE = 4406
+    CONNECTION_INIT_TIMEOUT = 4408
+    SUBSCRIBER_ALREADY_EXISTS = 4409
+    TOO_MANY_INIT_REQUESTS = 4429
+
+
+# Context of the operations of a connection, standing in for the request.
+# Every execution gets a new one so loaders never serve stale objects.
+class SubscriptionContext:
+    def __init__(self, scope, user):
+        self.scope = scope
+        self.user = user
+
+
+# One WebSocket connection serving GraphQL operations
+class GraphQLWebSocket:
+    def __init__(self, scope, receive, send, schema):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.schema = schema
+        self.protocol = None
+        self.user = AnonymousUser()
+        self.acknowledged = False
+        self.operations = {}
+
+    async def run(self):
+        event = await self.receive()
+        if event["type"] != "websocket.connect":
+            return
+
+        subprotocols = self.scope.get("subprotocols") or []
+        for protocol in (GRAPHQL_TRANSPORT_WS, GRAPHQL_WS):
+            if protocol in subprotocols:
+                self.protocol = protocol
+                break
+        else:
+            await self.close(CloseCode.SUBPROTOCOL_NOT_ACCEPTABLE)
+            return
+
+        await self.send({"type": "websocket.accept", "subprotocol": self.protocol})
+        init_timeout = asyncio.create_task(self.close_without_init())
+        try:
+            while True:
+                event = await self.receive()
+                if event["type"] == "websocket.disconnect":
+                    break
+                if event["type"] == "websocket.receive":
+                    if not await self.handle_text(event.get("text")):
+                        break
+        finally:
+            init_timeout.cancel()
+            for task in self.operations.values():
+                task.cancel()
+
+    async def close(self, code):
+        await self.send({"type": "websocket.close", "code": code})
+
+    async def close_without_init(self):
+        await asyncio.sleep(CONNECTION_INIT_TIMEOUT)
+        if not self.acknowledged:
+            await self.close(CloseCode.CONNECTION_INIT_TIMEOUT)
+
+    async def send_message(self, type, id=None, payload=None):
+        message = {"type": type}
+        if id is not None:
+            message["id"] = id
+        if payload is not None:
+            message["payload"] = payload
+        await self.send({"type": "websocket.send", "text": json.dumps(message)})
+
+    # Handle a client message, returns False once the connection is closed
+    async def handle_text(self, text):
+        try:
+            message = json.loads(text or "")
+            type = message["type"]
+        except (ValueError, TypeError, KeyError):
+            await self.close(CloseCode.BAD_REQUEST)
+            return False
+
+        if type == "connection_init":
+            return await self.init(message.get("payload") or {})
+        if type == "ping":
+            await self.send_message("pong")
+        elif type == "pong":
+            pass
+        elif type == "connection_terminate":
+            await self.close(1000)
+            return False
+        elif not self.acknowledged:
+            await self.close(CloseCode.UNAUTHORIZED)
+            return False
+        elif type in ("subscribe", "start"):
+            return await self.start(message.get("id"), message.get("payload") or {})
+        elif type in ("complete", "stop"):
+            task = self.operations.pop(message.get("id"), None)
+            if task is not None:
+                task.cancel()
+        else:
+            await self.close(CloseCode.BAD_REQUEST)
+            return False
+        return True
+
+    # Acknowledge the connection, authenticating the token of the payload
+    # (`Authorization: "<prefix> <token>"` or `authToken`) when there is one
+    async def init(self, payload):
+        if self.acknowledged:
+            await self.close(CloseCode.TOO_MANY_INIT_REQUESTS)
+            return False
+
+        token = payload.get("authToken")
+        authorization = payload.get("Authorization") or payload.get("authorization")
+        if not token and isinstance(authorization, str):
+            prefix, _, token = authorization.partition(" ")
+            if prefix.lower() != jwt_settings.JWT_AUTH_HEADER_PREFIX.lower():
+                token = None
+        if token:
+            try:
+                user = await sync_to_async(get_user_by_token)(token)
+            except JSONWebTokenError:
+                user = None
+            if user is None:
+                await self.close(CloseCode.FORBIDDEN)
+                return False
+            self.user = user
+
+        self.acknowledged = True
+        await self.send_message("connection_ack")
+        return True
+
+    async def start(self, id, payload):
+        if not isinstance(id, str) or not id:
+            await self.close(CloseCode.BAD_REQUEST)
+            return False
+        if id in self.operations:
+            await self.close(CloseCode.SUBSCRIBER_ALREADY_EXISTS)
+            return False
+        task = asyncio.create_task(self.run_operation(id, payload))
+        self.operations[id] = task
+        task.add_done_callback(lambda _: self.operations.pop(id, None))
+        return True
+
+    async def send_error(self, id, errors):
+        formatted = [error.formatted for error in errors]
+        if self.protocol == GRAPHQL_WS:
+            await self.send_message("error", id, formatted[0])
+        else:
+            await self.send_message("error", id, formatted)
+
+    async def send_result(self, id, result):
+        type = "data" if self.protocol == GRAPHQL_WS else "next"
+        await self.send_message(type, id, result.formatted)
+
+    def context(self):
+        return SubscriptionContext(self.scope, self.user)
+
+    async def run_operation(self, id, payload):
+        query = payload.get("query")
+        variables = payload.get("variables")
+        operation_name = payload.get("operationName")
+        try:
+            if not isinstance(query, str):
+                raise GraphQLError("Must provide query string.")
+            schema = self.schema.graphql_schema
+            document, validation_errors = document_cache.get(schema, query)
+            if validation_errors:
+                await self.send_error(id, validation_errors)
+                return
+            if get_cost_setting("ENABLED"):
+                analyze_query(schema, document, operation_name, variables)
+        except GraphQLError as e:
+            await self.send_error(id, [e])
+            return
+
+        options = {
+            "variable_values": variables,
+            "operation_name": operation_name,
+        }
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is None or operation_ast.operation != OperationType.SUBSCRIPTION:
+            result = await run_in_thread(
+                lambda: execute(
+                    schema, document, context_value=self.context(), **options
+                )
+            )
+            await self.send_result(id, result)
+        else:
+            stream = create_source_event_stream(
+                schema, document, context_value=self.context(), **options
+            )
+            if isawaitable(stream):
+                stream = await stream
+            if isinstance(stream, ExecutionResult):
+                await self.send_error(id, stream.errors)
+                return
+            async with aclosing(stream):
+                async for event in stream:
+                    result = execute(
+                        schema,
+                        document,
+                        root_value=event,
+                        context_value=self.context(),
+                        execution_context_class=ConcurrentExecutionContext,
+                        **options,
+                    )
+                    if isawaitable(result):
+                        result = await result
+                    await self.send_result(id, result)
+
+        await self.send_message("complete", id)
+
+
+# ASGI application serving GraphQL over WebSockets on `path`
+class GraphQLWebSocketApp:
+    def __init__(self, path="/graphql/", schema=None):
+        self.path = path
+        self.schema = schema
+
+    async def __call__(self, scope, receive, send):
+        if scope["path"] != self.path:
+            await receive()
+            await send({"type": "websocket.close", "code": 1000})
+            return
+        schema = self.schema or graphene_settings.SCHEMA
+        await GraphQLWebSocket(scope, receive, send, schema).run()
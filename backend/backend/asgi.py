@@ -13,4 +13,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from api.websocket import GraphQLWebSocketApp  # noqa: E402
+
+# GraphQL subscriptions (and other operations) over WebSockets on /graphql/
+websocket_application = GraphQLWebSocketApp(path="/graphql/")
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -15,14 +15,26 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
 from api import urls as api_urls 
+from api.views import (
+    AsyncBlogGraphQLView,
+    BlogGraphQLView,
+    metrics_view,
+    profile_view,
+)
+
+GraphQLView = AsyncBlogGraphQLView if settings.GRAPHQL_ASYNC else BlogGraphQLView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include(api_urls)),
     path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path(
+        "graphql/profiles/<str:profile_id>", profile_view, name="graphql_profile"
+    ),
+    path("metrics", metrics_view, name="metrics"),
 ]
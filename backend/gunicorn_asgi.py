@@ -0,0 +1,44 @@
+# Gunicorn settings for the ASGI deployment:
+#
+#   GRAPHQL_ASYNC=True gunicorn backend.asgi:application -c gunicorn_asgi.py
+#
+# Each uvicorn worker runs an event loop serving many requests at once. The
+# synchronous parts of a request run in asgiref's thread pool, sized with the
+# ASGI_THREADS environment variable.
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# The workers keep their Prometheus metrics in files of this directory and
+# /metrics adds them up (see api/metrics.py). It is emptied when gunicorn
+# starts, so the counters of a previous run are not reported again.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "blog-metrics")
+)
+
+# The workers share the response cache, its invalidations and the persisted
+# queries through this cache (see CACHES in backend/settings.py). Point
+# CACHE_URL to Redis or Memcached to share it between machines.
+os.environ.setdefault(
+    "CACHE_URL", f"filecache://{os.path.join(tempfile.gettempdir(), 'blog-cache')}"
+)
+
+
+def on_starting(server):
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+# The gauges of a dead worker are dropped, its counters and histograms are kept
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)